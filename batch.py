@@ -0,0 +1,186 @@
+"""Chunked transactions for bulk model edits.
+
+Operations are queued on a ``BatchWriter`` and committed in transactions of
+``chunk_size`` operations, all inside one TransactionGroup so that the whole
+run is a single undo step:
+
+    # one create_sheets call per 50 sheets, each committed on its own
+    writer = batch.BatchWriter("Create Sheets", chunk_size=1, suppress_warnings=True)
+    for start in range(0, len(sheets), 50):
+        writer.add(database.create_sheets, sheets[start:start + 50], titleblock.Id, doc)
+    report = writer.run()
+    report.print_report()
+
+A failing operation rolls back its chunk, and the other operations of that
+chunk are then replayed one at a time, so only the failing ones are lost.
+"""
+
+from timeit import default_timer
+from pyrevit import revit, DB
+
+COLUMNS = ["Chunk", "Operations", "Succeeded", "Failed", "Warnings", "Time (ms)", "Operations/s"]
+
+
+class WarningSwallower(DB.IFailuresPreprocessor):
+    """Failures preprocessor deleting warnings, so they do not stop the batch"""
+
+    def __init__(self):
+        self.deleted = 0
+
+    def PreprocessFailures(self, failures_accessor):
+        for failure in failures_accessor.GetFailureMessages():
+            if failure.GetSeverity() == DB.FailureSeverity.Warning:
+                failures_accessor.DeleteWarning(failure)
+                self.deleted += 1
+        return DB.FailureProcessingResult.Continue
+
+
+class ChunkReport(object):
+    """Outcome and timing of one chunk"""
+
+    def __init__(self, index, size):
+        self.index = index
+        self.size = size
+        self.succeeded = 0
+        self.failed = 0
+        self.warnings = 0
+        self.seconds = 0.0
+
+    @property
+    def throughput(self):
+        return self.succeeded / self.seconds if self.seconds else 0.0
+
+
+class BatchReport(object):
+    """Results of a batch run, in the order the operations were added.
+
+    ``results`` holds the return value of each operation, None for failed
+    ones, and ``errors`` the (operation index, exception) of each failure.
+    """
+
+    def __init__(self, size):
+        self.results = [None] * size
+        self.errors = []
+        self.chunks = []
+
+    @property
+    def succeeded(self):
+        return sum(chunk.succeeded for chunk in self.chunks)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    @property
+    def seconds(self):
+        return sum(chunk.seconds for chunk in self.chunks)
+
+    def rows(self):
+        return [[chunk.index, chunk.size, chunk.succeeded, chunk.failed, chunk.warnings,
+                 round(chunk.seconds * 1000, 1), round(chunk.throughput, 1)] for chunk in self.chunks]
+
+    def print_report(self, output=None, title="Batch throughput"):
+        if output is None:
+            from pyrevit import script
+            output = script.get_output()
+        output.print_table(table_data=self.rows(), columns=COLUMNS, title=title)
+
+
+class BatchWriter(object):
+    """Queues edit operations and commits them in chunked transactions.
+
+    Inside a transaction that is already open, the chunks are committed as
+    SubTransactions of it instead, and no TransactionGroup is started.
+    SubTransactions take no failures preprocessor, so suppress_warnings is
+    refused there: the warnings are left to the open transaction.
+    """
+
+    def __init__(self, name, doc=revit.doc, chunk_size=100, suppress_warnings=False):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.name = name
+        self.doc = doc
+        self.chunk_size = chunk_size
+        self.suppress_warnings = suppress_warnings
+        self._operations = []
+
+    def __len__(self):
+        return len(self._operations)
+
+    def add(self, operation, *args, **kwargs):
+        # queue operation(*args, **kwargs), returns its index in the report results
+        self._operations.append((operation, args, kwargs))
+        return len(self._operations) - 1
+
+    def _transaction(self, name, preprocessor):
+        if self.doc.IsModifiable:
+            return DB.SubTransaction(self.doc)
+        transaction = DB.Transaction(self.doc, name)
+        if preprocessor is not None:
+            options = transaction.GetFailureHandlingOptions()
+            options.SetFailuresPreprocessor(preprocessor)
+            transaction.SetFailureHandlingOptions(options)
+        return transaction
+
+    def _commit(self, indices, report, chunk, preprocessor):
+        # run the operations in one transaction, True if all of them were committed
+        results = []
+        transaction = self._transaction("{} ({})".format(self.name, chunk.index + 1), preprocessor)
+        transaction.Start()
+        try:
+            for i in indices:
+                operation, args, kwargs = self._operations[i]
+                results.append(operation(*args, **kwargs))
+        except Exception as error:
+            transaction.RollBack()
+            if len(indices) == 1:
+                report.errors.append((indices[0], error))
+            return False
+        if transaction.Commit() != DB.TransactionStatus.Committed:
+            if len(indices) == 1:
+                report.errors.append((indices[0], RuntimeError("The transaction was rolled back by Revit")))
+            return False
+        for i, result in zip(indices, results):
+            report.results[i] = result
+        return True
+
+    def _run_chunk(self, indices, report, chunk, preprocessor):
+        if self._commit(indices, report, chunk, preprocessor):
+            chunk.succeeded = len(indices)
+            return
+        if len(indices) > 1:
+            # replay the chunk one operation at a time, to lose only the failing ones
+            for i in indices:
+                if self._commit([i], report, chunk, preprocessor):
+                    chunk.succeeded += 1
+        chunk.failed = len(indices) - chunk.succeeded
+
+    def run(self):
+        # commit every queued operation and empty the queue
+        if self.suppress_warnings and self.doc.IsModifiable:
+            raise ValueError("suppress_warnings needs transactions of its own, "
+                             "it cannot apply inside an open transaction")
+        report = BatchReport(len(self._operations))
+        preprocessor = WarningSwallower() if self.suppress_warnings else None
+        group = None
+        if not self.doc.IsModifiable:
+            group = DB.TransactionGroup(self.doc, self.name)
+            group.Start()
+        try:
+            for start in range(0, len(self._operations), self.chunk_size):
+                indices = list(range(start, min(start + self.chunk_size, len(self._operations))))
+                chunk = ChunkReport(len(report.chunks), len(indices))
+                deleted = preprocessor.deleted if preprocessor else 0
+                began = default_timer()
+                self._run_chunk(indices, report, chunk, preprocessor)
+                chunk.seconds = default_timer() - began
+                chunk.warnings = preprocessor.deleted - deleted if preprocessor else 0
+                report.chunks.append(chunk)
+        except BaseException:
+            if group is not None:
+                group.RollBack()
+            raise
+        if group is not None:
+            group.Assimilate()
+        self._operations = []
+        return report
@@ -0,0 +1,1548 @@
+"""In-memory stand-in for the subset of Autodesk.Revit.DB used by pychilizer.
+
+Only the behaviour pychilizer relies on is modelled: elements with parameters,
+filtered collectors with indexed class/category lookups, transactions with
+undo and DocumentChanged events, and enough geometry for the geo helpers.
+"""
+
+import math
+import uuid
+from itertools import count
+
+
+# --- enums -------------------------------------------------------------------
+
+class EnumValue(int):
+    def __new__(cls, enum_name, name, value):
+        obj = int.__new__(cls, value)
+        obj.name = name
+        obj.enum_name = enum_name
+        return obj
+
+    def __repr__(self):
+        return "{}.{}".format(self.enum_name, self.name)
+
+    def __str__(self):
+        return self.name
+
+    def ToString(self):
+        return self.name
+
+    def __eq__(self, other):
+        return int(self) == int(other) if isinstance(other, int) else NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return int.__hash__(self)
+
+
+def make_enum(enum_name, members):
+    values = dict((name, EnumValue(enum_name, name, value)) for name, value in members.items())
+    by_value = dict((int(v), v) for v in values.values())
+    attrs = dict(values)
+    attrs["_by_value"] = by_value
+    return type(enum_name, (object,), attrs)
+
+
+BuiltInCategory = make_enum("BuiltInCategory", {
+    "INVALID": -1,
+    "OST_Walls": -2000011,
+    "OST_Windows": -2000014,
+    "OST_Doors": -2000023,
+    "OST_Floors": -2000032,
+    "OST_Ceilings": -2000038,
+    "OST_Lines": -2000051,
+    "OST_InvisibleLines": -2000064,
+    "OST_Furniture": -2000080,
+    "OST_Columns": -2000100,
+    "OST_GenericModel": -2000151,
+    "OST_Rooms": -2000160,
+    "OST_Views": -2000279,
+    "OST_TitleBlocks": -2000280,
+    "OST_Viewports": -2000510,
+    "OST_Casework": -2001000,
+    "OST_ElectricalEquipment": -2001040,
+    "OST_FurnitureSystems": -2001100,
+    "OST_LightingFixtures": -2001120,
+    "OST_MechanicalEquipment": -2001140,
+    "OST_PlumbingFixtures": -2001160,
+    "OST_Parking": -2001180,
+    "OST_Site": -2001260,
+    "OST_SpecialityEquipment": -2001350,
+    "OST_Planting": -2001360,
+    "OST_Entourage": -2001370,
+    "OST_Sheets": -2003100,
+    "OST_Mass": -2003400,
+})
+
+BuiltInParameter = make_enum("BuiltInParameter", {
+    "INVALID": -1,
+    "SHEET_NUMBER": -1007401,
+    "SHEET_NAME": -1007400,
+    "VIEW_NAME": -1002124,
+    "SYMBOL_FAMILY_NAME_PARAM": -1002002,
+    "ALL_MODEL_TYPE_NAME": -1002001,
+    "ALL_MODEL_MARK": -1001203,
+    "ALL_MODEL_INSTANCE_COMMENTS": -1010106,
+    "VIEWPORT_ATTR_SHOW_LABEL": -1005624,
+    "VIEWER_ANNOTATION_CROP_ACTIVE": -1005522,
+    "MATERIAL_ID_PARAM": -1001510,
+    "ROOM_NAME": -1006916,
+    "ROOM_NUMBER": -1006917,
+    "ROOM_AREA": -1006902,
+    "ROOM_HEIGHT": -1006926,
+    "ROOM_VOLUME": -1006903,
+    "ELEM_CATEGORY_PARAM": -1140362,
+    "ELEM_FAMILY_PARAM": -1002052,
+    "ELEM_TYPE_PARAM": -1002051,
+})
+
+StorageType = make_enum("StorageType", {"None": 0, "Integer": 1, "Double": 2, "String": 3, "ElementId": 4})
+CategoryType = make_enum("CategoryType", {"Invalid": 0, "Model": 1, "Annotation": 2, "Internal": 4})
+ViewFamily = make_enum("ViewFamily", {"Invalid": 0, "ThreeDimensional": 102, "FloorPlan": 109,
+                                      "Section": 113, "Elevation": 114, "Sheet": 115})
+ViewType = make_enum("ViewType", {"FloorPlan": 1, "ThreeD": 4, "DrawingSheet": 6, "Section": 117,
+                                  "Elevation": 3, "Schedule": 122})
+DisplayUnit = make_enum("DisplayUnit", {"IMPERIAL": 0, "METRIC": 1})
+
+
+# --- exceptions --------------------------------------------------------------
+
+class ArgumentException(Exception):
+    pass
+
+
+class InvalidOperationException(Exception):
+    pass
+
+
+class InternalException(Exception):
+    pass
+
+
+class OperationCanceledException(Exception):
+    pass
+
+
+class ModificationForbiddenException(Exception):
+    pass
+
+
+# --- ids and collections -----------------------------------------------------
+
+class ElementId(object):
+    __slots__ = ("IntegerValue",)
+
+    def __init__(self, value):
+        self.IntegerValue = int(value)
+
+    @property
+    def Value(self):
+        return self.IntegerValue
+
+    def __eq__(self, other):
+        return isinstance(other, ElementId) and other.IntegerValue == self.IntegerValue
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.IntegerValue)
+
+    def Equals(self, other):
+        return self == other
+
+    def __repr__(self):
+        return "ElementId({})".format(self.IntegerValue)
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class NetList(list):
+    """List[T] of the framework: a list with Add and Count"""
+
+    def Add(self, item):
+        self.append(item)
+
+    @property
+    def Count(self):
+        return len(self)
+
+    def Contains(self, item):
+        return item in self
+
+
+class _ListFactory(object):
+    def __getitem__(self, item_type):
+        return NetList
+
+
+List = _ListFactory()
+
+
+# --- units, colours, labels --------------------------------------------------
+
+class _UnitTypeId(object):
+    def __init__(self, name, factor):
+        self.name = name
+        self.factor = factor
+
+
+class UnitTypeId(object):
+    Millimeters = _UnitTypeId("Millimeters", 304.8)
+    Feet = _UnitTypeId("Feet", 1.0)
+
+
+class SpecTypeId(object):
+    Length = "autodesk.spec.aec:length"
+    Area = "autodesk.spec.aec:area"
+
+    class Reference(object):
+        Material = "autodesk.spec.reference:material"
+
+
+class GroupTypeId(object):
+    Materials = "autodesk.parameter.group:materials"
+
+
+class FormatOptions(object):
+    def __init__(self, unit):
+        self.unit = unit
+
+    def GetUnitTypeId(self):
+        return self.unit
+
+    @property
+    def DisplayUnits(self):
+        return self.unit
+
+
+class Units(object):
+    def __init__(self, unit):
+        self.unit = unit
+
+    def GetFormatOptions(self, spec):
+        return FormatOptions(self.unit)
+
+
+class UnitUtils(object):
+    @staticmethod
+    def ConvertToInternalUnits(value, unit):
+        return value / unit.factor
+
+    @staticmethod
+    def ConvertFromInternalUnits(value, unit):
+        return value * unit.factor
+
+
+class FormatValueOptions(object):
+    AppendUnitSymbol = False
+
+
+class ValueParsingOptions(object):
+    pass
+
+
+class UnitFormatUtils(object):
+    @staticmethod
+    def Format(units, spec, value, for_editing, options=None):
+        return "{:.0f} mm".format(value * units.unit.factor)
+
+    @staticmethod
+    def TryParse(units, spec, value_string, options=None):
+        digits = "".join(ch for ch in value_string if ch.isdigit() or ch == ".")
+        return True, float(digits) / units.unit.factor
+
+
+class Color(object):
+    __slots__ = ("Red", "Green", "Blue")
+
+    def __init__(self, red, green, blue):
+        self.Red = red
+        self.Green = green
+        self.Blue = blue
+
+    @property
+    def IsValid(self):
+        return True
+
+
+class LabelUtils(object):
+    @staticmethod
+    def GetLabelFor(enum_value):
+        name = enum_value.name
+        if name.startswith("OST_"):
+            name = name[4:]
+        label = ""
+        for ch in name:
+            if ch.isupper() and label:
+                label += " "
+            label += ch
+        return label.replace("_", " ").title().replace("  ", " ")
+
+
+# --- parameters --------------------------------------------------------------
+
+class Definition(object):
+    """Definition shared by every parameter of the same id"""
+
+    def __init__(self, name, param_id, storage_type, bip=None, guid=None, read_only=False):
+        self.Name = name
+        self.param_id = param_id
+        self.storage_type = storage_type
+        self.bip = bip
+        self.guid = guid
+        self.read_only = read_only
+
+
+class Parameter(object):
+    __slots__ = ("element", "definition")
+
+    def __init__(self, element, definition):
+        self.element = element
+        self.definition = definition
+
+    @property
+    def Definition(self):
+        return self.definition
+
+    @property
+    def Id(self):
+        return ElementId(self.definition.param_id)
+
+    @property
+    def StorageType(self):
+        return self.definition.storage_type
+
+    @property
+    def IsReadOnly(self):
+        return self.definition.read_only
+
+    @property
+    def IsShared(self):
+        return self.definition.guid is not None
+
+    @property
+    def GUID(self):
+        if self.definition.guid is None:
+            raise InvalidOperationException("Parameter is not shared")
+        return self.definition.guid
+
+    @property
+    def HasValue(self):
+        return self.element._values.get(self.definition) is not None
+
+    def _value(self):
+        return self.element._values.get(self.definition)
+
+    def AsString(self):
+        return self._value()
+
+    def AsInteger(self):
+        return self._value()
+
+    def AsDouble(self):
+        return self._value()
+
+    def AsElementId(self):
+        return self._value()
+
+    def AsValueString(self):
+        value = self._value()
+        if isinstance(value, ElementId):
+            el = self.element.Document.GetElement(value)
+            return el.Name if el else None
+        if isinstance(value, float):
+            return "{:.2f}".format(value)
+        return str(value)
+
+    def Set(self, value):
+        self.element._set_value(self.definition, value)
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, Parameter) and other.element is self.element \
+            and other.definition is self.definition
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self.element), id(self.definition)))
+
+
+# --- elements ----------------------------------------------------------------
+
+class Category(object):
+    def __init__(self, bic, category_type=CategoryType.Model):
+        self.Id = ElementId(bic)
+        self.BuiltInCategory = bic
+        self.CategoryType = category_type
+        self.Name = LabelUtils.GetLabelFor(bic)
+
+
+class _Location(object):
+    def __init__(self, point):
+        self.Point = point
+
+
+class Element(object):
+    def __init__(self, doc, name="", bic=None, type_id=None):
+        self.Document = doc
+        self.Id = ElementId.InvalidElementId
+        self._name = name
+        self.Category = doc.category(bic) if bic is not None else None
+        self._type_id = type_id or ElementId.InvalidElementId
+        self._values = {}
+        doc._add(self)
+
+    def _get_name(self):
+        return self._name
+
+    def _set_name(self, value):
+        self.Document._set_attr(self, "_name", value)
+
+    Name = property(_get_name, _set_name)
+
+    def GetTypeId(self):
+        return self._type_id
+
+    def _set_value(self, definition, value):
+        old = self._values.get(definition)
+        self._values[definition] = value
+        self.Document._modified(self, lambda: self._values.__setitem__(definition, old))
+
+    @property
+    def Parameters(self):
+        return [Parameter(self, d) for d in self._values]
+
+    def get_Parameter(self, key):
+        definition = self.Document.definition(key)
+        if definition is not None and definition in self._values:
+            return Parameter(self, definition)
+        return None
+
+    def LookupParameter(self, name):
+        definition = self.Document.definition(name)
+        if definition is not None and definition in self._values:
+            return Parameter(self, definition)
+        return None
+
+
+class ElementType(Element):
+    @property
+    def FamilyName(self):
+        return self.Document.family_name(self)
+
+
+class FamilySymbol(ElementType):
+    @property
+    def Family(self):
+        return _Named(self.FamilyName)
+
+
+class _Named(object):
+    def __init__(self, name):
+        self.Name = name
+
+
+class FamilyInstance(Element):
+    def __init__(self, doc, name="", bic=None, type_id=None, point=None):
+        Element.__init__(self, doc, name, bic, type_id)
+        self.Location = _Location(point)
+
+
+class View(Element):
+    def __init__(self, doc, name="", bic=BuiltInCategory.OST_Views, is_template=False, view_type=ViewType.FloorPlan):
+        Element.__init__(self, doc, name, bic)
+        self.IsTemplate = is_template
+        self.ViewType = view_type
+        self.ViewTemplateId = ElementId.InvalidElementId
+        self.CropBoxActive = False
+        self.CropBoxVisible = True
+        self.Scale = 100
+        self.ViewDirection = XYZ(0, 0, 1)
+        self._overrides = {}
+        self._filters = {}
+
+    def _set_override(self, table, key, overrides):
+        # view graphics are part of the model: they need a transaction and are undone on rollback
+        self.Document._require_transaction()
+        had, old = key in table, table.get(key)
+        table[key] = overrides
+        self.Document._modified(self, lambda: table.__setitem__(key, old) if had else table.pop(key, None))
+
+    def SetElementOverrides(self, element_id, overrides):
+        self._set_override(self._overrides, element_id.IntegerValue, overrides)
+
+    def GetElementOverrides(self, element_id):
+        return self._overrides.get(element_id.IntegerValue, OverrideGraphicSettings())
+
+    def AddFilter(self, filter_id):
+        if filter_id.IntegerValue not in self._filters:
+            self._set_override(self._filters, filter_id.IntegerValue, OverrideGraphicSettings())
+
+    def GetFilters(self):
+        return NetList(ElementId(i) for i in self._filters)
+
+    def RemoveFilter(self, filter_id):
+        key = filter_id.IntegerValue
+        if key in self._filters:
+            self.Document._require_transaction()
+            old = self._filters.pop(key)
+            self.Document._modified(self, lambda: self._filters.__setitem__(key, old))
+
+    def IsFilterApplied(self, filter_id):
+        return filter_id.IntegerValue in self._filters
+
+    def SetFilterOverrides(self, filter_id, overrides):
+        if filter_id.IntegerValue not in self._filters:
+            raise ArgumentException("The filter is not applied to the view")
+        self._set_override(self._filters, filter_id.IntegerValue, overrides)
+
+    def GetFilterOverrides(self, filter_id):
+        return self._filters[filter_id.IntegerValue]
+
+    def SetFilterVisibility(self, filter_id, visible):
+        pass
+
+
+class ViewPlan(View):
+    pass
+
+
+class View3D(View):
+    pass
+
+
+class ViewSheet(View):
+    def __init__(self, doc, name="", number=""):
+        View.__init__(self, doc, name, BuiltInCategory.OST_Sheets, view_type=ViewType.DrawingSheet)
+        self._number = number
+        self._numbers = []
+        doc._register_sheet_number(self, number)
+
+    def _get_number(self):
+        return self._number
+
+    def _set_number(self, value):
+        value = str(value)
+        if value != self._number and self.Document._sheet_number_taken(value):
+            raise ArgumentException("Sheet number {} is already in use".format(value))
+        self.Document._set_attr(self, "_number", value)
+        self.Document._register_sheet_number(self, value)
+
+    SheetNumber = property(_get_number, _set_number)
+
+    @staticmethod
+    def Create(doc, titleblock_id):
+        doc._require_transaction()
+        return ViewSheet(doc, "Unnamed", doc._next_sheet_number())
+
+
+class Viewport(Element):
+    def __init__(self, doc, name="", sheet_id=None, view_id=None):
+        Element.__init__(self, doc, name, BuiltInCategory.OST_Viewports)
+        self.SheetId = sheet_id
+        self.ViewId = view_id
+
+
+class FilterElement(Element):
+    pass
+
+
+class ParameterFilterElement(FilterElement):
+    def __init__(self, doc, name, category_ids):
+        FilterElement.__init__(self, doc, name)
+        self._categories = NetList(category_ids)
+        self._filter = None
+
+    @staticmethod
+    def Create(doc, name, category_ids, element_filter=None):
+        doc._require_transaction()
+        if doc._filter_name_taken(name):
+            raise ArgumentException("Filter name {} is already in use".format(name))
+        pfe = ParameterFilterElement(doc, name, category_ids)
+        pfe._filter = element_filter
+        return pfe
+
+    def GetCategories(self):
+        return NetList(self._categories)
+
+    def SetCategories(self, category_ids):
+        old = self._categories
+        self._categories = NetList(category_ids)
+        self.Document._modified(self, lambda: setattr(self, "_categories", old))
+
+    def GetElementFilter(self):
+        return self._filter
+
+    def SetElementFilter(self, element_filter):
+        old = self._filter
+        self._filter = element_filter
+        self.Document._modified(self, lambda: setattr(self, "_filter", old))
+        return True
+
+    def ClearRules(self):
+        self.SetElementFilter(None)
+
+
+class _FillPattern(object):
+    def __init__(self, is_solid):
+        self.IsSolidFill = is_solid
+
+
+class FillPatternElement(Element):
+    def __init__(self, doc, name="", is_solid=False):
+        Element.__init__(self, doc, name)
+        self._pattern = _FillPattern(is_solid)
+
+    def GetFillPattern(self):
+        return self._pattern
+
+
+class GraphicsStyle(Element):
+    def __init__(self, doc, name="", bic=BuiltInCategory.OST_Lines):
+        Element.__init__(self, doc, name)
+        self.GraphicsStyleCategory = doc.category(bic)
+
+
+class FilledRegionType(ElementType):
+    pass
+
+
+class ViewFamilyType(ElementType):
+    def __init__(self, doc, name="", view_family=ViewFamily.FloorPlan):
+        ElementType.__init__(self, doc, name)
+        self.ViewFamily = view_family
+        self.DefaultTemplateId = ElementId.InvalidElementId
+
+
+class SharedParameterElement(Element):
+    def __init__(self, doc, name, guid):
+        Element.__init__(self, doc, name)
+        self.GuidValue = guid
+
+
+class SpatialElementBoundaryOptions(object):
+    pass
+
+
+class BoundarySegment(object):
+    def __init__(self, curve):
+        self._curve = curve
+
+    def GetCurve(self):
+        return self._curve
+
+
+class SpatialElement(Element):
+    pass
+
+
+class Room(SpatialElement):
+    def __init__(self, doc, name="", loops=None, point=None):
+        Element.__init__(self, doc, name, BuiltInCategory.OST_Rooms)
+        self._loops = loops or []
+        self.Location = _Location(point)
+
+    def GetBoundarySegments(self, options):
+        return [[BoundarySegment(c) for c in loop] for loop in self._loops]
+
+
+class Level(Element):
+    pass
+
+
+class SketchPlane(Element):
+    pass
+
+
+# --- graphics ----------------------------------------------------------------
+
+class OverrideGraphicSettings(object):
+    def __init__(self, other=None):
+        self.settings = dict(other.settings) if other is not None else {}
+
+    def _set(self, key, value):
+        self.settings[key] = value
+        return self
+
+    def SetProjectionLineColor(self, colour):
+        return self._set("projection_line_colour", colour)
+
+    def SetCutLineColor(self, colour):
+        return self._set("cut_line_colour", colour)
+
+    def SetSurfaceForegroundPatternColor(self, colour):
+        return self._set("surface_pattern_colour", colour)
+
+    def SetSurfaceForegroundPatternId(self, pattern_id):
+        return self._set("surface_pattern_id", pattern_id)
+
+    def SetCutForegroundPatternColor(self, colour):
+        return self._set("cut_pattern_colour", colour)
+
+    def SetCutForegroundPatternId(self, pattern_id):
+        return self._set("cut_pattern_id", pattern_id)
+
+    # unset colours are None here, where Revit returns an invalid Color
+    ProjectionLineColor = property(lambda self: self.settings.get("projection_line_colour"))
+    CutLineColor = property(lambda self: self.settings.get("cut_line_colour"))
+    SurfaceForegroundPatternColor = property(lambda self: self.settings.get("surface_pattern_colour"))
+    CutForegroundPatternColor = property(lambda self: self.settings.get("cut_pattern_colour"))
+
+
+# --- filters -----------------------------------------------------------------
+
+# built-in parameters read from element properties, as names and sheet numbers are
+_PROPERTY_PARAMETERS = {
+    int(BuiltInParameter.VIEW_NAME): lambda el: el.Name if isinstance(el, View) and not isinstance(el, ViewSheet)
+    else None,
+    int(BuiltInParameter.SHEET_NAME): lambda el: el.Name if isinstance(el, ViewSheet) else None,
+    int(BuiltInParameter.SHEET_NUMBER): lambda el: el.SheetNumber if isinstance(el, ViewSheet) else None,
+}
+
+
+class ParameterValueProvider(object):
+    def __init__(self, param_id):
+        self.param_id = param_id
+
+    def value(self, el):
+        read_property = _PROPERTY_PARAMETERS.get(self.param_id.IntegerValue)
+        if read_property is not None:
+            return read_property(el)
+        definition = el.Document.definition_by_id(self.param_id.IntegerValue)
+        if definition is None:
+            return None
+        return el._values.get(definition)
+
+
+class FilterStringEquals(object):
+    def evaluate(self, value, rule_value):
+        return value == rule_value
+
+
+class FilterStringContains(object):
+    def evaluate(self, value, rule_value):
+        return value is not None and rule_value in value
+
+
+class FilterStringBeginsWith(object):
+    def evaluate(self, value, rule_value):
+        return value is not None and value.startswith(rule_value)
+
+
+class FilterNumericEquals(object):
+    def evaluate(self, value, rule_value):
+        return value == rule_value
+
+
+class FilterNumericGreater(object):
+    def evaluate(self, value, rule_value):
+        return value is not None and value > rule_value
+
+
+class FilterNumericGreaterOrEqual(object):
+    def evaluate(self, value, rule_value):
+        return value is not None and value >= rule_value
+
+
+class FilterNumericLess(object):
+    def evaluate(self, value, rule_value):
+        return value is not None and value < rule_value
+
+
+class FilterNumericLessOrEqual(object):
+    def evaluate(self, value, rule_value):
+        return value is not None and value <= rule_value
+
+
+class FilterRule(object):
+    def __init__(self, provider, evaluator, value):
+        self.provider = provider
+        self.evaluator = evaluator
+        self.value = value
+
+    def passes(self, el):
+        return self.evaluator.evaluate(self.provider.value(el), self.value)
+
+    def GetRuleParameter(self):
+        return self.provider.param_id
+
+    def GetEvaluator(self):
+        return self.evaluator
+
+    @property
+    def RuleValue(self):
+        return self.value
+
+
+class FilterStringRule(FilterRule):
+    def __init__(self, provider, evaluator, value, case_sensitive=True):
+        FilterRule.__init__(self, provider, evaluator, value)
+
+    @property
+    def RuleString(self):
+        return self.value
+
+
+class FilterIntegerRule(FilterRule):
+    pass
+
+
+class FilterDoubleRule(FilterRule):
+    def __init__(self, provider, evaluator, value, epsilon):
+        FilterRule.__init__(self, provider, evaluator, value)
+        self.epsilon = epsilon
+
+    @property
+    def Epsilon(self):
+        return self.epsilon
+
+    def passes(self, el):
+        value = self.provider.value(el)
+        if value is None:
+            return False
+        if isinstance(self.evaluator, FilterNumericEquals):
+            return abs(value - self.value) <= self.epsilon
+        return self.evaluator.evaluate(value, self.value)
+
+
+class FilterElementIdRule(FilterRule):
+    pass
+
+
+class FilterInverseRule(object):
+    def __init__(self, inner):
+        self.inner = inner
+
+    def passes(self, el):
+        return not self.inner.passes(el)
+
+    def GetInnerRule(self):
+        return self.inner
+
+
+class ElementFilter(object):
+    def PassesFilter(self, el):
+        return self.passes(el)
+
+
+class ElementQuickFilter(ElementFilter):
+    pass
+
+
+class ElementSlowFilter(ElementFilter):
+    pass
+
+
+class ElementClassFilter(ElementQuickFilter):
+    def __init__(self, el_class):
+        self.el_class = el_class
+
+    def passes(self, el):
+        return isinstance(el, self.el_class)
+
+
+class ElementCategoryFilter(ElementQuickFilter):
+    def __init__(self, bic):
+        self.bic = int(bic)
+
+    def passes(self, el):
+        return el.Category is not None and el.Category.Id.IntegerValue == self.bic
+
+
+class ElementMulticategoryFilter(ElementQuickFilter):
+    def __init__(self, category_ids):
+        self.category_ids = set(cat.IntegerValue for cat in category_ids)
+
+    def passes(self, el):
+        return el.Category is not None and el.Category.Id.IntegerValue in self.category_ids
+
+
+class ElementMulticlassFilter(ElementQuickFilter):
+    def __init__(self, types):
+        self.types = tuple(types)
+
+    def passes(self, el):
+        return isinstance(el, self.types)
+
+
+class ElementIsElementTypeFilter(ElementQuickFilter):
+    def __init__(self, inverted=False):
+        self.inverted = inverted
+
+    def passes(self, el):
+        return isinstance(el, ElementType) != self.inverted
+
+
+class ElementParameterFilter(ElementSlowFilter):
+    def __init__(self, rules, inverted=False):
+        self.rules = list(rules) if isinstance(rules, list) else [rules]
+        self.inverted = inverted
+
+    def passes(self, el):
+        return all(rule.passes(el) for rule in self.rules) != self.inverted
+
+    def GetRules(self):
+        return NetList(self.rules)
+
+    @property
+    def Inverted(self):
+        return self.inverted
+
+
+class ElementLogicalFilter(ElementFilter):
+    def GetFilters(self):
+        return NetList(self.filters)
+
+
+class LogicalAndFilter(ElementLogicalFilter):
+    def __init__(self, *filters):
+        self.filters = list(filters[0]) if len(filters) == 1 and isinstance(filters[0], list) else list(filters)
+
+    def passes(self, el):
+        return all(f.passes(el) for f in self.filters)
+
+
+class LogicalOrFilter(ElementLogicalFilter):
+    def __init__(self, *filters):
+        self.filters = list(filters[0]) if len(filters) == 1 and isinstance(filters[0], list) else list(filters)
+
+    def passes(self, el):
+        return any(f.passes(el) for f in self.filters)
+
+
+class FilteredElementCollector(object):
+    """Collector over the elements of a document or a view.
+
+    OfClass and OfCategory read the document indexes when they narrow the
+    whole document, the way Revit's quick filters avoid expanding elements.
+    """
+
+    created = 0
+
+    def __init__(self, doc, view_id=None):
+        FilteredElementCollector.created += 1
+        self.doc = doc
+        if view_id is not None:
+            self._elements = doc._view_elements(view_id)
+        else:
+            self._elements = None
+
+    def _all(self):
+        return self._elements if self._elements is not None else self.doc._all_elements()
+
+    def OfClass(self, el_class):
+        if self._elements is None:
+            self._elements = self.doc._by_class(el_class)
+        else:
+            self._elements = [el for el in self._elements if isinstance(el, el_class)]
+        return self
+
+    def OfCategory(self, bic):
+        if self._elements is None:
+            self._elements = self.doc._by_category(bic)
+        else:
+            self._elements = [el for el in self._elements
+                              if el.Category is not None and el.Category.Id.IntegerValue == int(bic)]
+        return self
+
+    def OfCategoryId(self, category_id):
+        return self.OfCategory(category_id.IntegerValue)
+
+    def WhereElementIsElementType(self):
+        self._elements = [el for el in self._all() if isinstance(el, ElementType)]
+        return self
+
+    def WhereElementIsNotElementType(self):
+        self._elements = [el for el in self._all() if not isinstance(el, ElementType)]
+        return self
+
+    def WherePasses(self, element_filter):
+        self._elements = [el for el in self._all() if element_filter.passes(el)]
+        return self
+
+    def Excluding(self, element_ids):
+        excluded = set(el_id.IntegerValue for el_id in element_ids)
+        self._elements = [el for el in self._all() if el.Id.IntegerValue not in excluded]
+        return self
+
+    def __iter__(self):
+        return iter(list(self._all()))
+
+    def FirstElement(self):
+        for el in self._all():
+            return el
+        return None
+
+    def FirstElementId(self):
+        el = self.FirstElement()
+        return el.Id if el is not None else ElementId.InvalidElementId
+
+    def ToElements(self):
+        return NetList(self._all())
+
+    def ToElementIds(self):
+        return NetList(el.Id for el in self._all())
+
+    def GetElementCount(self):
+        return len(self._all())
+
+
+# --- geometry ----------------------------------------------------------------
+
+class XYZ(object):
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X = float(x)
+        self.Y = float(y)
+        self.Z = float(z)
+
+    def __add__(self, other):
+        return XYZ(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+
+    def __sub__(self, other):
+        return XYZ(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+
+    def __neg__(self):
+        return XYZ(-self.X, -self.Y, -self.Z)
+
+    def __mul__(self, k):
+        return XYZ(self.X * k, self.Y * k, self.Z * k)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, k):
+        return XYZ(self.X / k, self.Y / k, self.Z / k)
+
+    __div__ = __truediv__
+
+    def GetLength(self):
+        return math.sqrt(self.X ** 2 + self.Y ** 2 + self.Z ** 2)
+
+    def DistanceTo(self, other):
+        return (self - other).GetLength()
+
+    def IsAlmostEqualTo(self, other, tolerance=1e-9):
+        return self.DistanceTo(other) <= tolerance
+
+    def Normalize(self):
+        length = self.GetLength()
+        return self / length if length else XYZ()
+
+    def DotProduct(self, other):
+        return self.X * other.X + self.Y * other.Y + self.Z * other.Z
+
+    def CrossProduct(self, other):
+        return XYZ(self.Y * other.Z - self.Z * other.Y,
+                   self.Z * other.X - self.X * other.Z,
+                   self.X * other.Y - self.Y * other.X)
+
+    def AngleTo(self, other):
+        lengths = self.GetLength() * other.GetLength()
+        if not lengths:
+            return 0.0
+        return math.acos(max(-1.0, min(1.0, self.DotProduct(other) / lengths)))
+
+    def __repr__(self):
+        return "XYZ({:.4f}, {:.4f}, {:.4f})".format(self.X, self.Y, self.Z)
+
+
+XYZ.Zero = XYZ(0, 0, 0)
+XYZ.BasisX = XYZ(1, 0, 0)
+XYZ.BasisY = XYZ(0, 1, 0)
+XYZ.BasisZ = XYZ(0, 0, 1)
+
+
+class Transform(object):
+    def __init__(self, origin=None, basis_x=None, basis_y=None, basis_z=None):
+        self.Origin = origin or XYZ()
+        self.BasisX = basis_x or XYZ.BasisX
+        self.BasisY = basis_y or XYZ.BasisY
+        self.BasisZ = basis_z or XYZ.BasisZ
+
+    def OfVector(self, v):
+        return self.BasisX * v.X + self.BasisY * v.Y + self.BasisZ * v.Z
+
+    def OfPoint(self, p):
+        return self.Origin + self.OfVector(p)
+
+    @property
+    def Inverse(self):
+        # orthonormal bases only
+        bx, by, bz = self.BasisX, self.BasisY, self.BasisZ
+        inv = Transform(XYZ(), XYZ(bx.X, by.X, bz.X), XYZ(bx.Y, by.Y, bz.Y), XYZ(bx.Z, by.Z, bz.Z))
+        inv.Origin = -inv.OfVector(self.Origin)
+        return inv
+
+    @staticmethod
+    def CreateTranslation(vector):
+        return Transform(vector)
+
+    @staticmethod
+    def CreateRotation(axis, angle):
+        c, s = math.cos(angle), math.sin(angle)
+        return Transform(XYZ(), XYZ(c, s, 0), XYZ(-s, c, 0), XYZ.BasisZ)
+
+    @staticmethod
+    def CreateRotationAtPoint(axis, angle, point):
+        rotation = Transform.CreateRotation(axis, angle)
+        rotation.Origin = point - rotation.OfVector(point)
+        return rotation
+
+
+Transform.Identity = Transform()
+
+
+class Curve(object):
+    def CreateTransformed(self, transform):
+        raise NotImplementedError
+
+
+class Line(Curve):
+    __slots__ = ("_p", "_q")
+
+    def __init__(self, p, q):
+        self._p = p
+        self._q = q
+
+    @staticmethod
+    def CreateBound(p, q):
+        if p.IsAlmostEqualTo(q, 1e-6):
+            raise ArgumentException("Curve length is too small")
+        return Line(p, q)
+
+    def GetEndPoint(self, i):
+        return self._p if i == 0 else self._q
+
+    @property
+    def Length(self):
+        return self._p.DistanceTo(self._q)
+
+    @property
+    def Direction(self):
+        return (self._q - self._p).Normalize()
+
+    def Evaluate(self, parameter, normalized=True):
+        return self._p + (self._q - self._p) * parameter
+
+    def CreateReversed(self):
+        return Line(self._q, self._p)
+
+    def CreateTransformed(self, transform):
+        return Line(transform.OfPoint(self._p), transform.OfPoint(self._q))
+
+
+class CurveLoop(object):
+    # Revit rejects a curve that does not start where the previous one ends
+    TOLERANCE = 0.0005
+
+    def __init__(self):
+        self._curves = []
+
+    @staticmethod
+    def Create(curves):
+        loop = CurveLoop()
+        for curve in curves:
+            loop.Append(curve)
+        return loop
+
+    def Append(self, curve):
+        if self._curves:
+            if not self._curves[-1].GetEndPoint(1).IsAlmostEqualTo(curve.GetEndPoint(0), self.TOLERANCE):
+                raise ArgumentException("The curve is not contiguous with the loop")
+        self._curves.append(curve)
+
+    def IsOpen(self):
+        if not self._curves:
+            return True
+        return not self._curves[-1].GetEndPoint(1).IsAlmostEqualTo(self._curves[0].GetEndPoint(0),
+                                                                   self.TOLERANCE)
+
+    def NumberOfCurves(self):
+        return len(self._curves)
+
+    def GetExactLength(self):
+        return sum(c.Length for c in self._curves)
+
+    def __iter__(self):
+        return iter(self._curves)
+
+    def __len__(self):
+        return len(self._curves)
+
+
+class CurveArray(NetList):
+    def Append(self, curve):
+        self.append(curve)
+
+
+class CurveArrArray(NetList):
+    def Append(self, curve_array):
+        self.append(curve_array)
+
+
+# --- documents and transactions ----------------------------------------------
+
+class _Event(object):
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        return self
+
+    def fire(self, sender, args):
+        for handler in list(self.handlers):
+            handler(sender, args)
+
+
+class DocumentChangedEventArgs(object):
+    def __init__(self, doc, added, deleted, modified):
+        self._doc = doc
+        self._added = added
+        self._deleted = deleted
+        self._modified = modified
+
+    def GetDocument(self):
+        return self._doc
+
+    def _ids(self, ids, element_filter):
+        if element_filter is None:
+            return NetList(ElementId(i) for i in ids)
+        elements = self._doc._elements
+        return NetList(ElementId(i) for i in ids if i in elements and element_filter.passes(elements[i]))
+
+    def GetAddedElementIds(self, element_filter=None):
+        return self._ids(self._added, element_filter)
+
+    def GetDeletedElementIds(self):
+        return NetList(ElementId(i) for i in self._deleted)
+
+    def GetModifiedElementIds(self, element_filter=None):
+        return self._ids(self._modified, element_filter)
+
+
+class DocumentClosingEventArgs(object):
+    def __init__(self, doc):
+        self.Document = doc
+
+
+class Application(object):
+    def __init__(self):
+        self.DocumentChanged = _Event()
+        self.DocumentClosing = _Event()
+        self.FamilyTemplatePath = "C:\\ProgramData\\Autodesk\\RVT 2024\\Family Templates\\English"
+
+    def Equals(self, other):
+        return self is other
+
+
+class _Settings(object):
+    def __init__(self, categories):
+        self.Categories = categories
+
+
+class Document(object):
+    _hash_ids = count(1)
+
+    def __init__(self, application=None, title="Model"):
+        self.Application = application or Application()
+        self.Title = title
+        self.PathName = ""
+        self.IsFamilyDocument = False
+        self.DisplayUnitSystem = DisplayUnit.METRIC
+        self._hash = next(Document._hash_ids)
+        self._next_id = count(100000)
+        self._elements = {}
+        self._class_index = {}
+        self._category_index = {}
+        self._categories = {}
+        self._definitions = {}
+        self._definitions_by_id = {}
+        self._view_owner = {}
+        self._transactions = 0
+        self._undo = []
+        self._changes = None
+        self._sheet_counter = count(1)
+        # sheets by every number they have had, checked against their current number
+        self._sheet_numbers = {}
+        self.ActiveView = None
+        self.Settings = _Settings([])
+
+    def GetHashCode(self):
+        return self._hash
+
+    def Equals(self, other):
+        return self is other
+
+    @property
+    def IsModifiable(self):
+        return self._transactions > 0
+
+    def GetUnits(self):
+        return Units(UnitTypeId.Millimeters if self.DisplayUnitSystem == DisplayUnit.METRIC else UnitTypeId.Feet)
+
+    # categories and parameter definitions
+    def category(self, bic):
+        key = int(bic)
+        if key not in self._categories:
+            self._categories[key] = Category(BuiltInCategory._by_value.get(key, bic))
+            self.Settings.Categories.append(self._categories[key])
+        return self._categories[key]
+
+    def add_definition(self, definition):
+        if definition.bip is not None:
+            self._definitions[definition.bip] = definition
+        if definition.guid is not None:
+            self._definitions[str(definition.guid)] = definition
+        self._definitions.setdefault(definition.Name, definition)
+        self._definitions_by_id[definition.param_id] = definition
+        return definition
+
+    def definition(self, key):
+        if isinstance(key, Definition):
+            return key
+        if isinstance(key, uuid.UUID):
+            key = str(key)
+        return self._definitions.get(key)
+
+    def definition_by_id(self, param_id):
+        return self._definitions_by_id.get(param_id)
+
+    # element storage
+    def _add(self, el):
+        el.Id = ElementId(next(self._next_id))
+        self._elements[el.Id.IntegerValue] = el
+        for cls in type(el).__mro__:
+            self._class_index.setdefault(cls, {})[el.Id.IntegerValue] = el
+        if el.Category is not None:
+            self._category_index.setdefault(el.Category.Id.IntegerValue, {})[el.Id.IntegerValue] = el
+        self._record("added", el.Id.IntegerValue, lambda: self._remove(el))
+
+    def _remove(self, el):
+        key = el.Id.IntegerValue
+        if isinstance(el, ViewSheet):
+            self._unregister_sheet_numbers(el)
+        self._elements.pop(key, None)
+        for cls in type(el).__mro__:
+            self._class_index.get(cls, {}).pop(key, None)
+        if el.Category is not None:
+            self._category_index.get(el.Category.Id.IntegerValue, {}).pop(key, None)
+
+    def _restore(self, el):
+        key = el.Id.IntegerValue
+        if isinstance(el, ViewSheet):
+            for number in el._numbers:
+                self._sheet_numbers.setdefault(number, []).append(el)
+        self._elements[key] = el
+        for cls in type(el).__mro__:
+            self._class_index.setdefault(cls, {})[key] = el
+        if el.Category is not None:
+            self._category_index.setdefault(el.Category.Id.IntegerValue, {})[key] = el
+
+    def _all_elements(self):
+        return list(self._elements.values())
+
+    def _by_class(self, el_class):
+        return list(self._class_index.get(el_class, {}).values())
+
+    def _by_category(self, bic):
+        return list(self._category_index.get(int(bic), {}).values())
+
+    def _view_elements(self, view_id):
+        return [self._elements[i] for i, owner in self._view_owner.items()
+                if owner == view_id.IntegerValue and i in self._elements]
+
+    def place_in_view(self, el, view):
+        self._view_owner[el.Id.IntegerValue] = view.Id.IntegerValue
+
+    def family_name(self, el_type):
+        return el_type._values.get(self.definition(BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM))
+
+    def _register_sheet_number(self, sheet, number):
+        if number not in sheet._numbers:
+            sheet._numbers.append(number)
+            self._sheet_numbers.setdefault(number, []).append(sheet)
+
+    def _unregister_sheet_numbers(self, sheet):
+        for number in sheet._numbers:
+            self._sheet_numbers[number].remove(sheet)
+
+    def _sheet_number_taken(self, number):
+        return any(s._number == number for s in self._sheet_numbers.get(number, []))
+
+    def _filter_name_taken(self, name):
+        return any(f._name == name for f in self._class_index.get(FilterElement, {}).values())
+
+    def _next_sheet_number(self):
+        while True:
+            number = "X{:05d}".format(next(self._sheet_counter))
+            if not self._sheet_number_taken(number):
+                return number
+
+    # changes, undo and events
+    def _record(self, kind, key, undo):
+        if self._changes is not None:
+            self._changes[kind].add(key)
+            self._undo.append(undo)
+
+    def _modified(self, el, undo):
+        self._record("modified", el.Id.IntegerValue, undo)
+
+    def _set_attr(self, el, attr, value):
+        old = getattr(el, attr)
+        setattr(el, attr, value)
+        self._modified(el, lambda: setattr(el, attr, old))
+
+    def _require_transaction(self):
+        if not self.IsModifiable:
+            raise ModificationForbiddenException("A transaction is required to modify the document")
+
+    def GetElement(self, el_id):
+        if el_id is None:
+            return None
+        key = el_id.IntegerValue if isinstance(el_id, ElementId) else int(el_id)
+        return self._elements.get(key)
+
+    def Delete(self, ids):
+        self._require_transaction()
+        if isinstance(ids, ElementId):
+            ids = [ids]
+        targets = []
+        for el_id in ids:
+            el = self.GetElement(el_id)
+            if el is None:
+                raise ArgumentException("Element {} does not exist".format(el_id.IntegerValue))
+            if self.ActiveView is not None and el is self.ActiveView:
+                raise ArgumentException("The active view cannot be deleted")
+            targets.append(el)
+        for el in targets:
+            self._remove(el)
+            self._record("deleted", el.Id.IntegerValue, lambda el=el: self._restore(el))
+        return NetList(el.Id for el in targets)
+
+    def Regenerate(self):
+        self.regenerations = getattr(self, "regenerations", 0) + 1
+
+    def _start(self):
+        if self._transactions == 0:
+            self._changes = {"added": set(), "deleted": set(), "modified": set()}
+            self._undo = []
+        self._transactions += 1
+        return len(self._undo)
+
+    def _commit(self):
+        self._transactions -= 1
+        if self._transactions == 0:
+            changes = self._changes
+            self._changes = None
+            self._undo = []
+            modified = changes["modified"] - changes["added"] - changes["deleted"]
+            added = changes["added"] - changes["deleted"]
+            deleted = changes["deleted"] - changes["added"]
+            if added or deleted or modified:
+                self.Application.DocumentChanged.fire(
+                    self.Application, DocumentChangedEventArgs(self, added, deleted, modified))
+
+    def _rollback(self, mark):
+        while len(self._undo) > mark:
+            self._undo.pop()()
+        self._transactions -= 1
+        if self._transactions == 0:
+            self._changes = None
+
+    def Close(self, save=False):
+        self.Application.DocumentClosing.fire(self.Application, DocumentClosingEventArgs(self))
+        return True
+
+
+TransactionStatus = make_enum("TransactionStatus", {"Uninitialized": 0, "Started": 1, "RolledBack": 2,
+                                                    "Committed": 3, "Pending": 4, "Error": 5})
+
+
+class Transaction(object):
+    def __init__(self, doc, name=""):
+        self.doc = doc
+        self.name = name
+        self._mark = None
+        self._status = TransactionStatus.Uninitialized
+        self._preprocessor = None
+
+    def Start(self, name=None):
+        self._mark = self.doc._start()
+        self._status = TransactionStatus.Started
+        return self._status
+
+    def Commit(self):
+        self.doc._commit()
+        self._status = TransactionStatus.Committed
+        return self._status
+
+    def RollBack(self):
+        self.doc._rollback(self._mark)
+        self._status = TransactionStatus.RolledBack
+        return self._status
+
+    def GetStatus(self):
+        return self._status
+
+    def HasStarted(self):
+        return self._status == TransactionStatus.Started
+
+    def GetFailureHandlingOptions(self):
+        return FailureHandlingOptions()
+
+    def SetFailureHandlingOptions(self, options):
+        self._preprocessor = options.preprocessor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._status == TransactionStatus.Started:
+            self.RollBack()
+        return False
+
+
+class SubTransaction(Transaction):
+    def __init__(self, doc):
+        Transaction.__init__(self, doc)
+
+
+class TransactionGroup(Transaction):
+    def Assimilate(self):
+        return self.Commit()
+
+
+class FailureHandlingOptions(object):
+    def __init__(self):
+        self.preprocessor = None
+
+    def SetFailuresPreprocessor(self, preprocessor):
+        self.preprocessor = preprocessor
+        return self
+
+    def SetClearAfterRollback(self, clear):
+        return self
+
+
+class IFailuresPreprocessor(object):
+    pass
+
+
+FailureProcessingResult = make_enum("FailureProcessingResult", {"Continue": 0, "ProceedWithCommit": 1,
+                                                                "ProceedWithRollBack": 2, "WaitForUserInput": 3})
+FailureSeverity = make_enum("FailureSeverity", {"None": 0, "Warning": 1, "Error": 2, "DocumentCorruption": 3})
@@ -0,0 +1,296 @@
+"""Installs in-memory stand-ins for pyRevit, rpw and the Revit API.
+
+``install(doc)`` registers fake ``pyrevit``, ``rpw``, ``clr``, ``System`` and
+``Autodesk.Revit`` modules in ``sys.modules``, and the repository itself as
+the ``pychilizer`` package, so the library can be imported and timed with
+plain CPython. The document is installed as ``revit.doc`` before pychilizer
+is imported, because the helpers bind it as a default argument.
+
+``pyrevit.forms``, ``pyrevit.script`` and ``rpw`` are slow to import in
+Revit, so they are only registered when something imports them. The names
+are recorded in ``LOADED`` and every output window created is counted in
+``OUTPUTS_CREATED``, so the import benchmarks can check what a module pulls
+in when it is imported.
+"""
+
+import os
+import re
+import sys
+import tempfile
+import types
+import uuid
+
+import fakedb
+
+try:
+    from importlib.machinery import ModuleSpec
+except ImportError:
+    ModuleSpec = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(tempfile.gettempdir(), "pychilizer_bench")
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    for key, value in attrs.items():
+        setattr(module, key, value)
+    sys.modules[name] = module
+    return module
+
+
+class PyRevitException(Exception):
+    pass
+
+
+class _HostApp(object):
+    def __init__(self, version, app):
+        self.version = str(version)
+        self.app = app
+        self.language = "English_USA"
+
+    def is_newer_than(self, version):
+        return int(self.version) > int(version)
+
+    def is_older_than(self, version):
+        return int(self.version) < int(version)
+
+
+class _Transaction(object):
+    """revit.Transaction: commits on success, rolls back on error"""
+
+    def __init__(self, name=None, doc=None, **kwargs):
+        self.doc = doc or sys.modules["pyrevit.revit"].doc
+        self.name = name
+        self._transaction = fakedb.Transaction(self.doc, name)
+
+    def __enter__(self):
+        self._transaction.Start()
+        return self._transaction
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self._transaction.Commit()
+        else:
+            self._transaction.RollBack()
+        return False
+
+
+class _Output(object):
+    def __init__(self):
+        self.tables = []
+        self.printed = []
+
+    def linkify(self, element_ids, title=None):
+        return "<{}>".format(element_ids)
+
+    def print_table(self, table_data, columns=None, title="", **kwargs):
+        self.tables.append((title, columns, table_data))
+
+    def print_md(self, text):
+        self.printed.append(text)
+
+    def set_title(self, title):
+        pass
+
+
+class _Config(object):
+    def __init__(self, name):
+        self.name = name
+        self._options = {}
+
+    def get_option(self, name, default_value=None):
+        return self._options.get(name, default_value)
+
+    def set_option(self, name, value):
+        self._options[name] = value
+
+    def has_option(self, name):
+        return name in self._options
+
+
+_OUTPUT = []
+_CONFIGS = {}
+OUTPUTS_CREATED = []
+LOADED = []
+
+
+def _get_output():
+    if not _OUTPUT:
+        _OUTPUT.append(_Output())
+        OUTPUTS_CREATED.append(_OUTPUT[0])
+    return _OUTPUT[0]
+
+
+def _get_config(section=None):
+    return _CONFIGS.setdefault(section, _Config(section))
+
+
+class _UserConfig(object):
+    """pyrevit.userconfig.user_config: the config file, written by script.save_config"""
+
+    def __init__(self):
+        self.config_file = os.path.join(DATA_DIR, "pyRevit_config.ini")
+        self.saves = 0
+        self.reloads = 0
+
+    def save_changes(self):
+        if not os.path.isdir(DATA_DIR):
+            os.makedirs(DATA_DIR)
+        with open(self.config_file, "w") as f:
+            for section, config in sorted(_CONFIGS.items()):
+                f.write("[{}]\n".format(section))
+                for name, value in sorted(config._options.items()):
+                    f.write("{} = {!r}\n".format(name, value))
+        self.saves += 1
+
+    def reload(self, cfg_file_path=None):
+        self.reloads += 1
+
+
+USER_CONFIG = _UserConfig()
+
+
+def _data_file(file_id, file_ext="", add_cmd_name=False):
+    if not os.path.isdir(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    return os.path.join(DATA_DIR, "{}.{}".format(file_id, file_ext) if file_ext else file_id)
+
+
+def _increment_str(input_str, step=1, expand=False):
+    # bumps the last number of the string, or appends one
+    match = re.search("([0-9]+)([^0-9]*)$", input_str)
+    if not match:
+        return input_str + str(step)
+    digits = match.group(1)
+    bumped = str(int(digits) + step).zfill(len(digits))
+    return input_str[:match.start(1)] + bumped + match.group(2)
+
+
+class _TemplateListItem(object):
+    def __init__(self, orig_item, checked=False, **kwargs):
+        self.item = orig_item
+        self.state = checked
+
+
+class _SelectFromList(object):
+    @staticmethod
+    def show(context, **kwargs):
+        return None
+
+
+class _WarningBar(object):
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Enum(object):
+    @staticmethod
+    def ToObject(enum_type, value):
+        return enum_type._by_value.get(int(value), value)
+
+
+def _get_type(element):
+    return element.Document.GetElement(element.GetTypeId())
+
+
+class _DeferredModules(object):
+    """Import hook registering the slow modules on first import"""
+
+    def __init__(self, factories):
+        self.factories = factories
+
+    def find_spec(self, name, path=None, target=None):
+        if name in self.factories:
+            return ModuleSpec(name, self)
+
+    def create_module(self, spec):
+        LOADED.append(spec.name)
+        module = self.factories[spec.name]()
+        parent, _, child = spec.name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def _deferred(name, **attrs):
+    def factory():
+        module = types.ModuleType(name)
+        for key, value in attrs.items():
+            setattr(module, key, value)
+        return module
+    return factory
+
+
+def install(doc, version=2024):
+    # register the stand-in modules, with doc as the active document
+    db = fakedb
+    _module("Autodesk")
+    _module("Autodesk.Revit", DB=db)
+    sys.modules["Autodesk.Revit.DB"] = db
+    exceptions = _module("Autodesk.Revit.Exceptions",
+                         ArgumentException=db.ArgumentException,
+                         InvalidOperationException=db.InvalidOperationException,
+                         InternalException=db.InternalException,
+                         OperationCanceledException=db.OperationCanceledException)
+    sys.modules["Autodesk.Revit"].Exceptions = exceptions
+    selection = _module("Autodesk.Revit.UI.Selection", ObjectType=types.SimpleNamespace(Element=1),
+                        ISelectionFilter=object)
+    _module("Autodesk.Revit.UI", Selection=selection)
+
+    host_app = _HostApp(version, doc.Application)
+    uidoc = types.SimpleNamespace(Document=doc, ActiveView=doc.ActiveView,
+                                  Selection=types.SimpleNamespace(GetElementIds=lambda: [],
+                                                                  PickObjects=lambda *a: []))
+    query = _module("pyrevit.revit.db.query", get_type=_get_type)
+    revit_db = _module("pyrevit.revit.db", query=query)
+    revit = _module("pyrevit.revit", doc=doc, uidoc=uidoc, active_view=doc.ActiveView,
+                    Transaction=_Transaction, db=revit_db)
+    coreutils = _module("pyrevit.coreutils", increment_str=_increment_str)
+    framework = _module("pyrevit.framework", List=db.List)
+    pyrevit = _module("pyrevit", revit=revit, DB=db, HOST_APP=host_app, coreutils=coreutils,
+                      framework=framework, PyRevitException=PyRevitException)
+    pyrevit.__path__ = []
+    _uninstall_hook()
+    sys.meta_path.insert(0, _DeferredModules({
+        "pyrevit.script": _deferred("pyrevit.script", get_output=_get_output, get_config=_get_config,
+                                    get_universal_data_file=_data_file, get_data_file=_data_file,
+                                    get_instance_data_file=_data_file, save_config=USER_CONFIG.save_changes),
+        "pyrevit.userconfig": _deferred("pyrevit.userconfig", user_config=USER_CONFIG),
+        "pyrevit.forms": _deferred("pyrevit.forms", alert=lambda *a, **k: True, pick_file=lambda *a, **k: None,
+                                   TemplateListItem=_TemplateListItem, SelectFromList=_SelectFromList,
+                                   WarningBar=_WarningBar),
+        "rpw": _deferred("rpw", revit=types.SimpleNamespace(uidoc=uidoc, doc=doc)),
+    }))
+    _module("clr", AddReference=lambda *a: None, GetClrType=lambda cls: cls)
+    _module("System", Enum=_Enum, Guid=uuid.UUID, Exception=Exception, Type=type)
+
+    package = _module("pychilizer")
+    package.__path__ = [REPO_ROOT]
+    return host_app
+
+
+def _uninstall_hook():
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, _DeferredModules)]
+
+
+def uninstall():
+    # forget the stand-ins and every pychilizer module imported against them
+    _uninstall_hook()
+    for name in list(sys.modules):
+        if name.split(".")[0] in ("Autodesk", "pyrevit", "rpw", "clr", "System", "pychilizer"):
+            del sys.modules[name]
+    del _OUTPUT[:]
+    del OUTPUTS_CREATED[:]
+    del LOADED[:]
+    _CONFIGS.clear()
+    USER_CONFIG.saves = USER_CONFIG.reloads = 0
@@ -0,0 +1,39 @@
+"""Times the import of one pychilizer module in a fresh interpreter.
+
+    python benchmarks/imports.py geo
+
+Prints a JSON object with the import time in seconds, the slow modules
+(pyrevit.forms, pyrevit.script, rpw) the import pulled in, and the number of
+output windows it created.
+"""
+
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import fakedb as DB
+import fakerevit
+
+timer = __import__("time").perf_counter
+
+MODULES = ("batch", "binning", "categories", "colorize", "configcache", "database", "dbquery", "doccache", "geo", "lazymodule", "naming", "palette",
+           "params", "profiling", "resources", "rules", "select", "templates", "units")
+
+
+def measure(module_name):
+    doc = DB.Document()
+    doc.ActiveView = DB.ViewPlan(doc, "Level 1")
+    fakerevit.install(doc)
+    import importlib
+    start = timer()
+    importlib.import_module("pychilizer." + module_name)
+    seconds = timer() - start
+    return {"seconds": seconds, "loaded": list(fakerevit.LOADED), "outputs": len(fakerevit.OUTPUTS_CREATED)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure(sys.argv[1])))
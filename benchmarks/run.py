@@ -0,0 +1,589 @@
+"""Runs the pychilizer benchmarks against a synthetic in-memory model.
+
+    python benchmarks/run.py                 # compare with baselines.json
+    python benchmarks/run.py --update        # record new baselines
+    python benchmarks/run.py -k sheets       # only benchmarks whose name contains "sheets"
+    python benchmarks/run.py --scale 0.1     # smaller model, for a quick check
+
+Each benchmark is timed as the best of several runs, with the garbage
+collector off and the pychilizer caches reset before each suite. A fixed
+calibration workload is timed with the benchmarks and recorded with the
+baselines, and the baselines are scaled by how much slower or faster it runs
+now, so a busy or slower machine does not fail every benchmark.
+
+A benchmark fails if it is slower than its scaled baseline by more than the
+tolerance factor in RETRIES more timings, or if the results of a checked benchmark are wrong (sheet
+numbers not unique, chained loops not closed, classes not in order, filters
+not keeping their rules). The create_sheets benchmarks also check that the
+time grows linearly with the number of sheets. Each module is also imported
+in a fresh interpreter: the import must stay within IMPORT_BUDGET and must
+not load pyrevit.forms, pyrevit.script or rpw, or open an output window. The
+exit code is 1 if any check failed.
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import fakedb as DB
+import fakerevit
+import imports
+import synthmodel
+
+BASELINES = os.path.join(BENCH_DIR, "baselines.json")
+DEFAULT_TOLERANCE = 2.0
+# doubling the work may at most multiply the time by this much
+LINEAR_GROWTH_LIMIT = 2.6
+# differences below this many seconds are timer noise, not regressions
+NOISE_FLOOR = 0.002
+SHEET_BATCHES = (250, 500, 1000)
+# seconds allowed for importing one module, with its pychilizer dependencies
+IMPORT_BUDGET = 0.05
+IMPORT_REPEAT = 3
+CALIBRATION_REPEAT = 7
+# a benchmark slower than its baseline is timed again this many times before it fails
+RETRIES = 2
+
+timer = getattr(time, "perf_counter", time.time)
+
+
+class Benchmark(object):
+    """A timed callable, with optional untimed setup and teardown around each run.
+
+    check is called once more after the timed runs, untimed and between the
+    same setup and teardown, and returns a list of problems with the results.
+    """
+
+    def __init__(self, name, run, setup=None, teardown=None, repeat=5, check=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+        self.repeat = repeat
+        self.check = check
+
+    def best_time(self):
+        best = None
+        for _ in range(self.repeat):
+            if self.setup:
+                self.setup()
+            gc.disable()
+            try:
+                start = timer()
+                self.run()
+                elapsed = timer() - start
+            finally:
+                gc.enable()
+            if self.teardown:
+                self.teardown()
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def problems(self):
+        if self.check is None:
+            return []
+        if self.setup:
+            self.setup()
+        try:
+            return ["{}: {}".format(self.name, problem) for problem in self.check()]
+        finally:
+            if self.teardown:
+                self.teardown()
+
+
+def calibrate():
+    # best time of a fixed pure Python workload, a measure of how fast the machine runs now
+    def workload():
+        table = {}
+        for i in range(100000):
+            table[i % 997] = table.get(i % 997, 0) + i * 0.5
+        words = ["{:g}".format(v) for v in table.values()]
+        return sorted(words, key=len)
+
+    best = None
+    for _ in range(CALIBRATION_REPEAT):
+        gc.disable()
+        try:
+            start = timer()
+            workload()
+            elapsed = timer() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _rolled_back(doc, action):
+    # run action in a transaction that is rolled back, leaving the model as it was
+    def run():
+        transaction = DB.Transaction(doc, "benchmark")
+        transaction.Start()
+        try:
+            action()
+        finally:
+            transaction.RollBack()
+    return run
+
+
+def _checked(doc, action, check):
+    # check(result) of action run in a transaction that is rolled back afterwards
+    def run():
+        transaction = DB.Transaction(doc, "benchmark check")
+        transaction.Start()
+        try:
+            return check(action())
+        finally:
+            transaction.RollBack()
+    return run
+
+
+def check_unique_sheet_numbers(sheets, taken):
+    numbers = [sheet.SheetNumber for sheet in sheets]
+    problems = []
+    if len(set(numbers)) != len(numbers):
+        problems.append("{} duplicate sheet numbers".format(len(numbers) - len(set(numbers))))
+    reused = taken.intersection(numbers)
+    if reused:
+        problems.append("{} sheet numbers already taken".format(len(reused)))
+    return problems
+
+
+def check_closed_loops(loops_by_input, inputs):
+    # every unordered closed loop must come back as one closed CurveLoop of all its curves
+    problems = []
+    for index, (loops, curves) in enumerate(zip(loops_by_input, inputs)):
+        if len(loops) != 1 or loops[0].IsOpen() or loops[0].NumberOfCurves() != len(curves):
+            problems.append("loop {} not chained into one closed loop".format(index))
+    return problems
+
+
+def check_filter_rules(filters, specs, rules):
+    problems = []
+    for name, bics, element_filter in specs:
+        kept = rules.filter_signature(filters[name].GetElementFilter())
+        if kept != rules.filter_signature(element_filter):
+            problems.append("{} does not keep its rules".format(name))
+    return problems
+
+
+def check_classes(values, classes, breaks, n):
+    # breaks ascending, at most n classes, and classes in the order of the values
+    problems = []
+    if any(b >= c for b, c in zip(breaks, breaks[1:])):
+        problems.append("breaks not ascending")
+    if len(breaks) >= n:
+        problems.append("{} breaks for {} classes".format(len(breaks), n))
+    ordered = [c for v, c in sorted(zip(values, classes)) if c is not None]
+    if any(a > b for a, b in zip(ordered, ordered[1:])):
+        problems.append("classes not in the order of the values")
+    return problems
+
+
+def database_benchmarks(model, pc):
+    doc = model.doc
+    database = pc["database"]
+    doccache = pc["doccache"]
+    params = pc["params"]
+    rules = pc["rules"]
+    sheet_numbers = [s.SheetNumber for s in model.sheets[:1000]]
+    taken_numbers = set(s.SheetNumber for s in model.sheets)
+    view_names = [v.Name for v in model.views[:1000]]
+
+    def drop_caches():
+        doccache.get_doc_cache(doc).drop()
+
+    def warm_index():
+        database.get_sheet("A0000", doc)
+
+    def sheet_specs(n):
+        return [("A{:04d}".format(i), "New Sheet {}".format(i)) for i in range(n)]
+
+    # most tools look elements up and create them inside a transaction of their own
+    open_transaction = []
+
+    def start_transaction():
+        warm_index()
+        transaction = DB.Transaction(doc, "benchmark")
+        transaction.Start()
+        open_transaction.append(transaction)
+
+    def roll_back():
+        open_transaction.pop().RollBack()
+        drop_caches()
+
+    def edit_instances():
+        # live index, resources and shared parameter caches, and a transaction editing every instance
+        warm_index()
+        database.get_solid_fill_pat(doc)
+        database.shared_param_id_from_guid([], model.shared_guids[0], doc)
+        transaction = DB.Transaction(doc, "benchmark")
+        transaction.Start()
+        open_transaction.append(transaction)
+        mark = doc.definition("Mark")
+        for el in model.instances:
+            el._set_value(mark, "Edited")
+
+    missing_numbers = ["Z{:04d}".format(i) for i in range(1000)]
+    missing_names = ["Missing View {}".format(i) for i in range(1000)]
+
+    benchmarks = [
+        Benchmark("database.index_build", lambda: database.get_sheet("A0000", doc), setup=drop_caches),
+        Benchmark("database.get_sheet_x1000", lambda: [database.get_sheet(n, doc) for n in sheet_numbers]),
+        Benchmark("database.get_view_x1000", lambda: [database.get_view(n, doc) for n in view_names]),
+        Benchmark("database.unique_view_names_1000", lambda: database.unique_view_names(view_names, "", doc)),
+        Benchmark("database.get_sheet_misses_x1000_in_transaction",
+                  lambda: [database.get_sheet(n, doc) for n in missing_numbers],
+                  setup=start_transaction, teardown=roll_back, repeat=2),
+        Benchmark("database.get_view_misses_x1000_in_transaction",
+                  lambda: [database.get_view(n, doc) for n in missing_names],
+                  setup=start_transaction, teardown=roll_back, repeat=2),
+        Benchmark("database.unique_view_name_x200_in_transaction",
+                  lambda: [database.unique_view_name(n, "", doc) for n in view_names[:200]],
+                  setup=start_transaction, teardown=roll_back, repeat=2),
+        Benchmark("doccache.commit_100k_edits", lambda: open_transaction.pop().Commit(),
+                  setup=edit_instances, teardown=drop_caches, repeat=3),
+        Benchmark("database.create_sheet_x200_in_transaction",
+                  lambda: [database.create_sheet(n, "New Sheet", model.titleblock, doc) for n in missing_numbers[:200]],
+                  setup=start_transaction, teardown=roll_back, repeat=2),
+        Benchmark("database.delete_views_by_name_500",
+                  _rolled_back(doc, lambda: database.delete_views_by_name(view_names[1:501], doc)),
+                  setup=warm_index, teardown=drop_caches),
+        Benchmark("database.get_viewport_types", lambda: database.get_viewport_types(doc)),
+        Benchmark("database.get_solid_fill_pat", lambda: database.get_solid_fill_pat(doc), setup=drop_caches),
+        Benchmark("database.get_solid_fill_pat_x200", lambda: [database.get_solid_fill_pat(doc) for _ in range(200)]),
+        Benchmark("database.invis_style", lambda: database.invis_style(doc)),
+        Benchmark("database.get_3Dviewtype_id", lambda: database.get_3Dviewtype_id(doc)),
+        Benchmark("database.param_set_by_cat", lambda: database.param_set_by_cat(DB.BuiltInCategory.OST_Walls, doc),
+                  setup=drop_caches),
+        Benchmark("database.shared_param_id_from_guid_x20",
+                  lambda: [database.shared_param_id_from_guid([], guid, doc) for guid in model.shared_guids]),
+        Benchmark("database.get_document_model_bics", lambda: database.get_document_model_bics(doc),
+                  setup=drop_caches),
+        Benchmark("params.extract_parameters_10k",
+                  lambda: params.extract_parameters(model.instances[:10000],
+                                                    ["Mark", "Comments", "Load", "Shared 03"], as_string=True)),
+    ]
+    # half of the filters with a rule, half on categories only
+    filter_specs = [("Filter {:03d}".format(i), [synthmodel.MODEL_CATEGORIES[i % 3]],
+                     rules.parameter_filter([rules.string_rule(DB.BuiltInParameter.ALL_MODEL_MARK, "M{}".format(i))])
+                     if i % 2 else None)
+                    for i in range(120)]
+    benchmarks.append(Benchmark("database.upsert_filters_120",
+                                _rolled_back(doc, lambda: database.upsert_filters(filter_specs, doc)),
+                                setup=warm_index, teardown=drop_caches,
+                                check=_checked(doc, lambda: database.upsert_filters(filter_specs, doc),
+                                               lambda filters: check_filter_rules(filters, filter_specs, rules))))
+    for n in SHEET_BATCHES:
+        specs = sheet_specs(n)
+        # every number asked for is already taken by the model's own sheets
+        specs += [(number, "Taken Number") for number in sheet_numbers[:n // 10]]
+
+        def create(specs=specs):
+            return database.create_sheets(specs, model.titleblock, doc)
+
+        benchmarks.append(Benchmark(
+            "database.create_sheets_{}".format(n), _rolled_back(doc, create),
+            setup=warm_index, teardown=drop_caches, repeat=3,
+            check=_checked(doc, create, lambda sheets: check_unique_sheet_numbers(sheets, taken_numbers))))
+    return benchmarks
+
+
+def batch_benchmarks(model, pc):
+    batch = pc["batch"]
+    doc = model.doc
+
+    def write_sheets():
+        # the writer's own overhead, around an operation as cheap as it gets
+        writer = batch.BatchWriter("Create Sheets", doc, chunk_size=100)
+        for i in range(1000):
+            writer.add(DB.ViewSheet.Create, doc, model.titleblock)
+        writer.run()
+
+    return [
+        Benchmark("batch.sheets_1000_in_chunks_of_100", _rolled_back(doc, write_sheets), repeat=3),
+    ]
+
+
+def geo_benchmarks(model, pc):
+    geo = pc["geo"]
+    rooms = model.rooms
+    loops = [synthmodel.shuffled_loop([s.GetCurve() for s in r.GetBoundarySegments(None)[0]], seed=i)
+             for i, r in enumerate(rooms[:200])]
+    points = synthmodel.ring_points(5000, radius=500.0)
+    ring = synthmodel.shuffled_loop([DB.Line.CreateBound(points[k], points[(k + 1) % len(points)])
+                                     for k in range(len(points))])
+    return [
+        Benchmark("geo.get_room_bound_all_rooms", lambda: [geo.get_room_bound(r) for r in rooms], repeat=3),
+        Benchmark("geo.get_open_ends_200_loops", lambda: [geo.get_open_ends(loop) for loop in loops], repeat=3),
+        Benchmark("geo.chain_curve_loops_200_loops", lambda: [geo.chain_curve_loops(loop) for loop in loops],
+                  repeat=3,
+                  check=lambda: check_closed_loops([geo.chain_curve_loops(loop) for loop in loops], loops)),
+        Benchmark("geo.get_open_ends_5000_segments", lambda: geo.get_open_ends(ring), repeat=3),
+        Benchmark("geo.chain_curve_loops_5000_segments", lambda: geo.chain_curve_loops(ring), repeat=3,
+                  check=lambda: check_closed_loops([geo.chain_curve_loops(ring)], [ring])),
+    ]
+
+
+def colorize_benchmarks(model, pc):
+    colorize = pc["colorize"]
+    palette = pc["palette"]
+    doc = model.doc
+    colours = colorize.get_colours(200)
+    options = colorize.override_options
+    view = model.views[0]
+    # the diff runs leave their colours committed, on a view of their own
+    diff_view = model.views[1]
+    element_keys = dict((el.Id, el.GetTypeId().IntegerValue) for el in model.instances)
+    painted = dict((el.Id, el.GetTypeId().IntegerValue) for el in model.instances[:50000])
+    # one element in a hundred moved to another key
+    edited = dict(painted)
+    for el_id in list(edited)[::100]:
+        edited[el_id] = "edited"
+    open_transaction = []
+    categories_config = pc["configcache"].get_section(colorize.CATEGORIES_CONFIG_OPTION_NAME)
+    saved_labels = sorted(colorize.get_categories_config(doc))
+
+    def paint():
+        transaction = DB.Transaction(doc, "benchmark")
+        transaction.Start()
+        open_transaction.append(transaction)
+        colorize.recolorize(diff_view, painted, doc=doc)
+
+    def unpaint():
+        open_transaction.pop().RollBack()
+
+    return [
+        Benchmark("colorize.recolorize_50k_full",
+                  _rolled_back(doc, lambda: colorize.recolorize(view, painted, doc=doc)), repeat=3),
+        # committed runs are trusted, runs in an open transaction check the overrides they skip
+        Benchmark("colorize.recolorize_50k_diff", lambda: colorize.recolorize(diff_view, edited, doc=doc),
+                  setup=lambda: colorize.recolorize(diff_view, painted, doc=doc), repeat=3),
+        Benchmark("colorize.recolorize_50k_diff_pending", lambda: colorize.recolorize(diff_view, edited, doc=doc),
+                  setup=paint, teardown=unpaint, repeat=3),
+        Benchmark("colorize.colorize_elements_100k",
+                  _rolled_back(doc, lambda: colorize.colorize_elements(view, element_keys, doc=doc)), repeat=3),
+        Benchmark("colorize.colorize_by_value_100k_quantile",
+                  _rolled_back(doc, lambda: colorize.colorize_by_value(view, model.instances, "Load", doc=doc)),
+                  repeat=3),
+        Benchmark("colorize.colorize_by_value_100k_jenks",
+                  _rolled_back(doc, lambda: colorize.colorize_by_value(view, model.instances, "Load",
+                                                                       method="jenks", doc=doc)), repeat=3),
+        Benchmark("colorize.colorize_by_parameter_100k_filters",
+                  _rolled_back(doc, lambda: colorize.colorize_by_parameter(view, model.instances, "Count",
+                                                                           mode="filters", doc=doc)),
+                  repeat=3),
+        Benchmark("colorize.colorize_by_parameter_100k_elements",
+                  _rolled_back(doc, lambda: colorize.colorize_by_parameter(view, model.instances, "Count",
+                                                                           mode="elements", doc=doc)), repeat=3),
+        Benchmark("colorize.get_colours_500", lambda: colorize.get_colours(500)),
+        Benchmark("palette.palette_500_uncached", lambda: palette.palette(500, seed=1),
+                  setup=palette.clear_cache),
+        Benchmark("palette.distinct_2000_uncached", lambda: palette.distinct(2000),
+                  setup=palette.clear_cache, repeat=2),
+        Benchmark("palette.distinct_2000_cached", lambda: palette.palette(2000, preset="distinct")),
+        Benchmark("colorize.overrides_x1000",
+                  lambda: [colorize.set_colour_overrides_by_option(options, colours[i % len(colours)], doc)
+                           for i in range(1000)]),
+        Benchmark("colorize.get_categories_config", lambda: colorize.get_categories_config(doc)),
+        Benchmark("colorize.save_config_unchanged_x100",
+                  lambda: [colorize.save_config(saved_labels, colorize.CATEGORIES_CONFIG_OPTION_NAME, categories_config)
+                           for _ in range(100)]),
+    ]
+
+
+def binning_benchmarks(model, pc):
+    binning = pc["binning"]
+    params = pc["params"]
+    values = params.extract_parameters(model.instances, ["Load"]).columns["Load"]
+    benchmarks = []
+    for method in sorted(binning.METHODS):
+        def classify(method=method):
+            return binning.classify(values, 7, method)
+
+        def check(method=method):
+            classes, breaks = binning.classify(values, 7, method)
+            return check_classes(values, classes, breaks, 7)
+
+        benchmarks.append(Benchmark("binning.classify_100k_{}".format(method), classify, repeat=3, check=check))
+    return benchmarks
+
+
+def units_benchmarks(model, pc):
+    units = pc["units"]
+    doc = model.doc
+    values = [i * 0.37 for i in range(10000)]
+    return [
+        Benchmark("units.convert_length_to_internal_10k",
+                  lambda: [units.convert_length_to_internal(v, doc) for v in values]),
+        Benchmark("units.convert_length_to_display_10k",
+                  lambda: [units.convert_length_to_display(v, doc) for v in values]),
+        Benchmark("units.correct_input_units_10k",
+                  lambda: [units.correct_input_units("{}mm".format(v), doc) for v in values]),
+    ]
+
+
+SUITES = [database_benchmarks, batch_benchmarks, geo_benchmarks, colorize_benchmarks, binning_benchmarks,
+          units_benchmarks]
+
+
+def import_times(keyword):
+    # best import time of each module in a fresh interpreter, and the budget failures
+    results = {}
+    failures = []
+    for module_name in imports.MODULES:
+        name = "import.{}".format(module_name)
+        if keyword not in name:
+            continue
+        runs = [json.loads(subprocess.check_output([sys.executable, imports.__file__, module_name]))
+                for _ in range(IMPORT_REPEAT)]
+        results[name] = min(run["seconds"] for run in runs)
+        if results[name] > IMPORT_BUDGET:
+            failures.append("{} over the {:.0f} ms budget".format(name, IMPORT_BUDGET * 1000))
+        if runs[0]["loaded"]:
+            failures.append("{} loads {}".format(name, ", ".join(runs[0]["loaded"])))
+        if runs[0]["outputs"]:
+            failures.append("{} opens an output window".format(name))
+    return results, failures
+
+
+def import_pychilizer():
+    import importlib
+    return dict((name, importlib.import_module("pychilizer." + name))
+                for name in ("batch", "binning", "configcache", "database", "doccache", "params", "geo", "colorize",
+                             "palette", "rules", "units"))
+
+
+def reset_caches(pc):
+    # each suite starts from cold caches, whatever the suites before it left behind
+    pc["doccache"].clear_doc_caches()
+    pc["palette"].clear_cache()
+    pc["configcache"].clear()
+    gc.collect()
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+
+def save_baselines(scale, calibration, results):
+    data = {"scale": scale, "python": sys.version.split()[0], "calibration": calibration, "results": results}
+    with open(BASELINES, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def too_slow(seconds, baseline, tolerance):
+    return seconds / baseline > tolerance and seconds - baseline > NOISE_FLOOR
+
+
+def check_linear_growth(results):
+    # create_sheets must scale linearly: each doubling of the batch at most LINEAR_GROWTH_LIMIT slower
+    failures = []
+    for smaller, larger in zip(SHEET_BATCHES, SHEET_BATCHES[1:]):
+        a = results.get("database.create_sheets_{}".format(smaller))
+        b = results.get("database.create_sheets_{}".format(larger))
+        if a and b:
+            growth = (b / a) / (float(larger) / smaller)
+            line = "create_sheets {} -> {}: x{:.2f} per doubling".format(smaller, larger, b / a)
+            if growth * 2 > LINEAR_GROWTH_LIMIT:
+                failures.append(line)
+            print("  " + line)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="keyword", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--scale", type=float, default=1.0, help="model size relative to the default model")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown factor against the baseline")
+    parser.add_argument("--update", action="store_true", help="write the results to baselines.json")
+    args = parser.parse_args(argv)
+
+    start = timer()
+    s = args.scale
+    model = synthmodel.generate(elements=int(100000 * s), views=int(5000 * s), sheets=int(2000 * s),
+                                rooms=int(2000 * s))
+    print("model: {} elements, built in {:.1f}s".format(len(model.doc._elements), timer() - start))
+
+    baselines = load_baselines()
+    compare = baselines.get("scale") == args.scale and not args.update
+    calibration = calibrate()
+    # baselines are scaled by how much slower the machine runs the calibration workload now
+    speed = calibration / baselines["calibration"] if baselines.get("calibration") else 1.0
+    print("calibration: {:.2f} ms, x{:.2f} of baseline".format(calibration * 1000, speed))
+
+    def baseline_of(name):
+        baseline = baselines.get("results", {}).get(name) if compare else None
+        return baseline * speed if baseline else None
+
+    fakerevit.install(model.doc)
+    problems = []
+    try:
+        pc = import_pychilizer()
+        results = {}
+        for suite in SUITES:
+            reset_caches(pc)
+            for benchmark in suite(model, pc):
+                if args.keyword not in benchmark.name:
+                    continue
+                seconds = benchmark.best_time()
+                baseline = baseline_of(benchmark.name)
+                for _ in range(RETRIES):
+                    if not baseline or not too_slow(seconds, baseline, args.tolerance):
+                        break
+                    seconds = min(seconds, benchmark.best_time())
+                results[benchmark.name] = seconds
+                problems += benchmark.problems()
+    finally:
+        fakerevit.uninstall()
+    import_results, failures = import_times(args.keyword)
+    results.update(import_results)
+    failures += problems
+
+    for name in sorted(results):
+        seconds = results[name]
+        baseline = baseline_of(name)
+        if baseline:
+            ratio = seconds / baseline
+            status = "SLOWER" if too_slow(seconds, baseline, args.tolerance) else "ok"
+            if status != "ok":
+                failures.append(name)
+            print("{:<45} {:>10.2f} ms  x{:.2f} of baseline  {}".format(name, seconds * 1000, ratio, status))
+        else:
+            print("{:<45} {:>10.2f} ms".format(name, seconds * 1000))
+    if not compare and not args.update and baselines:
+        print("baselines were recorded at scale {}, not compared".format(baselines.get("scale")))
+    failures += check_linear_growth(results)
+
+    for problem in problems:
+        print("  " + problem)
+
+    if args.update:
+        if args.keyword and baselines.get("scale") == args.scale and baselines.get("calibration"):
+            # the new results are kept at the speed of the machine the other baselines were taken on
+            merged = dict(baselines.get("results", {}))
+            merged.update((name, seconds / speed) for name, seconds in results.items())
+            results = merged
+            calibration = baselines["calibration"]
+        save_baselines(args.scale, calibration, results)
+        print("baselines written to {}".format(BASELINES))
+    if failures:
+        print("FAILED: " + ", ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
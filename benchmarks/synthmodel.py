@@ -0,0 +1,195 @@
+"""Synthetic Revit model generator for the benchmark suite"""
+
+import math
+import random
+import uuid
+
+import fakedb as DB
+
+BIC = DB.BuiltInCategory
+BIP = DB.BuiltInParameter
+ST = DB.StorageType
+
+MODEL_CATEGORIES = [BIC.OST_Walls, BIC.OST_Floors, BIC.OST_Furniture, BIC.OST_GenericModel,
+                    BIC.OST_Doors, BIC.OST_Windows, BIC.OST_Casework, BIC.OST_PlumbingFixtures,
+                    BIC.OST_Ceilings, BIC.OST_Columns]
+NON_MODEL_CATEGORIES = [BIC.OST_Views, BIC.OST_Sheets, BIC.OST_TitleBlocks, BIC.OST_Viewports,
+                        BIC.OST_Lines, BIC.OST_InvisibleLines]
+
+PROJECT_PARAMETERS = [("Fire Rating", ST.String), ("Cost", ST.Double), ("Count", ST.Integer),
+                      ("Finish", ST.String), ("Load", ST.Double)]
+
+
+class SyntheticModel(object):
+    """A document filled with elements, views, sheets and rooms, plus handles to them"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.shared_guids = []
+        self.types = {}
+        self.instances = []
+        self.views = []
+        self.sheets = []
+        self.rooms = []
+        self.titleblock = None
+
+
+def _definitions(doc, shared_parameters):
+    d = {}
+    next_id = [300000]
+
+    def add(name, storage, bip=None, guid=None, read_only=False):
+        if bip is not None:
+            param_id = int(bip)
+        else:
+            next_id[0] += 1
+            param_id = next_id[0]
+        d[bip if bip is not None else name] = doc.add_definition(
+            DB.Definition(name, param_id, storage, bip=bip, guid=guid, read_only=read_only))
+
+    add("Sheet Number", ST.String, BIP.SHEET_NUMBER)
+    add("View Name", ST.String, BIP.VIEW_NAME)
+    add("Family Name", ST.String, BIP.SYMBOL_FAMILY_NAME_PARAM, read_only=True)
+    add("Type Name", ST.String, BIP.ALL_MODEL_TYPE_NAME, read_only=True)
+    add("Mark", ST.String, BIP.ALL_MODEL_MARK)
+    add("Comments", ST.String, BIP.ALL_MODEL_INSTANCE_COMMENTS)
+    add("Show Title", ST.Integer, BIP.VIEWPORT_ATTR_SHOW_LABEL)
+    add("Type", ST.ElementId, BIP.ELEM_TYPE_PARAM)
+    add("Category", ST.ElementId, BIP.ELEM_CATEGORY_PARAM, read_only=True)
+    add("Area", ST.Double, BIP.ROOM_AREA, read_only=True)
+    add("Height", ST.Double, BIP.ROOM_HEIGHT)
+    add("Name", ST.String, BIP.ROOM_NAME)
+    for name, storage in PROJECT_PARAMETERS:
+        add(name, storage)
+    # shared parameters are found through their SharedParameterElement, whose id is the parameter id
+    for i in range(shared_parameters):
+        guid = uuid.UUID(int=random.getrandbits(128))
+        spe = DB.SharedParameterElement(doc, "Shared {:02d}".format(i), guid)
+        doc.add_definition(DB.Definition(spe.Name, spe.Id.IntegerValue, ST.String, guid=guid))
+        d[spe.Name] = doc.definition(spe.Name)
+    return d
+
+
+def _room_loop(origin, width, depth, segments):
+    # rectangle split into the given number of segments, in order and counter-clockwise
+    corners = [origin, origin + DB.XYZ(width, 0, 0), origin + DB.XYZ(width, depth, 0), origin + DB.XYZ(0, depth, 0)]
+    per_side = [segments // 4 + (1 if i < segments % 4 else 0) for i in range(4)]
+    curves = []
+    for side in range(4):
+        start, end = corners[side], corners[(side + 1) % 4]
+        n = max(1, per_side[side])
+        points = [start + (end - start) * (float(k) / n) for k in range(n)] + [end]
+        for k in range(n):
+            curves.append(DB.Line.CreateBound(points[k], points[k + 1]))
+    return curves
+
+
+def generate(elements=100000, views=5000, sheets=2000, rooms=2000, types_per_category=40,
+             shared_parameters=20, filters=100, seed=1):
+    random.seed(seed)
+    doc = DB.Document()
+    model = SyntheticModel(doc)
+    for bic in MODEL_CATEGORIES:
+        doc.category(bic)
+    for bic in NON_MODEL_CATEGORIES:
+        doc.category(bic).CategoryType = DB.CategoryType.Annotation
+    defs = _definitions(doc, shared_parameters)
+    model.shared_guids = [definition.guid for definition in doc._definitions_by_id.values() if definition.guid]
+    shared = [defs["Shared {:02d}".format(i)] for i in range(shared_parameters)]
+
+    # resources looked up by name or by scanning their class
+    for i in range(30):
+        DB.FillPatternElement(doc, "Pattern {:02d}".format(i), is_solid=(i == 29))
+    for i in range(50):
+        DB.GraphicsStyle(doc, "Style {:02d}".format(i))
+    DB.GraphicsStyle(doc, "<Invisible lines>", BIC.OST_InvisibleLines)
+    for i in range(5):
+        DB.FilledRegionType(doc, "Region {}".format(i))
+    for family in (DB.ViewFamily.FloorPlan, DB.ViewFamily.Section, DB.ViewFamily.Elevation,
+                   DB.ViewFamily.ThreeDimensional):
+        DB.ViewFamilyType(doc, family.name, family)
+
+    # family types and instances
+    for bic in MODEL_CATEGORIES:
+        cat_types = []
+        for t in range(types_per_category):
+            symbol = DB.FamilySymbol(doc, "Type {:03d}".format(t), bic)
+            symbol._values[defs[BIP.SYMBOL_FAMILY_NAME_PARAM]] = "{} Family {:02d}".format(bic.name[4:], t % 8)
+            symbol._values[defs[BIP.ALL_MODEL_TYPE_NAME]] = symbol.Name
+            symbol._values[defs["Fire Rating"]] = "{} min".format(30 * (t % 4))
+            symbol._values[defs["Cost"]] = 100.0 + t
+            symbol._values[defs["Finish"]] = None
+            symbol._values[shared[t % len(shared)]] = "type value {}".format(t)
+            cat_types.append(symbol)
+        model.types[bic] = cat_types
+    per_category = max(1, elements // len(MODEL_CATEGORIES))
+    for bic in MODEL_CATEGORIES:
+        cat_types = model.types[bic]
+        for i in range(per_category):
+            symbol = cat_types[i % len(cat_types)]
+            el = DB.FamilyInstance(doc, symbol.Name, bic, symbol.Id, DB.XYZ(i % 500, i // 500, 0))
+            el._values[defs[BIP.ALL_MODEL_MARK]] = "M{}".format(i)
+            el._values[defs[BIP.ALL_MODEL_INSTANCE_COMMENTS]] = random.choice(["", "check", "ok", None])
+            el._values[defs[BIP.ELEM_TYPE_PARAM]] = symbol.Id
+            el._values[defs[BIP.ELEM_CATEGORY_PARAM]] = el.Category.Id
+            el._values[defs["Count"]] = i % 17
+            el._values[defs["Load"]] = random.random() * 1000
+            el._values[shared[i % len(shared)]] = "value {}".format(i % 50)
+            el._values[shared[(i + 7) % len(shared)]] = "value {}".format(i % 13)
+            model.instances.append(el)
+
+    # views, templates, sheets, viewports
+    for i in range(20):
+        template = DB.ViewPlan(doc, "Template {:02d}".format(i), is_template=True)
+        template._values[defs[BIP.VIEW_NAME]] = template.Name
+    for i in range(views):
+        view = DB.ViewPlan(doc, "Level {} - Plan {:04d}".format(i % 10, i))
+        view._values[defs[BIP.VIEW_NAME]] = view.Name
+        model.views.append(view)
+    doc.ActiveView = model.views[0] if model.views else None
+    for i in range(3):
+        titleblock = DB.FamilySymbol(doc, "A{}".format(i), BIC.OST_TitleBlocks)
+        titleblock._values[defs[BIP.SYMBOL_FAMILY_NAME_PARAM]] = "Titleblock"
+        titleblock._values[defs[BIP.ALL_MODEL_TYPE_NAME]] = titleblock.Name
+    model.titleblock = titleblock.Id
+    vp_types = []
+    for name in ("Title w Line", "No Title", "Title only"):
+        vp_type = DB.ElementType(doc, name)
+        vp_type._values[defs[BIP.VIEWPORT_ATTR_SHOW_LABEL]] = 1
+        vp_type._values[defs[BIP.ALL_MODEL_TYPE_NAME]] = name
+        vp_types.append(vp_type)
+    for i in range(sheets):
+        sheet = DB.ViewSheet(doc, "Sheet {:04d}".format(i), "A{:04d}".format(i))
+        sheet._values[defs[BIP.SHEET_NUMBER]] = sheet.SheetNumber
+        model.sheets.append(sheet)
+        if i < len(model.views):
+            DB.Viewport(doc, vp_types[i % len(vp_types)].Name, sheet.Id, model.views[i].Id)
+
+    # view filters
+    for i in range(filters):
+        DB.ParameterFilterElement(doc, "Filter {:03d}".format(i), [DB.ElementId(MODEL_CATEGORIES[i % 3])])
+
+    # rooms with boundaries of 4 to 200 segments
+    for i in range(rooms):
+        origin = DB.XYZ((i % 50) * 40.0, (i // 50) * 40.0, 0)
+        segments = random.choice([4, 6, 8, 12, 24, 48, 96, 200])
+        loop = _room_loop(origin, 20.0 + i % 7, 15.0 + i % 5, segments)
+        room = DB.Room(doc, "Room {:04d}".format(i), [loop], origin + DB.XYZ(5, 5, 0))
+        room._values[defs[BIP.ROOM_NAME]] = random.choice(["Office", "Meeting", "WC", "Store", "Corridor"])
+        room._values[defs[BIP.ROOM_AREA]] = (20.0 + i % 7) * (15.0 + i % 5)
+        room._values[defs[BIP.ROOM_HEIGHT]] = 3.0
+        model.rooms.append(room)
+    return model
+
+
+def shuffled_loop(curves, seed=1):
+    # the curves of a loop in random order, half of them reversed
+    rng = random.Random(seed)
+    out = [c.CreateReversed() if rng.random() < 0.5 else c for c in curves]
+    rng.shuffle(out)
+    return out
+
+
+def ring_points(n, radius=10.0):
+    return [DB.XYZ(radius * math.cos(2 * math.pi * k / n), radius * math.sin(2 * math.pi * k / n), 0)
+            for k in range(n)]
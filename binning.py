@@ -0,0 +1,133 @@
+"""Classes of numeric values: equal-interval, quantile and Jenks natural breaks.
+
+Breaks are the ascending upper bounds of every class but the last, a value
+equal to a break belongs to the class below it.
+"""
+
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    # IronPython has no numpy, the classes are computed in pure Python
+    np = None
+
+# Jenks breaks are searched on at most this many evenly spaced sorted values
+JENKS_SAMPLE_SIZE = 256
+
+
+def _sorted(values):
+    if np is not None:
+        return np.sort(np.asarray(values, dtype=float)).tolist()
+    return sorted(float(v) for v in values)
+
+
+def _distinct_breaks(breaks, top):
+    # ascending breaks without duplicates, or the top value which would leave the last class empty
+    result = []
+    for b in breaks:
+        if b < top and (not result or b > result[-1]):
+            result.append(b)
+    return result
+
+
+def equal_interval(values, n):
+    if not values or n < 2:
+        return []
+    low, high = min(values), max(values)
+    step = (high - low) / float(n)
+    return _distinct_breaks([low + i * step for i in range(1, n)], high)
+
+
+def quantile(values, n):
+    # each class takes about the same number of values
+    if not values or n < 2:
+        return []
+    s = _sorted(values)
+    m = len(s)
+    return _distinct_breaks([s[max((i * m) // n - 1, 0)] for i in range(1, n)], s[-1])
+
+
+def _sample(s, size):
+    if len(s) <= size:
+        return s
+    step = (len(s) - 1) / float(size - 1)
+    return [s[int(round(i * step))] for i in range(size)]
+
+
+def jenks(values, n):
+    # natural breaks: classes with the least sum of squared deviations from their means,
+    # by Fisher's dynamic programming over a sample of the sorted values
+    if not values or n < 2:
+        return []
+    x = _sample(_sorted(values), JENKS_SAMPLE_SIZE)
+    m = len(x)
+    n = min(n, m)
+    sums = [0.0]
+    squares = [0.0]
+    for v in x:
+        sums.append(sums[-1] + v)
+        squares.append(squares[-1] + v * v)
+
+    def ssd(i, j):
+        # sum of squared deviations of x[i..j]
+        s = sums[j + 1] - sums[i]
+        return squares[j + 1] - squares[i] - s * s / (j - i + 1)
+
+    # cost[j] of splitting x[0..j] into the classes so far, first[c][j] the first value of the last class
+    cost = [ssd(0, j) for j in range(m)]
+    first = []
+    for c in range(1, n):
+        new_cost = [float("inf")] * m
+        starts = [0] * m
+        for j in range(c, m):
+            for i in range(c, j + 1):
+                candidate = cost[i - 1] + ssd(i, j)
+                if candidate < new_cost[j]:
+                    new_cost[j] = candidate
+                    starts[j] = i
+        cost = new_cost
+        first.append(starts)
+    breaks = []
+    j = m - 1
+    for starts in reversed(first):
+        i = starts[j]
+        breaks.append(x[i - 1])
+        j = i - 1
+    return _distinct_breaks(reversed(breaks), x[-1])
+
+
+METHODS = {"equal_interval": equal_interval, "quantile": quantile, "jenks": jenks}
+
+
+def assign(values, breaks):
+    # the class index of every value, None for missing values
+    present = [i for i, v in enumerate(values) if v is not None]
+    classes = [None] * len(values)
+    if np is not None:
+        indices = np.searchsorted(np.asarray(breaks, dtype=float),
+                                  np.asarray([values[i] for i in present], dtype=float), side="left")
+        for i, c in zip(present, indices.tolist()):
+            classes[i] = c
+    else:
+        for i in present:
+            classes[i] = bisect_left(breaks, values[i])
+    return classes
+
+
+def classify(values, n, method="quantile"):
+    # (class index of every value, breaks) for n classes of the values, missing values are None
+    present = [v for v in values if v is not None]
+    breaks = METHODS[method](present, n)
+    return assign(values, breaks), breaks
+
+
+def class_ranges(values, classes, count):
+    # (lowest, highest) value in each of the count classes, None for a class without values
+    ranges = [None] * count
+    for v, c in zip(values, classes):
+        if c is None:
+            continue
+        low_high = ranges[c]
+        ranges[c] = (v, v) if low_high is None else (min(low_high[0], v), max(low_high[1], v))
+    return ranges
@@ -0,0 +1,65 @@
+"""Model categories of a document and their localized labels"""
+
+from pyrevit import revit, DB, HOST_APP
+from pychilizer.doccache import get_doc_cache
+import System
+
+BIC = DB.BuiltInCategory
+
+_LABELS = {}
+
+# Category.BuiltInCategory is only available from Revit 2023
+if HOST_APP.is_newer_than(2022):
+    def category_bic(category):
+        return category.BuiltInCategory
+else:
+    def category_bic(category):
+        return System.Enum.ToObject(BIC, category.Id.IntegerValue)
+
+
+def builtin_label(bip_or_bic):
+    # language-specific label, looked up once per session
+    label = _LABELS.get(bip_or_bic)
+    if label is None:
+        label = DB.LabelUtils.GetLabelFor(bip_or_bic)
+        _LABELS[bip_or_bic] = label
+    return label
+
+
+class CategoryCatalog(object):
+    """Model BuiltInCategories of a document, mapped both ways to their labels"""
+
+    def __init__(self, doc):
+        self.bics = []
+        self.label_to_bic = {}
+        self.bic_to_label = {}
+        for category in doc.Settings.Categories:
+            if category.CategoryType != DB.CategoryType.Model or category.Id.IntegerValue >= 0:
+                continue
+            bic = category_bic(category)
+            if bic == BIC.INVALID:
+                continue
+            label = builtin_label(bic)
+            self.bics.append(bic)
+            self.label_to_bic[label] = bic
+            self.bic_to_label[bic] = label
+
+    def bic(self, label):
+        return self.label_to_bic[label]
+
+    def label(self, bic):
+        return self.bic_to_label.get(bic) or builtin_label(bic)
+
+    def labels(self):
+        return list(self.label_to_bic)
+
+    # no element ids are needed to patch the catalog
+    element_classes = ()
+
+    def document_changed(self, added, deleted, modified):
+        # built-in model categories do not change with the model
+        return True
+
+
+def get_category_catalog(doc=revit.doc):
+    return get_doc_cache(doc).get("categories", CategoryCatalog)
@@ -1,10 +1,21 @@
 from collections import defaultdict
 from pyrevit import HOST_APP
-from pyrevit import forms
 from pyrevit import revit, DB
-from pyrevit import script
+from pyrevit.framework import List
 import random
+import hashlib
 from pychilizer import database
+from pychilizer import categories
+from pychilizer import resources
+from pychilizer import palette
+from pychilizer import binning
+from pychilizer import params
+from pychilizer import configcache
+from pychilizer import rules
+from pychilizer import naming
+from pychilizer.dbquery import Query
+from pychilizer.doccache import get_doc_cache
+from pychilizer import lazymodule
 import colorsys
 
 
@@ -13,38 +24,11 @@ import colorsys
 
 def basic_colours():
     # colour presets - short colours list (14 colours)
-    basic_colours = [
-        "#40DFFF",
-        "#803ABA",
-        "#E6B637",
-        "#A8DA84"
-        "#8337E6",
-        "#EBE70E",
-        "#D037E6",
-        "#074FE0",  # blue
-        "#03A64A",
-        "#662400",
-        "#FF6B1A",
-        "#FF4858",
-        "#747F7F",
-        "#919151"
-    ]
-
-    return basic_colours
+    return list(palette.BASIC)
 
 
 def rainbow():
-    dark = "#42371E"
-    red = "#F10800"
-    orange = "#F27405"
-    yellow = "#FFF14E"
-    green = "#016B31"
-    pink = "#F587FF"
-    blue = "#6DDEF0"
-    violet = "#550580"
-    cyan = "#40DFFF"
-    rainbow_colours = [dark, red, orange, yellow, green, blue, cyan, violet, pink]
-    return rainbow_colours
+    return list(palette.RAINBOW)
 
 
 def hex_to_rgb(hex):
@@ -123,21 +107,15 @@ def random_colour_hsv(n):
     return rgb_out
 
 
-def get_colours(n):
-    if n < 14:
-        colours = basic_colours()
+def get_colours(n, seed=None):
+    # n colours of the default preset, shuffled so that neighbouring keys get different colours
+    # the shuffle is random unless a seed is given
+    if seed is None:
+        rgbs = palette.palette(n)
+        random.shuffle(rgbs)
     else:
-        colours = rainbow()
-    col_dict = polylinear_gradient(colours, n)
-    chop_col_list = col_dict["hex"][0:n]
-    # gradient method
-    revit_colours = [revit_colour(h) for h in chop_col_list]
-    # random method
-    # revit_colours = colorize.random_colour_hsv(len(types_dict))
-
-    for x in range(10):
-        random.shuffle(revit_colours)
-    return revit_colours
+        rgbs = palette.palette(n, seed=seed)
+    return [interned_colour(rgb) for rgb in rgbs]
 
 
 override_options = ["Projection Line Colour", "Projection Surface Colour", "Cut Line Colour", "Cut Pattern Colour"]
@@ -145,36 +123,58 @@ default_override_options = ["Projection Surface Colour", "Cut Pattern Colour"]
 OVERRIDES_CONFIG_OPTION_NAME = "overrides"
 CATEGORIES_CONFIG_OPTION_NAME = "colorize_categories"
 
-class ChosenItem(forms.TemplateListItem):
-    """Wrapper class for chosen item"""
-    @property
-    def name(self):
-        return str(self.item)
+_CHOSEN_ITEM_CLASS = []
+
+
+def get_chosen_item_class():
+    # the ChosenItem class, defined on first use as it subclasses forms.TemplateListItem
+    # and pyrevit.forms is slow to import
+    if not _CHOSEN_ITEM_CLASS:
+        from pyrevit import forms
+
+        class ChosenItem(forms.TemplateListItem):
+            """Wrapper class for chosen item"""
+
+            @property
+            def name(self):
+                return str(self.item)
+
+        _CHOSEN_ITEM_CLASS.append(ChosenItem)
+    return _CHOSEN_ITEM_CLASS[0]
 
 
 def get_config(config_set, option_name, default_options):
-    # get the config values
+    # get the config values, or the defaults if there are none; the defaults are not written to the config
     prev_choice = config_set.get_option(option_name, [])
     if not prev_choice:
-        save_config([x for x in default_options], option_name,config_set)
-        prev_choice = config_set.get_option(option_name, [])
+        prev_choice = [x for x in default_options]
     return prev_choice
 
-# categories_config = script.get_config(colorize.CATEGORIES_CONFIG_OPTION_NAME) #get colorize_categories config - to store fav categories
+
+def _known_labels(labels, doc):
+    # labels of categories in the document, labels saved in another language or version are dropped
+    known = set(categories.get_category_catalog(doc).labels())
+    return [label for label in labels if label in known]
+
 
 def get_categories_config(doc):
     # get the category language-specific labels from config and return a dictionary {Label:BIC}
-    categories_config = script.get_config(CATEGORIES_CONFIG_OPTION_NAME)  # get colorize_categories config
+    categories_config = configcache.get_section(CATEGORIES_CONFIG_OPTION_NAME)  # get colorize_categories config
     default_categories_names = database.frequent_category_labels()
-    categories_names_list= get_config(categories_config, CATEGORIES_CONFIG_OPTION_NAME, default_categories_names)
+    categories_names_list = _known_labels(
+        get_config(categories_config, CATEGORIES_CONFIG_OPTION_NAME, default_categories_names), doc)
+    if not categories_names_list:
+        categories_names_list = _known_labels(default_categories_names, doc)
     return database.category_labels_to_bic(categories_names_list, doc)
 
 
-
 def save_config(chosen, option_name, config):
-    """Save given list of overrides"""
+    """Save given list of overrides, the config file is only written if it changed"""
+    chosen = [x for x in chosen]
+    if config.get_option(option_name, None) == chosen:
+        return
     config.set_option(option_name, chosen)
-    # script.save_config()
+    configcache.save()
 
 
 def load_configs(config, option_name,default_option):
@@ -187,7 +187,9 @@ def load_configs(config, option_name,default_option):
 
 def config_overrides(config, option_name):
     """Ask for users choice of overrides"""
+    from pyrevit import forms
     prev_ovrds = load_configs(config, option_name, default_override_options)
+    ChosenItem = get_chosen_item_class()
     opts = [ChosenItem(x, checked=x in prev_ovrds) for x in override_options]
     overrides = forms.SelectFromList.show(
         sorted(opts),
@@ -202,10 +204,12 @@ def config_overrides(config, option_name):
 
 def config_category_overrides(doc):
     """Ask for favourite categories"""
-    # categories_config = get_categories_config(doc)
-    categories_config = script.get_config(CATEGORIES_CONFIG_OPTION_NAME)
+    from pyrevit import forms
+    categories_config = configcache.get_section(CATEGORIES_CONFIG_OPTION_NAME)
     prev_cat_overrides = load_configs(categories_config, CATEGORIES_CONFIG_OPTION_NAME, database.frequent_category_labels())
-    category_options = [ChosenItem(x, checked=x in prev_cat_overrides) for x in database.model_categories_dict(doc)]
+    ChosenItem = get_chosen_item_class()
+    category_options = [ChosenItem(x, checked=x in prev_cat_overrides)
+                        for x in categories.get_category_catalog(doc).labels()]
     category_selection = forms.SelectFromList.show(
         sorted(category_options, key=lambda x:x.name),
         title="Frequent Categories List",
@@ -219,7 +223,7 @@ def config_category_overrides(doc):
 def set_colour_overrides_by_option(overrides_option, colour, doc):
 
     override = DB.OverrideGraphicSettings()
-    solid_fill_pat_id = database.get_solid_fill_pat(doc).Id
+    solid_fill_pat_id = resources.get_resources(doc).solid_fill_pattern_id()
     if "Projection Line Colour" in overrides_option:
         override.SetProjectionLineColor(colour)
     if "Cut Line Colour" in overrides_option:
@@ -231,3 +235,468 @@ def set_colour_overrides_by_option(overrides_option, colour, doc):
         override.SetCutForegroundPatternColor(colour)
         override.SetCutForegroundPatternId(solid_fill_pat_id)
     return override
+
+
+# one DB.Color per rgb value, shared by every override that uses it; treat them as read-only
+_COLOURS = {}
+
+
+def colour_rgb(colour):
+    # (r, g, b) of a "#RRGGBB" string, an rgb sequence or a DB.Color
+    if isinstance(colour, str):
+        return tuple(hex_to_rgb(colour))
+    if isinstance(colour, DB.Color):
+        return (colour.Red, colour.Green, colour.Blue)
+    return tuple(int(v) for v in colour)
+
+
+def interned_colour(colour):
+    rgb = colour_rgb(colour)
+    revit_clr = _COLOURS.get(rgb)
+    if revit_clr is None:
+        revit_clr = DB.Color(rgb[0], rgb[1], rgb[2])
+        _COLOURS[rgb] = revit_clr
+    return revit_clr
+
+
+class OverridePool(object):
+    """One OverrideGraphicSettings per distinct (colour, overrides option set) of a document"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._overrides = {}
+
+    def get(self, colour, overrides_option):
+        key = (colour_rgb(colour), frozenset(overrides_option))
+        override = self._overrides.get(key)
+        if override is None:
+            override = set_colour_overrides_by_option(overrides_option, interned_colour(colour), self.doc)
+            self._overrides[key] = override
+        return override
+
+
+def group_by_key(element_keys):
+    # {key: [element ids]} from an {element or element id: key} dictionary or (element, key) pairs
+    if isinstance(element_keys, dict):
+        element_keys = element_keys.items()
+    groups = defaultdict(list)
+    for el, key in element_keys:
+        groups[key].append(el if isinstance(el, DB.ElementId) else el.Id)
+    return groups
+
+
+def colorize_elements(view, element_keys, colours=None, overrides_option=None, doc=revit.doc):
+    # override the colour of each element in the view by its key, in one transaction
+    # colours maps each key to a colour, keys without one get a palette colour in sorted key order
+    # returns the {key: colour} dictionary that was applied
+    groups = group_by_key(element_keys)
+    if overrides_option is None:
+        overrides_option = default_override_options
+    colours = dict(colours or {})
+    missing = sorted(key for key in groups if key not in colours)
+    if missing:
+        colours.update(zip(missing, get_colours(len(missing))))
+    pool = OverridePool(doc)
+    with database.ensure_transaction("Colorize", doc):
+        for key, el_ids in groups.items():
+            override = pool.get(colours[key], overrides_option)
+            for el_id in el_ids:
+                view.SetElementOverrides(el_id, override)
+    return colours
+
+
+COLOUR_MAP_CONFIG_SECTION = "colorize_colour_maps"
+# palette sizes for stable colours, the first one at least twice the number of keys is used
+STABLE_PALETTE_SIZES = (64, 256, 1024, 4096)
+# all the sizes are picked from the same rgb grid, so each one is a prefix of the larger ones
+# and colours already given keep their place in the palette when the map grows
+STABLE_GRID_LEVELS = 24
+
+# palette size: (colours, set of them, smallest OKLab distance between two of them)
+_STABLE_PALETTES = {}
+
+
+def key_text(key):
+    # keys are stored in the config as text
+    return key if isinstance(key, str) else str(key)
+
+
+def stable_hash(text):
+    # same value in every session and interpreter, unlike hash()
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _stable_palette(size):
+    entry = _STABLE_PALETTES.get(size)
+    if entry is None:
+        colours = palette.distinct(size, levels=STABLE_GRID_LEVELS)
+        labs = [palette.oklab(rgb) for rgb in colours]
+        # each max-min pick is at most as far from the ones before it as the previous pick,
+        # so the last one is at the smallest distance of the palette
+        spacing = min(palette.distance(labs[-1], lab) for lab in labs[:-1]) if len(labs) > 1 else float("inf")
+        entry = (colours, set(colours), spacing)
+        _STABLE_PALETTES[size] = entry
+    return entry
+
+
+class ColourMap(object):
+    """Key to rgb colour assignments that stay the same between runs.
+
+    A new key starts at the palette colour picked by the hash of the key and
+    takes the next one not yet given to another key. Colours of the palette
+    are all apart by its smallest spacing; colours loaded from elsewhere are
+    compared in OKLab, and a candidate closer to one of them than that spacing
+    is passed over. Keys only get a close colour once no free one is left.
+    """
+
+    def __init__(self, colours=None):
+        self.colours = dict(colours or {})
+        self._used = set(self.colours.values())
+        self._foreign = None
+        self.changed = False
+
+    def _palette(self):
+        wanted = 2 * (len(self.colours) + 1)
+        size = next((s for s in STABLE_PALETTE_SIZES if s >= wanted), STABLE_PALETTE_SIZES[-1])
+        return _stable_palette(size)
+
+    def _foreign_labs(self, members):
+        # OKLab coordinates of the used colours that are not in the palette, kept while the palette is the same
+        if self._foreign is None or self._foreign[0] is not members:
+            self._foreign = (members, [palette.oklab(rgb) for rgb in self._used if rgb not in members])
+        return self._foreign[1]
+
+    def colour(self, key):
+        text = key_text(key)
+        rgb = self.colours.get(text)
+        if rgb is None:
+            colours, members, spacing = self._palette()
+            foreign = self._foreign_labs(members)
+            start = stable_hash(text) % len(colours)
+            rgb = None
+            closest = None
+            for step in range(len(colours)):
+                candidate = colours[(start + step) % len(colours)]
+                if candidate in self._used:
+                    continue
+                if not foreign:
+                    rgb = candidate
+                    break
+                lab = palette.oklab(candidate)
+                nearest = min(palette.distance(lab, other) for other in foreign)
+                if nearest >= spacing:
+                    rgb = candidate
+                    break
+                if closest is None or nearest > closest[0]:
+                    closest = (nearest, candidate)
+            if rgb is None:
+                rgb = closest[1] if closest else colours[start]
+            self.colours[text] = rgb
+            self._used.add(rgb)
+            self.changed = True
+        return rgb
+
+    def assign(self, keys):
+        # {key: rgb}, new keys are assigned in sorted order so that a run does not depend on element order
+        for key in sorted(keys, key=key_text):
+            self.colour(key)
+        return dict((key, self.colours[key_text(key)]) for key in keys)
+
+
+def _colour_map_option(doc):
+    # one option per document, named by its path so that the option name is a valid config key
+    return "map_" + hashlib.md5((doc.PathName or doc.Title).encode("utf-8")).hexdigest()[:16]
+
+
+def load_colour_map(doc=revit.doc):
+    config = configcache.get_section(COLOUR_MAP_CONFIG_SECTION)
+    stored = config.get_option(_colour_map_option(doc), {}) or {}
+    return ColourMap(dict((text, tuple(hex_to_rgb(hex))) for text, hex in stored.items()))
+
+
+def save_colour_map(colour_map, doc=revit.doc):
+    # write the map back only if a key was added since it was loaded
+    if not colour_map.changed:
+        return
+    config = configcache.get_section(COLOUR_MAP_CONFIG_SECTION)
+    configcache.set_options(config, {_colour_map_option(doc): dict(
+        (text, rgb_to_hex(rgb)) for text, rgb in colour_map.colours.items())})
+    colour_map.changed = False
+
+
+# readers of the colour each override option sets
+_OVERRIDE_COLOURS = {
+    "Projection Line Colour": lambda override: override.ProjectionLineColor,
+    "Cut Line Colour": lambda override: override.CutLineColor,
+    "Projection Surface Colour": lambda override: override.SurfaceForegroundPatternColor,
+    "Cut Pattern Colour": lambda override: override.CutForegroundPatternColor,
+}
+
+
+def override_rgb(override, overrides_option):
+    # rgb the override sets for the first of the options, None if it sets none
+    for option in overrides_option:
+        colour = _OVERRIDE_COLOURS[option](override)
+        if colour is None or not colour.IsValid:
+            return None
+        return colour_rgb(colour)
+
+
+class ColorizeState(object):
+    """Colours this session applied to the elements of each view, as
+    {view id: (overrides option set, {element id: rgb}, confirmed)}.
+
+    A run in its own transaction is recorded after the commit and confirmed.
+    A run inside a transaction of the caller is recorded unconfirmed, since it
+    is lost if that transaction is rolled back; the elements it would skip are
+    then checked against the overrides in the view first. A view that is
+    modified or deleted by a committed change is forgotten, so the next
+    recolorize of it repaints every element.
+    """
+
+    # only the added and modified views are passed to document_changed
+    element_classes = (DB.View,)
+
+    def __init__(self, doc):
+        self.views = {}
+
+    def applied(self, view, overrides_option):
+        # ({element id: rgb}, confirmed) of the last run on the view with the same options
+        state = self.views.get(view.Id.IntegerValue)
+        if state is None or state[0] != frozenset(overrides_option):
+            return {}, True
+        return state[1], state[2]
+
+    def record(self, view, overrides_option, applied, confirmed):
+        self.views[view.Id.IntegerValue] = (frozenset(overrides_option), applied, confirmed)
+
+    def document_changed(self, added, deleted, modified):
+        for el_id in deleted + modified:
+            self.views.pop(el_id.IntegerValue, None)
+        for el_id in deleted:
+            for state in self.views.values():
+                state[1].pop(el_id.IntegerValue, None)
+        return True
+
+
+def recolorize(view, element_keys, overrides_option=None, doc=revit.doc):
+    # colour the elements of the view by key with the stable colours of the document
+    # only elements whose colour differs from the last run on the view are overridden, and
+    # elements coloured then but not given now are reset
+    # returns the {key: rgb} dictionary that was applied
+    groups = group_by_key(element_keys)
+    if overrides_option is None:
+        overrides_option = default_override_options
+    colour_map = load_colour_map(doc)
+    colours = colour_map.assign(groups)
+    save_colour_map(colour_map, doc)
+    state = get_doc_cache(doc).get("colorize_state", ColorizeState)
+    previous, confirmed = state.applied(view, overrides_option)
+
+    def still_applied(el_id, rgb):
+        return confirmed or override_rgb(view.GetElementOverrides(el_id), overrides_option) == rgb
+
+    in_caller_transaction = doc.IsModifiable
+    applied = {}
+    pool = OverridePool(doc)
+    with database.ensure_transaction("Recolorize", doc):
+        for key, el_ids in groups.items():
+            rgb = colours[key]
+            override = None
+            for el_id in el_ids:
+                el_int = el_id.IntegerValue
+                applied[el_int] = rgb
+                if previous.get(el_int) != rgb or not still_applied(el_id, rgb):
+                    if override is None:
+                        override = pool.get(rgb, overrides_option)
+                    view.SetElementOverrides(el_id, override)
+        cleared = None
+        for el_int, rgb in previous.items():
+            el_id = DB.ElementId(el_int)
+            if el_int not in applied and still_applied(el_id, rgb):
+                cleared = cleared or DB.OverrideGraphicSettings()
+                view.SetElementOverrides(el_id, cleared)
+    # recorded after the commit, which modifies the view and would drop it
+    state.record(view, overrides_option, applied, not in_caller_transaction)
+    return colours
+
+
+# low to high values, from the rainbow preset
+NUMERIC_RAMP = ["#074FE0", "#6DDEF0", "#FFF14E", "#F27405", "#F10800"]
+
+
+def numeric_ramp(n, stops=None):
+    # n rgb colours along the hex stops, exactly n long unlike polylinear_gradient
+    stops = stops or NUMERIC_RAMP
+    return palette.gradient([hex_to_rgb(hex) for hex in stops], n)
+
+
+def colorize_by_value(view, elements, name_or_bip, classes=7, method="quantile", stops=None,
+                      overrides_option=None, doc=revit.doc):
+    # colour the elements by a numeric parameter, binned into classes along a colour ramp
+    # method is one of binning.METHODS, elements without a value are left as they are
+    # one override per class, returns [(lowest value, highest value, rgb)] of each class with elements
+    values = params.extract_parameters(elements, [name_or_bip]).columns[name_or_bip]
+    values = [v if isinstance(v, (int, float)) else None for v in values]
+    bins, breaks = binning.classify(values, classes, method)
+    colours = dict(enumerate(numeric_ramp(len(breaks) + 1, stops)))
+    element_keys = [(el, b) for el, b in zip(elements, bins) if b is not None]
+    colorize_elements(view, element_keys, colours, overrides_option, doc)
+    ranges = binning.class_ranges(values, bins, len(colours))
+    return [(low_high[0], low_high[1], colours[b]) for b, low_high in enumerate(ranges) if low_high]
+
+
+# filters are used while every value colours at least this many elements on average
+MIN_ELEMENTS_PER_FILTER = 20
+# views get slow to regenerate with many filters, past this many values elements are overridden instead
+MAX_COLOUR_FILTERS = 100
+COLOUR_FILTER_PREFIX = "Colorize"
+# characters Revit does not accept in filter names
+_FORBIDDEN_NAME_CHARS = set("\\:{}[]|;<>?`~")
+
+
+def colour_mode(element_count, value_count):
+    # "filters" when few values colour many elements, "elements" for per-element overrides
+    if 0 < value_count <= MAX_COLOUR_FILTERS and element_count >= MIN_ELEMENTS_PER_FILTER * value_count:
+        return "filters"
+    return "elements"
+
+
+def _value_key(value):
+    # hashable value of a parameter, element ids are kept as integers
+    return value.IntegerValue if isinstance(value, DB.ElementId) else value
+
+
+def _value_text(value, storage_type, doc):
+    if storage_type == DB.StorageType.ElementId:
+        el = doc.GetElement(DB.ElementId(value))
+        return database.get_name(el) if el is not None else str(value)
+    if storage_type == DB.StorageType.Double:
+        return "{:g}".format(value)
+    return str(value)
+
+
+def _parameter_label(name_or_bip):
+    if isinstance(name_or_bip, DB.BuiltInParameter):
+        return database.get_builtin_label(name_or_bip)
+    return name_or_bip
+
+
+def colour_filter_name(label, value_text):
+    name = "{} - {} - {}".format(COLOUR_FILTER_PREFIX, label, value_text)
+    return "".join("_" if c in _FORBIDDEN_NAME_CHARS else c for c in name)
+
+
+def _filter_target(view, doc):
+    # filters of a view controlled by a template are set on the template
+    if view.ViewTemplateId != DB.ElementId.InvalidElementId:
+        return doc.GetElement(view.ViewTemplateId)
+    return view
+
+
+def covers_view(view, elements, doc=revit.doc):
+    # True if the elements are every element of their categories shown in the view, so view
+    # filters on those categories colour nothing else; never for a view controlled by a template,
+    # as the filters would go on the template and colour the other views using it
+    if view.ViewTemplateId != DB.ElementId.InvalidElementId:
+        return False
+    element_ids = set(el.Id.IntegerValue for el in elements)
+    cat_ids = set(el.Category.Id.IntegerValue for el in elements if el.Category is not None)
+    if not cat_ids:
+        return False
+    categories_filter = DB.ElementMulticategoryFilter(List[DB.ElementId](DB.ElementId(i) for i in cat_ids))
+    shown = Query(doc, view.Id).where(categories_filter).instances_only().ids()
+    return all(el_id.IntegerValue in element_ids for el_id in shown)
+
+
+def _parameter_values(elements, name_or_bip):
+    # ({element id: value key} of the elements with a value, the parameter read, or None if none has a value)
+    values = params.extract_parameters(elements, [name_or_bip]).columns[name_or_bip]
+    element_keys = {}
+    parameter = None
+    for el, value in zip(elements, values):
+        if value is None or value == "":
+            continue
+        element_keys[el.Id] = _value_key(value)
+        if parameter is None:
+            parameter = params.lookup_parameter(el, name_or_bip)
+    return element_keys, parameter
+
+
+def colorize_with_filters(view, elements, name_or_bip, overrides_option=None, doc=revit.doc):
+    # colour the elements by parameter value with one view filter per distinct value
+    # the filters apply to every element of the elements' categories in the view, so the view is
+    # coloured by the parameter as a whole; filters are reused and updated on later runs, and the
+    # filters of values no longer found are removed from the view
+    # returns the {value: rgb} dictionary that was applied
+    element_keys, parameter = _parameter_values(elements, name_or_bip)
+    return _apply_colour_filters(view, elements, name_or_bip, element_keys, parameter, overrides_option, doc)
+
+
+def _apply_colour_filters(view, elements, name_or_bip, element_keys, parameter, overrides_option, doc):
+    if overrides_option is None:
+        overrides_option = default_override_options
+    if parameter is None:
+        return {}
+    values = set(element_keys.values())
+    colour_map = load_colour_map(doc)
+    colours = colour_map.assign(values)
+    save_colour_map(colour_map, doc)
+    bics = sorted(set(el.Category.Id.IntegerValue for el in elements if el.Category is not None))
+    storage_type = parameter.StorageType
+    param_id = parameter.Id
+    label = _parameter_label(name_or_bip)
+    allocator = naming.NameAllocator(set(), naming.next_copy_name)
+    specs = []
+    filter_values = {}
+    for value in sorted(values):
+        rule_value = DB.ElementId(value) if storage_type == DB.StorageType.ElementId else value
+        name = allocator.reserve(colour_filter_name(label, _value_text(value, storage_type, doc)))
+        element_filter = rules.parameter_filter([rules.equals_rule(param_id, storage_type, rule_value)])
+        specs.append((name, bics, element_filter))
+        filter_values[name] = value
+    target = _filter_target(view, doc)
+    pool = OverridePool(doc)
+    with database.ensure_transaction("Colorize Filters", doc):
+        filters = database.upsert_filters(specs, doc)
+        for name, filter in filters.items():
+            if not target.IsFilterApplied(filter.Id):
+                target.AddFilter(filter.Id)
+            target.SetFilterOverrides(filter.Id, pool.get(colours[filter_values[name]], overrides_option))
+        _remove_stale_filters(target, label, filters, doc)
+    return colours
+
+
+def _remove_stale_filters(target, label, filters, doc):
+    # take off the target the colour filters of the parameter from earlier runs that are not in filters
+    prefix = colour_filter_name(label, "")
+    current = set(filter.Id.IntegerValue for filter in filters.values())
+    for filter_id in list(target.GetFilters()):
+        if filter_id.IntegerValue in current:
+            continue
+        filter = doc.GetElement(filter_id)
+        if filter is not None and database.get_name(filter).startswith(prefix):
+            target.RemoveFilter(filter_id)
+
+
+def colorize_by_parameter(view, elements, name_or_bip, overrides_option=None, mode=None, doc=revit.doc):
+    # colour the elements by parameter value, with view filters or per-element overrides
+    # mode is "filters" or "elements"; "filters" colours every element of the categories in the view,
+    # so by default it is only picked when the elements cover the view (covers_view) and colour_mode
+    # finds enough elements per value
+    # per-element overrides go through recolorize, so a rerun only touches changed elements
+    # returns the {value: rgb} dictionary that was applied
+    element_keys, parameter = _parameter_values(elements, name_or_bip)
+    if mode is None:
+        mode = colour_mode(len(element_keys), len(set(element_keys.values())))
+        if mode == "filters" and not covers_view(view, elements, doc):
+            mode = "elements"
+    if mode == "filters":
+        return _apply_colour_filters(view, elements, name_or_bip, element_keys, parameter, overrides_option, doc)
+    return recolorize(view, element_keys, overrides_option, doc)
+
+
+# ChosenItem subclasses forms.TemplateListItem, it and the slow pyrevit modules are only imported when read
+lazymodule.lazy_attributes(__name__, ChosenItem=get_chosen_item_class,
+                           forms=lazymodule.importer("pyrevit.forms"),
+                           script=lazymodule.importer("pyrevit.script"))
@@ -0,0 +1,95 @@
+"""pyRevit config sections read once per session.
+
+Option values are kept after the first read, and the config file is only
+written when a value actually changes. If the config file is changed on disk,
+by another Revit session or by hand, the config is reloaded and every cached
+value is dropped.
+"""
+
+import os
+
+# section name: CachedSection
+_SECTIONS = {}
+# modification time of the config file when the cached values were read or last saved
+_FILE_STATE = {}
+
+
+def _user_config():
+    from pyrevit.userconfig import user_config
+    return user_config
+
+
+def _config_file_mtime():
+    path = getattr(_user_config(), "config_file", None)
+    if not path or not os.path.exists(path):
+        return None
+    return os.path.getmtime(path)
+
+
+def _check_file():
+    # drop the cached values if the config file changed since they were read
+    mtime = _config_file_mtime()
+    if "mtime" in _FILE_STATE and mtime != _FILE_STATE["mtime"]:
+        reload_config = getattr(_user_config(), "reload", None)
+        if reload_config is not None:
+            reload_config()
+        _SECTIONS.clear()
+    _FILE_STATE["mtime"] = mtime
+
+
+class CachedSection(object):
+    """A pyRevit config section with its option values kept after the first read"""
+
+    def __init__(self, name):
+        from pyrevit import script
+        self.name = name
+        self._section = script.get_config(name)
+        self._values = {}
+
+    def get_option(self, name, default_value=None):
+        if name not in self._values:
+            self._values[name] = self._section.get_option(name, None)
+        value = self._values[name]
+        return default_value if value is None else value
+
+    def set_option(self, name, value):
+        # returns True if the value changed and was set
+        if self.get_option(name) == value:
+            return False
+        value = list(value) if isinstance(value, (list, tuple)) else value
+        self._section.set_option(name, value)
+        self._values[name] = value
+        return True
+
+    def has_option(self, name):
+        return self.get_option(name) is not None
+
+
+def get_section(name):
+    _check_file()
+    section = _SECTIONS.get(name)
+    if section is None:
+        section = _SECTIONS[name] = CachedSection(name)
+    return section
+
+
+def save():
+    # write the config file, and keep the cached values as they are what was written
+    from pyrevit import script
+    script.save_config()
+    _FILE_STATE["mtime"] = _config_file_mtime()
+
+
+def set_options(section, options):
+    # set {option name: value} in the section and save, only if one of the values changed
+    changed = False
+    for name, value in options.items():
+        changed = section.set_option(name, value) or changed
+    if changed:
+        save()
+    return changed
+
+
+def clear():
+    _SECTIONS.clear()
+    _FILE_STATE.clear()
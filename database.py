@@ -1,13 +1,23 @@
 # -*- coding: utf-8 -*-
 
-from pyrevit import revit, DB, script, forms, HOST_APP, coreutils, PyRevitException
+from pyrevit import revit, DB, HOST_APP, PyRevitException
 from pyrevit.framework import List
-from collections import defaultdict
+from itertools import islice
 from pychilizer import units
+from pychilizer.doccache import get_doc_index
+from pychilizer import naming
+from pychilizer.naming import NameAllocator
+from pychilizer import params
+from pychilizer.params import get_shared_param_index
+from pychilizer import rules
+from pychilizer import templates
+from pychilizer import categories
+from pychilizer import resources
+from pychilizer.dbquery import Query
+from pychilizer import lazymodule
 from pyrevit.revit.db import query
 from Autodesk.Revit import Exceptions
 import clr
-import System
 
 
 
@@ -15,132 +25,83 @@ BIC = DB.BuiltInCategory
 
 def get_alphabetic_labels(nr):
     # get N letters A, B, C, etc or AA, AB, AC if N more than 26
-    alphabet = [chr(i) for i in range(65, 91)]
-    double_alphabet = []
-    for i in range(26):
-        c1 = alphabet[i]
-        for j in range(26):
-            c2 = alphabet[j]
-            l = c1 + c2
-            double_alphabet.append(l)
-    labels = []
-    if nr <= 26:
-        labels = alphabet[:nr]
-    elif nr > 26:
-        labels = double_alphabet[:nr]
-    return labels
+    return naming.fixed_width_labels(nr)
 
 
 def any_fill_type(doc=revit.doc):
     # get any Filled Region Type
-    return DB.FilteredElementCollector(doc).OfClass(DB.FilledRegionType).FirstElement()
+    return resources.get_resources(doc).filled_region_type()
 
 
 def invis_style(doc=revit.doc):
     # get invisible lines graphics style
-    for gs in DB.FilteredElementCollector(doc).OfClass(DB.GraphicsStyle):
-        # find style using the category Id
-        if gs.GraphicsStyleCategory.Id.IntegerValue == -2000064:
-            return gs
+    return resources.get_resources(doc).invisible_lines_style()
 
 
 def get_sheet(some_number, doc=revit.doc):
-    sheet_nr_filter = get_biparam_stringequals_filter({DB.BuiltInParameter.SHEET_NUMBER: str(some_number)})
-    found_sheet = DB.FilteredElementCollector(doc) \
-        .OfCategory(DB.BuiltInCategory.OST_Sheets) \
-        .WherePasses(sheet_nr_filter) \
-        .WhereElementIsNotElementType().ToElements()
-
-    return found_sheet
+    # sheets with the given number, looked up in the document index
+    return get_doc_index(doc).elements("sheet", str(some_number))
 
 
 def get_biparam_stringequals_filter(bip_paramvalue_dict):
     # copy of the pyrevit query def, updated to R2023
-    filters = []
-    for bip, fvalue in bip_paramvalue_dict.items():
-        bip_id = DB.ElementId(bip)
-        bip_valueprovider = DB.ParameterValueProvider(bip_id)
-        if HOST_APP.is_newer_than(2022):
-            bip_valuerule = DB.FilterStringRule(bip_valueprovider,
-                                                DB.FilterStringEquals(),
-                                                fvalue)
-        else:
-            bip_valuerule = DB.FilterStringRule(bip_valueprovider,
-                                                DB.FilterStringEquals(),
-                                                fvalue,
-                                                True)
-        filters.append(bip_valuerule)
+    if len(bip_paramvalue_dict) == 1:
+        bip, fvalue = list(bip_paramvalue_dict.items())[0]
+        return rules.string_filter(bip, fvalue)
+    filters = [rules.string_rule(bip, fvalue) for bip, fvalue in bip_paramvalue_dict.items()]
 
     if filters:
-        return DB.ElementParameterFilter(
-            List[DB.FilterRule](filters)
-        )
+        return rules.parameter_filter(filters)
     else:
         raise PyRevitException('Error creating filters.')
 
 
 def get_view(some_name, doc=revit.doc):
-    view_name_filter = get_biparam_stringequals_filter({DB.BuiltInParameter.VIEW_NAME: some_name})
-    found_view = DB.FilteredElementCollector(doc) \
-        .OfCategory(DB.BuiltInCategory.OST_Views) \
-        .WherePasses(view_name_filter) \
-        .WhereElementIsNotElementType().ToElements()
-
-    return found_view
+    # views with the given name, looked up in the document index
+    return get_doc_index(doc).elements("view", some_name)
 
 
 def get_fam_types(family_name, doc=revit.doc):
-    fam_bip_id = DB.ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM)
-    fam_bip_provider = DB.ParameterValueProvider(fam_bip_id)
-    if HOST_APP.is_newer_than(2022):
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name)
-    else:
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name, True)
-    fam_filter = DB.ElementParameterFilter(fam_filter_rule)
-
-    collector = DB.FilteredElementCollector(doc) \
-        .WherePasses(fam_filter) \
-        .WhereElementIsElementType()
-
-    return collector
+    return Query(doc) \
+        .where_param(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM, family_name) \
+        .types_only() \
+        .collector()
 
 
 def get_fam_any_type(family_name, doc=revit.doc):
-    fam_bip_id = DB.ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM)
-    fam_bip_provider = DB.ParameterValueProvider(fam_bip_id)
-    if HOST_APP.is_newer_than(2022):
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name)
-    else:
-        fam_filter_rule = DB.FilterStringRule(fam_bip_provider, DB.FilterStringEquals(), family_name, True)
-    fam_filter = DB.ElementParameterFilter(fam_filter_rule)
-
-    collector = DB.FilteredElementCollector(doc) \
-        .WherePasses(fam_filter) \
-        .WhereElementIsElementType() \
-        .FirstElement()
-
-    return collector
+    return Query(doc) \
+        .where_param(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM, family_name) \
+        .types_only() \
+        .first()
 
 
 def get_solid_fill_pat(doc=revit.doc):
     # get fill pattern element Solid Fill
     # updated to work in other languages
-    fill_pats = DB.FilteredElementCollector(doc).OfClass(DB.FillPatternElement)
-    solid_pat = [pat for pat in fill_pats if pat.GetFillPattern().IsSolidFill]
-    return solid_pat[0]
+    return resources.get_resources(doc).solid_fill_pattern()
 
 
 def param_set_by_cat(cat, doc=revit.doc):
     # get all project type parameters of a given category
     # can be used to gather parameters for UI selection
-    all_gm = DB.FilteredElementCollector(doc).OfCategory(cat).WhereElementIsElementType().ToElements()
-    parameter_set = []
-    for gm in all_gm:
-        params = gm.Parameters
-        for p in params:
-            if p not in parameter_set and p.IsReadOnly == False:
-                parameter_set.append(p)
-    return parameter_set
+    catalog = params.get_parameter_catalog(cat, doc)
+    return [info.parameter for info in catalog.parameters(params.TYPE) if not info.is_read_only]
+
+
+class _InOpenTransaction(object):
+    # stands in for a new transaction when the document already has one open
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+def ensure_transaction(name, doc=revit.doc):
+    # start a transaction, unless the caller already has one open
+    if doc.IsModifiable:
+        return _InOpenTransaction()
+    return revit.Transaction(name, doc=doc)
 
 
 def add_material_parameter(family_document, parameter_name, is_instance):
@@ -159,16 +120,41 @@ def add_material_parameter(family_document, parameter_name, is_instance):
 
 
 def create_sheet(sheet_num, sheet_name, titleblock, doc=revit.doc):
+    # create one sheet, a taken number is incremented until free with index lookups
+    # for many sheets use create_sheets, which takes a single snapshot of the numbers
+    index = get_doc_index(doc)
     sheet_num = str(sheet_num)
+    while index.contains("sheet", sheet_num):
+        sheet_num = naming.increment(sheet_num)
+    with ensure_transaction("Create Sheet", doc):
+        new_datasheet = DB.ViewSheet.Create(doc, titleblock)
+        new_datasheet.Name = sheet_name
+        new_datasheet.SheetNumber = sheet_num
+        index.note(new_datasheet)
+    return new_datasheet
 
-    new_datasheet = DB.ViewSheet.Create(doc, titleblock)
-    new_datasheet.Name = sheet_name
 
-    while get_sheet(sheet_num):
-        sheet_num = coreutils.increment_str(sheet_num, 1)
-    new_datasheet.SheetNumber = str(sheet_num)
+def sheet_number_allocator(doc=revit.doc):
+    # allocator of free sheet numbers, from a single snapshot of the existing ones
+    return NameAllocator(get_doc_index(doc).keys("sheet"))
 
-    return new_datasheet
+
+def create_sheets(specs, titleblock, doc=revit.doc):
+    # create a sheet for each (sheet number, sheet name) in specs
+    # taken numbers are incremented until free, all sheets are created in one transaction
+    index = get_doc_index(doc)
+    allocator = sheet_number_allocator(doc)
+    sheet_numbers = allocator.reserve_all([str(sheet_num) for sheet_num, sheet_name in specs])
+
+    new_sheets = []
+    with ensure_transaction("Create Sheets", doc):
+        for sheet_num, (_, sheet_name) in zip(sheet_numbers, specs):
+            new_datasheet = DB.ViewSheet.Create(doc, titleblock)
+            new_datasheet.Name = sheet_name
+            new_datasheet.SheetNumber = sheet_num
+            index.note(new_datasheet)
+            new_sheets.append(new_datasheet)
+    return new_sheets
 
 
 def set_anno_crop(v):
@@ -183,6 +169,11 @@ def apply_vt(v, vt):
     return
 
 
+def regenerate(doc=revit.doc):
+    # regenerate through one helper, so that regenerations can be counted when profiling
+    doc.Regenerate()
+
+
 def get_name(el):
     return DB.Element.Name.__get__(el)
 
@@ -226,21 +217,15 @@ def create_parallel_bbox(line, crop_elem, offset=300 / 304.8):
 
 
 def char_series(nr):
-    from string import ascii_uppercase
-    series = []
-    for i in range(0, nr):
-        series.append(ascii_uppercase[i])
-    return series
+    return list(islice(naming.alphabetic_labels(), nr))
 
 
 def char_i(i):
-    from string import ascii_uppercase
-    return ascii_uppercase[i]
+    return naming.alphabetic_label(i)
 
 
 def get_view_family_types(viewtype, doc):
-    return [vt for vt in DB.FilteredElementCollector(doc).OfClass(DB.ViewFamilyType) if
-            vt.ViewFamily == viewtype]
+    return resources.get_resources(doc).view_family_types(viewtype)
 
 
 def get_family_template_path():
@@ -255,142 +240,38 @@ def get_family_template_language():
 
 def fam_template_name_by_lang_and_cat(language, category_id):
     # matching the template to category Id in several languages
-    temp_dict_eng = defaultdict(lambda: None, {
-        -2001000: "\Metric Casework.rft",
-        -2000080: "\Metric Furniture.rft",
-        -2001040: "\Metric Electrical Equipment.rft",
-        -2001370: "\Metric Entourage.rft",
-        -2001100: "\Metric Furniture System.rft",
-        -2001120: "\Metric Lighting Fixture.rft",
-        -2001140: "\Metric Mechanical Equipment.rft",
-        -2001180: "\Metric Parking.rft",
-        -2001360: "\Metric Planting.rft",
-        -2001160: "\Metric Plumbing Fixture.rft",
-        -2001260: "\Metric Site.rft",
-        -2001350: "\Metric Specialty Equipment.rft",
-    })
-    temp_dict_eng_i = defaultdict(lambda: None, {
-        -2001000: "\Casework.rft",
-        -2000080: "\Furniture.rft",
-        -2001040: "\Electrical Equipment.rft",
-        -2001370: "\Entourage.rft",
-        -2001100: "\Furniture System.rft",
-        -2001120: "\Lighting Fixture.rft",
-        -2001140: "\Mechanical Equipment.rft",
-        -2001180: "\Parking.rft",
-        -2001360: "\Planting.rft",
-        -2001160: "\Plumbing Fixture.rft",
-        -2001260: "\Site.rft",
-        -2001350: "\Specialty Equipment.rft",
-    })
-    temp_dict_fra = defaultdict(lambda: None, {
-        -2001000: "\Meubles de rangement métriques.rft",
-        -2000080: "\Mobilier métrique.rft",
-        -2001040: "\Equipement électrique métrique.rft",
-        -2001370: "\Environnement métrique.rft",
-        -2001100: "\Système de mobilier métrique.rft",
-        -2001120: "\Luminaires métriques.rft",
-        -2001140: "\Equipement mécanique métrique.rft",
-        -2001180: "\Parking métrique.rft",
-        -2001360: "\Plantes métriques.rft",
-        -2001160: "\Installations de plomberie métriques.rft",
-        -2001260: "\Site métrique.rft",
-        -2001350: "\Equipement spécialisé métrique.rft",
-    })
-    temp_dict_deu = defaultdict(lambda: None, {
-        -2001040: "\Elektrogeräte.rft",
-        -2001120: "\Leuchten.rft",
-        -2001140: "\Mechanische Geräte.rft",
-        -2001360: "\Bepflanzung.rft",
-        -2001160: "\Sanitärinstallation.rft",
-    })
-
-    if language == "English":
-        return temp_dict_eng[category_id]
-    elif language == "English_I" or language == "English-Imperial":
-        return temp_dict_eng_i[category_id]
-    elif language == "French":
-        return temp_dict_fra[category_id]
-    elif language == "German":
-        return temp_dict_deu[category_id]
-    else:
-        return None
+    registry = templates.get_template_registry(get_family_template_path())
+    rel = registry.relative_path(language, templates.CATEGORY, category_id)
+    if rel is None:
+        rel = templates.CATEGORY_TEMPLATES.get(language, {}).get(category_id)
+    if rel:
+        return "\\" + rel
+    return None
 
 
 def get_generic_family_template_name():
     # get the name of the generic model template
-
-    ENG = "\Metric Generic Model.rft"
-    ENG_I = "\Generic Model.rft"
-    FRA = "\Modèle générique métrique.rft"
-    GER = "\Allgemeines Modell.rft"
-    ESP = "\Modelo genérico métrico.rft"
-    RUS = "\Метрическая система, типовая модель.rft"
-    CHN = "\基于两个标高的公制常规模型.rft"
-    ITA = "\Modello generico metrico.rft"
-    JPN = "\一般モデル(メートル単位).rft"
-    PLK = "\Model ogólny (metryczny).rft"
-    CSY = "\Obecný model.rft"
-    PTB = "\Modelo genérico métrico.rft"
-    KOR = "\미터법 일반 모델.rft"
-
     template_language = get_family_template_language()
-    if ("English_I") in template_language or ("English-I") in template_language:
-        return ENG_I
-    elif ("English") in template_language:
-        return ENG
-    elif ("French") in template_language:
-        return FRA
-    elif ("Spanish") in template_language:
-        return ESP
-    elif ("German") in template_language:
-        return GER
-    elif ("Russian") in template_language:
-        return RUS
-    elif ("Chinese") in template_language:
-        return CHN
-    elif ("Czech") in template_language:
-        return CSY
-    elif ("Italian") in template_language:
-        return ITA
-    elif ("Japanese") in template_language:
-        return JPN
-    elif ("Korean") in template_language:
-        return KOR
-    elif ("Polish") in template_language:
-        return PLK
-    elif ("Portuguese") in template_language:
-        return PTB
-    else:
-        return None
+    registry = templates.get_template_registry(get_family_template_path())
+    rel = registry.relative_path(template_language, templates.GENERIC, templates.GENERIC_MODEL_ID)
+    if rel is None:
+        rel = templates.known_templates(template_language).get((templates.GENERIC_MODEL_ID, templates.GENERIC))
+    if rel:
+        return "\\" + rel
+    return None
 
 
 
 def get_mass_template_path():
-    fam_template_folder = __revit__.Application.FamilyTemplatePath
-
-    ENG = "\Conceptual Mass\Metric Mass.rft"
-    FRA = "\Volume conceptuel\Volume métrique.rft"
-    GER = "\Entwurfskörper\Entwurfskörper.rft"
-    ESP = "\Masas conceptuales\Masa métrica.rft"
-    RUS = "\Концептуальные формы\Метрическая система, формообразующий элемент.rft"
-
-    if ("French") in fam_template_folder:
-        mass_temp_name = FRA
-    elif ("Spanish") in fam_template_folder:
-        mass_temp_name = ESP
-    elif ("German") in fam_template_folder:
-        mass_temp_name = GER
-    elif ("Russian") in fam_template_folder:
-        mass_temp_name = RUS
-    else:
-        mass_temp_name = ENG
-
-    mass_template_path = fam_template_folder + mass_temp_name
+    fam_template_folder = get_family_template_path()
+    registry = templates.get_template_registry(fam_template_folder)
+    mass_template_path = registry.path(get_family_template_language(), templates.MASS, templates.MASS_ID)
+    # the registry is cached until a language folder changes, the template in its subfolder may be gone since
     from os.path import isfile
-    if isfile(mass_template_path):
+    if mass_template_path and isfile(mass_template_path):
         return mass_template_path
     else:
+        from pyrevit import forms
         forms.alert(title="No Mass Template Found",
                     msg="There is no Mass Model Template in the default location. Can you point where to get it?",
                     ok=True)
@@ -401,29 +282,25 @@ def get_mass_template_path():
 
 def vt_name_match(vt_name, doc=revit.doc):
     # return a view template with a given name, None if not found
-    views = DB.FilteredElementCollector(doc).OfClass(DB.View)
-    vt_match = None
-    for v in views:
-        if v.IsTemplate and v.Name == vt_name:
-            vt_match = v.Name
-    return vt_match
+    if get_doc_index(doc).contains("view_template", vt_name):
+        return vt_name
+    return None
 
 
 def vp_name_match(vp_name, doc=revit.doc):
-    # return a view template with a given name, None if not found
-    views = DB.FilteredElementCollector(doc).OfClass(DB.Viewport)
-    # if no viewports exist:
-    if not views.ToElements():
-        return None
-    for v in views:
-        if v.Name == vp_name:
-            return v.Name
-    return views.FirstElement().Name
+    # return a viewport with a given name, or the name of any viewport if not found
+    index = get_doc_index(doc)
+    if index.contains("viewport", vp_name):
+        return vp_name
+    # None if no viewports exist
+    any_vp = index.first("viewport")
+    if any_vp:
+        return any_vp.Name
+    return None
 
 
 def tb_name_match(tb_name, doc=revit.doc):
-    titleblocks = DB.FilteredElementCollector(doc).OfCategory(
-        DB.BuiltInCategory.OST_TitleBlocks).WhereElementIsElementType()
+    titleblocks = Query(doc).of_category(DB.BuiltInCategory.OST_TitleBlocks).types_only()
     for tb in titleblocks:
         fam_name = tb.Family.Name
         type_name = get_name(tb)
@@ -432,79 +309,103 @@ def tb_name_match(tb_name, doc=revit.doc):
             return joined_name
 
 
-def unique_view_name(name, suffix=None):
+def view_name_allocator(doc=revit.doc):
+    # allocator of free view names, from a single snapshot of the existing ones
+    return NameAllocator(get_doc_index(doc).keys("view"), naming.next_copy_name)
+
+
+def unique_view_name(name, suffix=None, doc=revit.doc):
     unique_v_name = name + suffix
-    while get_view(unique_v_name):
-        unique_v_name = unique_v_name + " Copy 1"
+    while get_view(unique_v_name, doc):
+        unique_v_name = naming.next_copy_name(unique_v_name)
     return unique_v_name
 
 
+def unique_view_names(names, suffix="", doc=revit.doc):
+    # unique names for a batch of new views, numbered " Copy N" when taken
+    return view_name_allocator(doc).reserve_all([name + suffix for name in names])
+
+
 def shift_list(l, n):
     return l[n:] + l[:n]
 
 
 def get_viewport_types(doc=revit.doc):
     # get viewport types using a parameter filter
-    bip_id = DB.ElementId(DB.BuiltInParameter.VIEWPORT_ATTR_SHOW_LABEL)
-    bip_provider = DB.ParameterValueProvider(bip_id)
-    rule = DB.FilterIntegerRule(bip_provider, DB.FilterNumericGreaterOrEqual(), 0)
-    param_filter = DB.ElementParameterFilter(rule)
-
-    collector = DB.FilteredElementCollector(doc) \
-        .WherePasses(param_filter) \
-        .WhereElementIsElementType() \
-        .ToElements()
-
-    return collector
+    return Query(doc) \
+        .where_param(DB.BuiltInParameter.VIEWPORT_ATTR_SHOW_LABEL, 0, DB.FilterNumericGreaterOrEqual) \
+        .types_only() \
+        .elements()
 
 
 def get_vp_by_name(name, doc=revit.doc):
-    #
-    bip_id = DB.ElementId(DB.BuiltInParameter.VIEWPORT_ATTR_SHOW_LABEL)
-    bip_provider = DB.ParameterValueProvider(bip_id)
-    rule = DB.FilterIntegerRule(bip_provider, DB.FilterNumericGreaterOrEqual(), 0)
-    param_filter = DB.ElementParameterFilter(rule)
-
-    type_bip_id = DB.ElementId(DB.BuiltInParameter.ALL_MODEL_TYPE_NAME)
-    type_bip_provider = DB.ParameterValueProvider(type_bip_id)
-    if HOST_APP.is_newer_than(2022):
-        type_filter_rule = DB.FilterStringRule(type_bip_provider, DB.FilterStringEquals(), name)
-    else:
-        type_filter_rule = DB.FilterStringRule(type_bip_provider, DB.FilterStringEquals(), name, True)
-    type_filter = DB.ElementParameterFilter(type_filter_rule)
-
-    and_filter = DB.LogicalAndFilter(param_filter, type_filter)
-
-    collector = DB.FilteredElementCollector(doc) \
-        .WherePasses(and_filter) \
-        .WhereElementIsElementType() \
-        .FirstElement()
-
-    return collector
+    # get the viewport type with the given name
+    return Query(doc) \
+        .where_param(DB.BuiltInParameter.VIEWPORT_ATTR_SHOW_LABEL, 0, DB.FilterNumericGreaterOrEqual) \
+        .where_param(DB.BuiltInParameter.ALL_MODEL_TYPE_NAME, name) \
+        .types_only() \
+        .first()
 
 
 def get_3Dviewtype_id(doc=revit.doc):
-    view_fam_type = DB.FilteredElementCollector(doc).OfClass(DB.ViewFamilyType)
-    return next(vt.Id for vt in view_fam_type if vt.ViewFamily == DB.ViewFamily.ThreeDimensional)
+    return next(iter(resources.get_resources(doc).view_family_type_ids(DB.ViewFamily.ThreeDimensional)))
 
 
 def delete_existing_view(view_name, doc=revit.doc):
-    for view in DB.FilteredElementCollector(doc).OfClass(DB.View).ToElements():
-        if view.Name == view_name:
-            try:
-                doc.Delete(view.Id)
-                break
-            except:
-
-                forms.alert('Current view was cannot be deleted. Close view and try again.')
-                return False
+    index = get_doc_index(doc)
+    for view_id in index.ids("view_name", view_name):
+        try:
+            doc.Delete(view_id)
+            index.forget(view_id)
+            break
+        except:
+            from pyrevit import forms
+            forms.alert('Current view was cannot be deleted. Close view and try again.')
+            return False
     return True
 
 
+def delete_views_by_name(view_names, doc=revit.doc):
+    # delete the views of any kind with any of the given names with a single Delete call
+    # returns the names of the views that could not be deleted, e.g. the active view
+    index = get_doc_index(doc)
+    active_view = doc.ActiveView
+    active_id = active_view.Id.IntegerValue if active_view else None
+    failed = []
+    to_delete = []
+    seen = set()
+    for view_name in view_names:
+        for view_id in index.ids("view_name", view_name):
+            if view_id.IntegerValue in seen:
+                continue
+            seen.add(view_id.IntegerValue)
+            if view_id.IntegerValue == active_id:
+                failed.append(view_name)
+            else:
+                to_delete.append((view_name, view_id))
+    if not to_delete:
+        return failed
+
+    try:
+        deleted_ids = list(doc.Delete(List[DB.ElementId]([view_id for _, view_id in to_delete])))
+    except Exception:
+        # one view is blocking the batch, find which by deleting them one at a time
+        deleted_ids = []
+        for view_name, view_id in to_delete:
+            try:
+                deleted_ids.extend(doc.Delete(view_id))
+            except Exception:
+                failed.append(view_name)
+    for deleted_id in deleted_ids:
+        index.forget(deleted_id)
+    return failed
+
+
 def remove_viewtemplate(vt_id, doc=revit.doc):
     viewtype = doc.GetElement(vt_id)
     template_id = viewtype.DefaultTemplateId
     if template_id.IntegerValue != -1:
+        from pyrevit import forms
         if forms.alert(
                 "You are about to remove the View Template"
                 " associated with this View Type. Is that cool with ya?",
@@ -528,19 +429,48 @@ def create_filter_from_rules(rules):
 
 
 def check_filter_exists(filter_name, doc=revit.doc):
-    all_view_filters = DB.FilteredElementCollector(doc).OfClass(DB.FilterElement).ToElements()
-
-    for vf in all_view_filters:
-        if filter_name == str(vf.Name):
-            return vf
+    return get_doc_index(doc).first("filter", filter_name)
 
 
 def create_filter(filter_name, bics_list, doc=revit.doc):
     cat_list = List[DB.ElementId](DB.ElementId(cat) for cat in bics_list)
     filter = DB.ParameterFilterElement.Create(doc, filter_name, cat_list)
+    get_doc_index(doc).note(filter)
     return filter
 
 
+def upsert_filters(specs, doc=revit.doc):
+    # make sure a filter exists for each (filter name, bics list, element filter or None) in specs
+    # missing filters are created, changed ones get their categories and rules updated,
+    # unchanged ones are left alone; all in one transaction
+    # returns a {filter name: filter} dictionary
+    index = get_doc_index(doc)
+    existing = index.snapshot("filter")
+    filters = {}
+    with ensure_transaction("Update Filters", doc):
+        for filter_name, bics_list, element_filter in specs:
+            cat_list = List[DB.ElementId](DB.ElementId(cat) for cat in bics_list)
+            filter = existing.get(filter_name)
+            if filter is None:
+                if element_filter is None:
+                    filter = DB.ParameterFilterElement.Create(doc, filter_name, cat_list)
+                else:
+                    filter = DB.ParameterFilterElement.Create(doc, filter_name, cat_list, element_filter)
+                index.note(filter)
+            else:
+                wanted_categories = set(cat.IntegerValue for cat in cat_list)
+                if set(cat.IntegerValue for cat in filter.GetCategories()) != wanted_categories:
+                    filter.SetCategories(cat_list)
+                wanted_rules = rules.filter_signature(element_filter)
+                if wanted_rules is None or rules.filter_signature(filter.GetElementFilter()) != wanted_rules:
+                    if element_filter is None:
+                        filter.ClearRules()
+                    else:
+                        filter.SetElementFilter(element_filter)
+            filters[filter_name] = filter
+    return filters
+
+
 def filter_from_rules(rules, or_rule=False):
     elem_filters = List[DB.ElementFilter]()
     for rule in rules:
@@ -557,21 +487,9 @@ def get_param_value_as_string(p):
     # get the value of the element paramter as a string, regardless of the storage type
 
     if p.HasValue:
-        if p_storage_type(p) == "ElementId":
-            if p.Definition.Name == "Category":
-
-                return p.AsValueString()
-            else:
-                return p.AsElementId().IntegerValue
-        elif p_storage_type(p) == "Integer":
-
-            return p.AsInteger()
-        elif p_storage_type(p) == "Double":
-
-            return p.AsValueString()
-        elif p_storage_type(p) == "String":
-
-            return p.AsString()
+        getter = params.value_getter(p, as_string=True)
+        if getter:
+            return getter(p)
     else:
         return
 
@@ -579,14 +497,9 @@ def get_param_value_by_storage_type(p):
     # get the value of the element parameter by storage type
 
     if p.HasValue:
-        if p_storage_type(p) == "ElementId":
-            return p.AsElementId()
-        elif p_storage_type(p) == "Integer":
-            return p.AsInteger()
-        elif p_storage_type(p) == "Double":
-            return p.AsDouble()
-        elif p_storage_type(p) == "String":
-            return p.AsString()
+        getter = params.value_getter(p)
+        if getter:
+            return getter(p)
     else:
         return
 
@@ -596,27 +509,28 @@ def p_storage_type(param):
 
 
 def get_parameter_from_name(el, param_name):
-    params = el.Parameters
-    for p in params:
-        if p.Definition.Name == param_name:
-            return p
+    return el.LookupParameter(param_name)
 
 
 def get_builtin_label(bip_or_bic):
     # returns a language-specific label for the bip or bic
-    return DB.LabelUtils.GetLabelFor(bip_or_bic)
+    return categories.builtin_label(bip_or_bic)
 
 def create_filter_by_name_bics(filter_name, bics_list, doc=revit.doc):
     cat_list = List[DB.ElementId](DB.ElementId(cat) for cat in bics_list)
     filter = DB.ParameterFilterElement.Create(doc, filter_name, cat_list)
+    get_doc_index(doc).note(filter)
     return filter
 
 def shared_param_id_from_guid(categories_list, guid, doc=revit.doc):
     # from the GUID, return the id of the shared parameter
+    param_id = get_shared_param_index(doc).get(guid)
+    if param_id:
+        return param_id
+    # fall back to looking for the parameter on the elements
     for bic in categories_list:
         # iterating through each category helps address cases where some selected categories are not present in the model
-        any_element_of_cat = DB.FilteredElementCollector(doc).OfCategory(
-            bic).WhereElementIsNotElementType().ToElements()
+        any_element_of_cat = Query(doc).of_category(bic).instances_only()
         for el in any_element_of_cat:
             element_i_params = el.Parameters
             for p in element_i_params:
@@ -636,16 +550,7 @@ def shared_param_id_from_guid(categories_list, guid, doc=revit.doc):
 
 def get_document_model_bics(doc=revit.doc):
     # get all model builtin categories of the doc
-    built_in_categories = []
-    for category in doc.Settings.Categories:
-        if HOST_APP.is_newer_than(2022):
-            bic = category.BuiltInCategory
-        else:
-            bic = System.Enum.ToObject(BIC, category.Id.IntegerValue)
-            # print (type(bic), bic)
-        if category.CategoryType==DB.CategoryType.Model and bic!= DB.BuiltInCategory.INVALID and category.Id.IntegerValue <0:
-            built_in_categories.append(bic)
-    return built_in_categories
+    return list(categories.get_category_catalog(doc).bics)
 
 
 FREQUENTLY_SELECTED_CATEGORIES=[
@@ -666,14 +571,18 @@ def frequent_category_labels():
 def model_categories_dict(doc):
     # a dictionary of common categories used for colorizers
     # formatted as {Category name : BIC}
-    category_opt_dict = {}
-    for cat in get_document_model_bics(doc):
-        category_opt_dict[get_builtin_label(cat)] = cat
-    return category_opt_dict
+    return dict(categories.get_category_catalog(doc).label_to_bic)
 
 
 def category_labels_to_bic(labels, doc):
+    catalog = categories.get_category_catalog(doc)
     categories_dict = {}
     for label in labels:
-        categories_dict[label]=model_categories_dict(doc)[label]
+        categories_dict[label] = catalog.bic(label)
     return categories_dict
+
+
+# the slow pyrevit modules this module used to import are only imported when read
+lazymodule.lazy_attributes(__name__, forms=lazymodule.importer("pyrevit.forms"),
+                           script=lazymodule.importer("pyrevit.script"),
+                           coreutils=lazymodule.importer("pyrevit.coreutils"))
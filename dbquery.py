@@ -0,0 +1,138 @@
+"""Lazy element queries that apply quick filters before slow ones"""
+
+from pyrevit import revit, DB
+from pyrevit.framework import List
+from pychilizer import rules
+
+INSTANCES = "instances"
+TYPES = "types"
+
+
+class Query(object):
+    """Composable element query, only run when its result is consumed.
+
+    Query(doc).of_category(BIC.OST_Walls).where_param(bip, "x").types_only().first()
+
+    Quick filters (class, category, element type, exclusions) go on the
+    collector before the slow parameter filters, and the consuming method
+    picks the cheapest collector call for the result it returns.
+    """
+
+    def __init__(self, doc=revit.doc, view_id=None):
+        self.doc = doc
+        self.view_id = view_id
+        self._class = None
+        self._category = None
+        self._kind = None
+        self._excluded = []
+        self._quick = []
+        self._slow = []
+
+    def of_class(self, el_class):
+        self._class = el_class
+        return self
+
+    def of_category(self, bic):
+        self._category = bic
+        return self
+
+    def types_only(self):
+        self._kind = TYPES
+        return self
+
+    def instances_only(self):
+        self._kind = INSTANCES
+        return self
+
+    def excluding(self, element_ids):
+        self._excluded.extend(element_ids)
+        return self
+
+    def where(self, element_filter):
+        if isinstance(element_filter, DB.ElementQuickFilter):
+            self._quick.append(element_filter)
+        else:
+            self._slow.append(element_filter)
+        return self
+
+    def where_param(self, bip, value, evaluator=None):
+        # parameter equals value, or passes the given evaluator; strings or integers
+        if isinstance(value, int):
+            return self.where(rules.integer_filter(bip, value, evaluator or DB.FilterNumericEquals))
+        return self.where(rules.string_filter(bip, value, evaluator or DB.FilterStringEquals))
+
+    def _plan(self):
+        # (description, step) pairs, quick filters first
+        plan = []
+        if self._class is not None:
+            plan.append(("quick: OfClass({})".format(self._class.__name__),
+                         lambda c: c.OfClass(self._class)))
+        if self._category is not None:
+            plan.append(("quick: OfCategory({})".format(self._category),
+                         lambda c: c.OfCategory(self._category)))
+        if self._kind == TYPES:
+            plan.append(("quick: WhereElementIsElementType", lambda c: c.WhereElementIsElementType()))
+        elif self._kind == INSTANCES:
+            plan.append(("quick: WhereElementIsNotElementType", lambda c: c.WhereElementIsNotElementType()))
+        for quick_filter in self._quick:
+            plan.append(("quick: {}".format(type(quick_filter).__name__),
+                         lambda c, f=quick_filter: c.WherePasses(f)))
+        if self._excluded:
+            plan.append(("quick: Excluding {} ids".format(len(self._excluded)),
+                         lambda c: c.Excluding(List[DB.ElementId](self._excluded))))
+        if len(self._slow) == 1:
+            plan.append(("slow: {}".format(type(self._slow[0]).__name__),
+                         lambda c: c.WherePasses(self._slow[0])))
+        elif self._slow:
+            plan.append(("slow: LogicalAndFilter of {} filters".format(len(self._slow)),
+                         lambda c: c.WherePasses(DB.LogicalAndFilter(List[DB.ElementFilter](self._slow)))))
+        return plan
+
+    def collector(self):
+        if self.view_id is not None:
+            collector = DB.FilteredElementCollector(self.doc, self.view_id)
+        else:
+            collector = DB.FilteredElementCollector(self.doc)
+        for description, step in self._plan():
+            collector = step(collector)
+        return collector
+
+    def explain(self, consumer="iterate"):
+        # the plan chosen for the query, as it would run for the given consumer
+        lines = ["FilteredElementCollector(doc{})".format(
+            ", view {}".format(self.view_id.IntegerValue) if self.view_id is not None else "")]
+        lines += [description for description, step in self._plan()]
+        lines.append("consume: {}".format(_CONSUMERS[consumer]))
+        return "\n".join(lines)
+
+    def __iter__(self):
+        return iter(self.collector())
+
+    def first(self):
+        return self.collector().FirstElement()
+
+    def first_id(self):
+        return self.collector().FirstElementId()
+
+    def ids(self):
+        return self.collector().ToElementIds()
+
+    def elements(self):
+        return self.collector().ToElements()
+
+    def count(self):
+        return self.collector().GetElementCount()
+
+    def exists(self):
+        return self.first_id() != DB.ElementId.InvalidElementId
+
+
+_CONSUMERS = {
+    "iterate": "iterate the collector",
+    "first": "FirstElement",
+    "first_id": "FirstElementId",
+    "ids": "ToElementIds",
+    "elements": "ToElements",
+    "count": "GetElementCount",
+    "exists": "FirstElementId",
+}
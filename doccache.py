@@ -0,0 +1,344 @@
+"""Per-document caches, kept in sync with the model through Revit events.
+
+The DocumentChanged and DocumentClosing handlers are added when the first
+cache is made. They are removed by ``clear_doc_caches``, and when the
+script engine shuts down, so a script running in a non-persistent pyRevit
+engine does not leave handlers on the application for the rest of the
+session. In a persistent engine the caches and handlers stay in place until
+``clear_doc_caches`` is called.
+"""
+
+import atexit
+from collections import defaultdict
+from pyrevit import revit, DB
+from pyrevit.framework import List
+from pychilizer.dbquery import Query
+import clr
+import System
+
+BIC = DB.BuiltInCategory
+BIP = DB.BuiltInParameter
+
+_DOC_CACHES = {}
+_HOOKED_APPS = []
+
+
+def _doc_key(doc):
+    return doc.GetHashCode()
+
+
+class DocumentCache(object):
+    """Named cache entries of a single document.
+
+    An entry can define ``document_changed(added, deleted, modified)`` to patch
+    itself after a committed change and return True if it is still valid.
+    Entries without it are dropped on every change of the document. An entry
+    that only follows some element classes lists them in ``element_classes``,
+    and is only given the added and modified ids of those classes, filtered
+    by Revit; deleted ids are always given in full.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._entries = {}
+
+    def get(self, name, factory):
+        # return the entry, building it with factory(doc) on first use
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = factory(self.doc)
+            self._entries[name] = entry
+        return entry
+
+    def drop(self, name=None):
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+    def document_changed(self, args):
+        # patch the entries after a committed change, the ids of each set of classes are read once
+        deleted = list(args.GetDeletedElementIds())
+        changed = {}
+        for name, entry in list(self._entries.items()):
+            patch = getattr(entry, "document_changed", None)
+            if patch is not None:
+                classes = getattr(entry, "element_classes", None)
+                if classes not in changed:
+                    changed[classes] = _changed_ids(args, classes)
+                added, modified = changed[classes]
+            if patch is None or not patch(added, deleted, modified):
+                del self._entries[name]
+
+
+def _changed_ids(args, classes):
+    # (added, modified) ids of the change, only of the given classes unless classes is None
+    if classes is None:
+        return list(args.GetAddedElementIds()), list(args.GetModifiedElementIds())
+    if not classes:
+        return [], []
+    class_filter = DB.ElementMulticlassFilter(List[System.Type](clr.GetClrType(c) for c in classes))
+    return list(args.GetAddedElementIds(class_filter)), list(args.GetModifiedElementIds(class_filter))
+
+
+def _on_document_changed(sender, args):
+    cache = _DOC_CACHES.get(_doc_key(args.GetDocument()))
+    if cache:
+        cache.document_changed(args)
+
+
+def _on_document_closing(sender, args):
+    _DOC_CACHES.pop(_doc_key(args.Document), None)
+    if not _DOC_CACHES:
+        clear_doc_caches()
+
+
+def _hook_events(app):
+    for hooked in _HOOKED_APPS:
+        if hooked.Equals(app):
+            return
+    app.DocumentChanged += _on_document_changed
+    app.DocumentClosing += _on_document_closing
+    _HOOKED_APPS.append(app)
+
+
+def get_doc_cache(doc=revit.doc):
+    key = _doc_key(doc)
+    cache = _DOC_CACHES.get(key)
+    if cache is None:
+        _hook_events(doc.Application)
+        cache = DocumentCache(doc)
+        _DOC_CACHES[key] = cache
+    return cache
+
+
+def clear_doc_caches():
+    # drop every cache and stop listening to the document events
+    _DOC_CACHES.clear()
+    for app in _HOOKED_APPS:
+        app.DocumentChanged -= _on_document_changed
+        app.DocumentClosing -= _on_document_closing
+    del _HOOKED_APPS[:]
+
+
+# the handlers must not outlive the engine that runs them
+atexit.register(clear_doc_caches)
+
+
+def _view_keys(view):
+    # index keys of a view: any view by name, model views, templates and sheets
+    keys = [("view_name", view.Name)]
+    if isinstance(view, DB.ViewSheet):
+        keys.append(("sheet", view.SheetNumber))
+    elif view.Category and view.Category.Id.IntegerValue == int(BIC.OST_Views):
+        keys.append(("view", view.Name))
+    if view.IsTemplate:
+        keys.append(("view_template", view.Name))
+    return keys
+
+
+def _named_keys(kind):
+    return lambda el: [(kind, el.Name)]
+
+
+# element class scanned for each kind, and the keys an element of that class is indexed under
+_INDEXED_CLASSES = [
+    (DB.View, _view_keys, ("view_name", "view", "view_template", "sheet")),
+    (DB.Viewport, _named_keys("viewport"), ("viewport",)),
+    (DB.FilterElement, _named_keys("filter"), ("filter",)),
+]
+
+
+# (category or None, name parameters) a miss of a kind is confirmed with while the document is modifiable
+_NAME_PARAMETERS = {
+    "sheet": (BIC.OST_Sheets, [BIP.SHEET_NUMBER]),
+    "view_name": (None, [BIP.VIEW_NAME, BIP.SHEET_NAME]),
+    "view": (BIC.OST_Views, [BIP.VIEW_NAME]),
+    "view_template": (None, [BIP.VIEW_NAME]),
+}
+
+
+class DocumentIndex(object):
+    """Name -> element ids maps for sheets, views, view templates, viewports and filters.
+
+    Each element class is scanned once, on the first lookup of one of its kinds,
+    and then patched from the DocumentChanged event. The event only fires when
+    a transaction is committed, so elements created or renamed in the open
+    transaction are passed to ``note`` (or their id to ``forget``) by the
+    helpers that change them. While the document is modifiable a miss is
+    confirmed with one filtered collector on the name parameter of the kind,
+    and the kinds without one, like ``keys`` snapshots, scan their class again
+    at most once until the next commit. Hits are checked against the live
+    element before they are returned, so entries left behind by a rolled back
+    transaction are dropped on lookup. Elements indexed inside a transaction
+    stay pending until a committed change confirms them, and ``keys`` checks
+    the keys of pending elements.
+    """
+
+    element_classes = tuple(el_class for el_class, keys_of, kinds in _INDEXED_CLASSES)
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._keys = defaultdict(dict)
+        self._by_id = {}
+        self._scanned = []
+        self._rescanned = []
+        self._pending = set()
+
+    def _indexer(self, kind):
+        for el_class, keys_of, kinds in _INDEXED_CLASSES:
+            if kind in kinds:
+                return el_class, keys_of
+        raise KeyError(kind)
+
+    def _live_ids(self, kind, key):
+        # ids still indexed under key whose element exists and still matches it
+        el_class, keys_of = self._indexer(kind)
+        live = []
+        for el_id in list(self._keys[kind].get(key, [])):
+            el = self.doc.GetElement(el_id)
+            if el is not None and (kind, key) in keys_of(el):
+                live.append(el_id)
+            elif el is not None:
+                self.note(el)
+            else:
+                self.forget(el_id)
+        return live
+
+    def _ensure(self, kind):
+        el_class, keys_of = self._indexer(kind)
+        if el_class not in self._scanned:
+            self._scanned.append(el_class)
+            for el in Query(self.doc).of_class(el_class):
+                self._add(el, keys_of)
+
+    def _rescan(self, kind):
+        # index the elements of the kind's class as they are now, with the changes of the open transaction
+        el_class, keys_of = self._indexer(kind)
+        kinds = next(kinds for indexed_class, _, kinds in _INDEXED_CLASSES if indexed_class is el_class)
+        seen = set()
+        for el in Query(self.doc).of_class(el_class):
+            el_int = el.Id.IntegerValue
+            seen.add(el_int)
+            if self._by_id.get(el_int) != keys_of(el):
+                self.note(el)
+        for el_int, keys in list(self._by_id.items()):
+            if el_int not in seen and keys and keys[0][0] in kinds:
+                self.forget(DB.ElementId(el_int))
+
+    def _rescan_once(self, kind):
+        # rescan the kind's class in an open transaction, once until the next commit
+        el_class, keys_of = self._indexer(kind)
+        if self.doc.IsModifiable and el_class not in self._rescanned:
+            self._rescanned.append(el_class)
+            self._rescan(kind)
+
+    def _confirm_miss(self, kind, key):
+        # index the elements named key in the open transaction that were not noted
+        if kind not in _NAME_PARAMETERS:
+            self._rescan_once(kind)
+            return
+        bic, bips = _NAME_PARAMETERS[kind]
+        el_class, keys_of = self._indexer(kind)
+        for bip in bips:
+            query = Query(self.doc).of_category(bic) if bic is not None else Query(self.doc).of_class(el_class)
+            for el in query.where_param(bip, key):
+                self.note(el)
+
+    def _lookup(self, kind, key):
+        # live ids under key, a miss in an open transaction is checked against the model
+        self._ensure(kind)
+        ids = self._live_ids(kind, key)
+        if not ids and self.doc.IsModifiable:
+            self._confirm_miss(kind, key)
+            ids = self._live_ids(kind, key)
+        return ids
+
+    def _add(self, el, keys_of):
+        keys = keys_of(el)
+        for kind, key in keys:
+            self._keys[kind].setdefault(key, []).append(el.Id)
+        self._by_id[el.Id.IntegerValue] = keys
+
+    def _note(self, el):
+        self.forget(el.Id)
+        for el_class, keys_of, kinds in _INDEXED_CLASSES:
+            if el_class in self._scanned and isinstance(el, el_class):
+                self._add(el, keys_of)
+                return True
+        return False
+
+    def note(self, el):
+        # (re)index an element created or renamed in the current transaction
+        if self._note(el):
+            self._pending.add(el.Id.IntegerValue)
+
+    def forget(self, el_id):
+        self._pending.discard(el_id.IntegerValue)
+        for kind, key in self._by_id.pop(el_id.IntegerValue, []):
+            ids = self._keys[kind].get(key, [])
+            for i, indexed_id in enumerate(ids):
+                if indexed_id.IntegerValue == el_id.IntegerValue:
+                    del ids[i]
+                    break
+            if not ids:
+                self._keys[kind].pop(key, None)
+
+    def document_changed(self, added, deleted, modified):
+        del self._rescanned[:]
+        for el_id in deleted:
+            self.forget(el_id)
+        for el_id in added + modified:
+            el = self.doc.GetElement(el_id)
+            if el is None:
+                self.forget(el_id)
+            else:
+                self._note(el)
+        return True
+
+    def ids(self, kind, key):
+        return self._lookup(kind, key)
+
+    def elements(self, kind, key):
+        return [self.doc.GetElement(el_id) for el_id in self.ids(kind, key)]
+
+    def first(self, kind, key=None):
+        # first element indexed under key, or under any key if none is given
+        if key is not None:
+            ids = self._lookup(kind, key)
+            return self.doc.GetElement(ids[0]) if ids else None
+        self._ensure(kind)
+        for rescanned in (False, True):
+            for indexed_key in list(self._keys[kind]):
+                ids = self._live_ids(kind, indexed_key)
+                if ids:
+                    return self.doc.GetElement(ids[0])
+            if rescanned or not self.doc.IsModifiable:
+                return None
+            self._rescan_once(kind)
+
+    def contains(self, kind, key):
+        return bool(self._lookup(kind, key))
+
+    def keys(self, kind):
+        # keys with at least one live element, only pending elements can be stale
+        self._ensure(kind)
+        self._rescan_once(kind)
+        for el_id in list(self._pending):
+            for indexed_kind, key in self._by_id.get(el_id, []):
+                if indexed_kind == kind:
+                    self._live_ids(kind, key)
+        return list(self._keys[kind])
+
+    def snapshot(self, kind):
+        # {key: first live element} of every key, for many lookups with a single scan in an open transaction
+        found = {}
+        for key in self.keys(kind):
+            ids = self._live_ids(kind, key)
+            if ids:
+                found[key] = self.doc.GetElement(ids[0])
+        return found
+
+
+def get_doc_index(doc=revit.doc):
+    return get_doc_cache(doc).get("index", DocumentIndex)
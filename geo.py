@@ -1,10 +1,17 @@
-from pyrevit import revit, DB, script, forms, HOST_APP, coreutils
+from pyrevit import revit, DB, HOST_APP
 import math
 from pyrevit.framework import List
 from pychilizer import database
+from pychilizer.dbquery import Query
+from pychilizer import lazymodule
 from Autodesk.Revit import Exceptions
 
-output = script.get_output()
+
+def _output():
+    # the output window is only created once something is printed to it
+    from pyrevit import script
+    return script.get_output()
+
 
 def inverted_transform(element, view=revit.active_view):
     # get element location and return its inverted transform
@@ -35,8 +42,8 @@ def room_bound_to_origin(room, translation):
 
 def get_ref_lvl_plane(family_doc):
     # from given family doc, return Ref. Level reference plane
-    find_planes = DB.FilteredElementCollector(family_doc).OfClass(DB.SketchPlane)
-    ref_level = DB.FilteredElementCollector(family_doc).OfClass(DB.Level).WhereElementIsNotElementType().FirstElement()
+    find_planes = Query(family_doc).of_class(DB.SketchPlane)
+    ref_level = Query(family_doc).of_class(DB.Level).instances_only().first()
     return [plane for plane in find_planes if plane.Name == ref_level.Name]
 
 
@@ -47,11 +54,11 @@ def find_crop_box(view):
             t2.Start()
             view.CropBoxVisible = False
             t2.Commit()
-            hidden = DB.FilteredElementCollector(revit.doc, view.Id).ToElementIds()
+            hidden = Query(revit.doc, view.Id).ids()
             t2.Start()
             view.CropBoxVisible = True
             t2.Commit()
-            crop_box_el = DB.FilteredElementCollector(revit.doc, view.Id).Excluding(hidden).FirstElement()
+            crop_box_el = Query(revit.doc, view.Id).excluding(hidden).first()
             tg.RollBack()
             if crop_box_el:
                 return crop_box_el
@@ -119,39 +126,191 @@ def point_equal_list(pt, lst):
         return None
 
 
+# endpoints closer than this are the same point, in internal units
+ENDPOINT_TOLERANCE = 0.003
+
+
+class EndpointHash(object):
+    """Points bucketed in a grid of cells twice the tolerance wide.
+
+    A point within tolerance of another one is in the same cell or a
+    neighbouring one on the side it is closest to, so a lookup compares the
+    points of 8 cells instead of all of them. Items are kept with their
+    points, in the order they were added.
+    """
+
+    def __init__(self, tolerance=ENDPOINT_TOLERANCE):
+        self.tolerance = tolerance
+        self._size = 2.0 * tolerance
+        self._cells = {}
+        self._count = 0
+
+    def _cell(self, pt):
+        size = self._size
+        return (int(math.floor(pt.X / size)), int(math.floor(pt.Y / size)), int(math.floor(pt.Z / size)))
+
+    def _neighbours(self, pt):
+        # the cell of pt and the cells next to the half of it pt is in
+        size = self._size
+        ranges = []
+        for c in (pt.X / size, pt.Y / size, pt.Z / size):
+            i = int(math.floor(c))
+            ranges.append((i, i - 1) if c - i < 0.5 else (i, i + 1))
+        return [(i, j, k) for i in ranges[0] for j in ranges[1] for k in ranges[2]]
+
+    def _near(self, pt):
+        # (cell, entry) of the first entry within tolerance of pt, or None
+        for cell in self._neighbours(pt):
+            for entry in self._cells.get(cell, ()):
+                if pt.IsAlmostEqualTo(entry[1], self.tolerance):
+                    return cell, entry
+        return None
+
+    def add(self, pt, item=None):
+        self._count += 1
+        self._cells.setdefault(self._cell(pt), []).append((self._count, pt, item))
+
+    def find(self, pt):
+        # the item of a point within tolerance of pt, None if there is none
+        found = self._near(pt)
+        return found[1][2] if found else None
+
+    def pop(self, pt):
+        # remove a point within tolerance of pt, returns its (point, item) or None if there is none
+        found = self._near(pt)
+        if found is None:
+            return None
+        cell, entry = found
+        self._discard(cell, entry)
+        return entry[1], entry[2]
+
+    def remove(self, pt, item):
+        # remove the item added at pt
+        cell = self._cell(pt)
+        for entry in self._cells.get(cell, ()):
+            if entry[2] == item:
+                self._discard(cell, entry)
+                return
+
+    def _discard(self, cell, entry):
+        entries = self._cells[cell]
+        entries.remove(entry)
+        if not entries:
+            del self._cells[cell]
+
+    def points(self):
+        entries = sorted(entry for entries in self._cells.values() for entry in entries)
+        return [entry[1] for entry in entries]
+
+
 def get_open_ends(curves_list):
     #check if any open ends in a curves list
-    endpoints = []
+    # every endpoint cancels out a matching one, the endpoints left over are open ends
+    ends = EndpointHash()
     for curve in curves_list:
         for i in range(2):
-            duplicate = point_equal_list(curve.GetEndPoint(i), endpoints)
-            if duplicate:
-                endpoints.remove(duplicate)
-            else:
-                endpoints.append(curve.GetEndPoint(i))
+            pt = curve.GetEndPoint(i)
+            if ends.pop(pt) is None:
+                ends.add(pt)
+    endpoints = ends.points()
     if endpoints:
         return endpoints
     else:
         return None
 
 
+def is_chained(curves_list, tolerance=ENDPOINT_TOLERANCE):
+    # True if each curve starts where the one before it ends
+    return all(previous.GetEndPoint(1).IsAlmostEqualTo(curve.GetEndPoint(0), tolerance)
+               for previous, curve in zip(curves_list, curves_list[1:]))
+
+
+def chain_curves(curves_list, tolerance=ENDPOINT_TOLERANCE):
+    # order unordered curves into chains, each curve starting where the one before it ends
+    # curves running the wrong way are reversed; returns lists of curves, longest chains first
+    ends = EndpointHash(tolerance)
+    for index, curve in enumerate(curves_list):
+        for i in range(2):
+            ends.add(curve.GetEndPoint(i), (index, i))
+    used = set()
+
+    def take(pt):
+        # an unused curve with an end at pt, oriented to start at pt; its ends are forgotten
+        found = ends.pop(pt)
+        if found is None:
+            return None
+        index, end = found[1]
+        other = curves_list[index].GetEndPoint(1 - end)
+        ends.remove(other, (index, 1 - end))
+        used.add(index)
+        return curves_list[index] if end == 0 else curves_list[index].CreateReversed()
+
+    chains = []
+    for index, curve in enumerate(curves_list):
+        if index in used:
+            continue
+        used.add(index)
+        ends.remove(curve.GetEndPoint(0), (index, 0))
+        ends.remove(curve.GetEndPoint(1), (index, 1))
+        chain = [curve]
+        start = curve.GetEndPoint(0)
+        while not chain[-1].GetEndPoint(1).IsAlmostEqualTo(start, tolerance):
+            following = take(chain[-1].GetEndPoint(1))
+            if following is None:
+                break
+            chain.append(following)
+        else:
+            chains.append(chain)
+            continue
+        # an open chain, extend it backwards from its start
+        before = []
+        while True:
+            preceding = take(start)
+            if preceding is None:
+                break
+            preceding = preceding.CreateReversed()
+            before.append(preceding)
+            start = preceding.GetEndPoint(0)
+        chains.append(before[::-1] + chain)
+    chains.sort(key=len, reverse=True)
+    return chains
+
+
+def is_closed_chain(chain, tolerance=ENDPOINT_TOLERANCE):
+    return bool(chain) and chain[-1].GetEndPoint(1).IsAlmostEqualTo(chain[0].GetEndPoint(0), tolerance)
+
+
+def chain_curve_loops(curves_list, tolerance=ENDPOINT_TOLERANCE):
+    # contiguous, oriented CurveLoops of unordered curves, one per chain of them
+    loops = []
+    for chain in chain_curves(curves_list, tolerance):
+        loop = DB.CurveLoop()
+        for curve in chain:
+            loop.Append(curve)
+        loops.append(loop)
+    return loops
+
 
 def get_room_bound(r):
-    room_boundaries = DB.CurveLoop()
     # get room boundary segments
     room_segments = r.GetBoundarySegments(DB.SpatialElementBoundaryOptions())
-    # iterate through loops of segments and add them to the array
+    # the outer loop, its curves chained in order if they are not
     outer_loop = room_segments[0]
-    # for curve in outer_loop:
-    curve_loop = [s.GetCurve() for s in outer_loop]
-    open_ends = get_open_ends(curve_loop)
-    if open_ends:
+    curves = [s.GetCurve() for s in outer_loop]
+    if not is_chained(curves):
+        chains = chain_curves(curves)
+        if len(chains) != 1:
+            return None
+        curves = chains[0]
+    if not is_closed_chain(curves):
         return None
-    for curve in curve_loop:
-        try:
+    room_boundaries = DB.CurveLoop()
+    try:
+        for curve in curves:
             room_boundaries.Append(curve)
-        except Exceptions.ArgumentException:
-            print("Boundary curve makes the loop not contiguous in room {}.".format(output.linkify(r.Id)))
+    except Exceptions.ArgumentException:
+        print("Boundary curve makes the loop not contiguous in room {}.".format(_output().linkify(r.Id)))
+        return None
     return room_boundaries
 
 
@@ -245,7 +404,7 @@ def set_crop_to_bb(element, view, crop_offset, doc=revit.doc):
         # draw 2 sets of outlines for each orientation (front/back, left/right)
         # deactivate crop first, just to make sure the element appears in view
         view.CropBoxActive = False
-        doc.Regenerate()
+        database.regenerate(doc)
 
         bb = element.get_BoundingBox(view)
 
@@ -291,6 +450,7 @@ def set_crop_to_bb(element, view, crop_offset, doc=revit.doc):
             try:
                 curve_loop_offset = DB.CurveLoop.CreateViaOffset(crop_loop, crop_offset, view_direction) # fails here
             except Exceptions.InternalException:
+                from pyrevit import forms
                 forms.alert("Room crop failed. This might be happening if the room placement point is not in the room -- or -- if the Crop Offset is set to a value too large. Review and try again")
                 return False
             if curve_loop_offset.GetExactLength() < crop_loop.GetExactLength():
@@ -299,6 +459,7 @@ def set_crop_to_bb(element, view, crop_offset, doc=revit.doc):
 
         return True
     except Exception as e:
+        from pyrevit import forms
         forms.alert("An exception occurred: {}\nPlease contact 'info@archilizer.com' if you run into an error here.".format(e))
         return False
 
@@ -306,7 +467,7 @@ def set_crop_to_boundary(room, boundary_curve, view, crop_offset, doc=revit.doc)
     # set the crop box of the view to match the boundary in width and room's bounding box in that view in height
     # deactivate crop first, just to make sure the element appears in view
     view.CropBoxActive = False
-    doc.Regenerate()
+    database.regenerate(doc)
 
     b_start = boundary_curve.GetEndPoint(0)
     b_end = boundary_curve.GetEndPoint(1)
@@ -357,7 +518,7 @@ def get_bb_axis_in_view(element, view):
 def get_aligned_crop(geo, transform):
 
     rotated_geo = geo.GetTransformed(transform)
-    revit.doc.Regenerate()
+    database.regenerate(revit.doc)
     rb = rotated_geo.GetBoundingBox()
     bb_outline = get_bb_outline(rb)
     # rotate the curves back using the opposite direction
@@ -401,7 +562,7 @@ def room_to_freeform(r, family_doc):
     for geo in room_geo:
         if isinstance(geo, DB.Solid) and geo.Volume > 0.0:
             freeform = DB.FreeFormElement.Create(family_doc, geo)
-            family_doc.Regenerate()
+            database.regenerate(family_doc)
             delta = DB.XYZ(0, 0, 0) - freeform.get_BoundingBox(None).Min
             move_ff = DB.ElementTransformUtils.MoveElement(
                 family_doc, freeform.Id, delta
@@ -416,7 +577,6 @@ def room_to_freeform(r, family_doc):
 
 
 def room_to_extrusion(r, family_doc):
-    output = script.get_output()
     room_height = r.get_Parameter(DB.BuiltInParameter.ROOM_HEIGHT).AsDouble()
     # helper: define inverted transform to translate room geometry to origin
     geo_translation = inverted_transform(r)
@@ -424,7 +584,7 @@ def room_to_extrusion(r, family_doc):
     room_boundaries = room_bound_to_origin(r, geo_translation)
     # skip if the boundaries are not a closed loop (can happen with misaligned boundaries)
     if not room_boundaries:
-        print("Extrusion failed for room {}. Try fixing room boundaries".format(output.linkify(r.Id)))
+        print("Extrusion failed for room {}. Try fixing room boundaries".format(_output().linkify(r.Id)))
         return
 
     ref_plane = get_ref_lvl_plane(family_doc)
@@ -442,7 +602,7 @@ def room_to_extrusion(r, family_doc):
                                                                             new_mat_param)
         return extrusion
     except Exceptions.InternalException:
-        print("Extrusion failed for room {}. Try fixing room boundaries".format(output.linkify(r.Id)))
+        print("Extrusion failed for room {}. Try fixing room boundaries".format(_output().linkify(r.Id)))
         return
 
 
@@ -482,7 +642,7 @@ def create_room_axo_rotate(room, angle=None, view_scale=50, doc=revit.doc):
     view_orientation = DB.ViewOrientation3D(eye, up, fwd)
     threeD.SetOrientation(view_orientation)
     threeD.CropBoxActive = True
-    doc.Regenerate()
+    database.regenerate(doc)
     crop_axo(threeD)
 
     return threeD
@@ -526,4 +686,11 @@ def offset_curve_inwards_into_room(curve, room, offset_distance):
     curve_midpoint = offset_curve.Evaluate(0.5, True)
     if not room.IsPointInRoom(curve_midpoint):
         offset_curve = curve.CreateOffset(-offset_distance, DB.XYZ(0, 0, 1))
-    return offset_curve
\ No newline at end of file
+    return offset_curve
+
+
+# the output window is only opened when it is read, the slow pyrevit modules only imported
+lazymodule.lazy_attributes(__name__, output=_output,
+                           forms=lazymodule.importer("pyrevit.forms"),
+                           script=lazymodule.importer("pyrevit.script"),
+                           coreutils=lazymodule.importer("pyrevit.coreutils"))
@@ -0,0 +1,56 @@
+"""Module attributes that are only computed when they are first read.
+
+IronPython 2.7 has no module-level __getattr__, so a module with lazy
+attributes puts a LazyModule in its place in sys.modules:
+
+    lazymodule.lazy_attributes(__name__, forms=lazymodule.importer("pyrevit.forms"))
+
+The LazyModule starts with a copy of the real module's attributes, so reading
+them costs no more than on the module itself, and writes every attribute to
+both, so the module's own functions and anyone patching the module see the
+same values. A lazy attribute is stored on both once it is computed. The
+module must call lazy_attributes last and not rebind its globals afterwards.
+"""
+
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module, computing some of its attributes on first read"""
+
+    def __init__(self, module, factories):
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self.__dict__["_LazyModule__module"] = module
+        self.__dict__["_LazyModule__factories"] = factories
+
+    def __getattr__(self, name):
+        # only called for the names the stand-in itself does not have
+        module = self.__dict__["_LazyModule__module"]
+        factory = self.__dict__["_LazyModule__factories"].get(name)
+        if factory is not None and name not in module.__dict__:
+            setattr(self, name, factory())
+        return getattr(module, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.__dict__["_LazyModule__module"], name, value)
+        self.__dict__[name] = value
+
+    def __delattr__(self, name):
+        delattr(self.__dict__["_LazyModule__module"], name)
+        self.__dict__.pop(name, None)
+
+    def __dir__(self):
+        module = self.__dict__["_LazyModule__module"]
+        return sorted(set(dir(module)) | set(self.__dict__["_LazyModule__factories"]))
+
+
+def lazy_attributes(module_name, **factories):
+    # put a LazyModule in place of the module, computing each name with its factory on first read
+    sys.modules[module_name] = LazyModule(sys.modules[module_name], factories)
+
+
+def importer(name):
+    # factory of a module, imported on first read
+    return lambda: __import__(name, fromlist=["__name__"])
@@ -0,0 +1,79 @@
+"""Unique names and numbers for batches of new elements"""
+
+from itertools import count, islice
+from string import ascii_uppercase
+import re
+from pyrevit import coreutils
+
+COPY_SUFFIX = " Copy "
+_COPY_NUMBER = re.compile("^(.*)" + COPY_SUFFIX + "([0-9]+)$")
+
+
+def increment(name):
+    return coreutils.increment_str(name, 1)
+
+
+def next_copy_name(name):
+    # "X" -> "X Copy 1" -> "X Copy 2", instead of stacking "X Copy 1 Copy 1"
+    match = _COPY_NUMBER.match(name)
+    if match:
+        return "{}{}{}".format(match.group(1), COPY_SUFFIX, int(match.group(2)) + 1)
+    return name + COPY_SUFFIX + "1"
+
+
+def alphabetic_label(i):
+    # bijective base-26 label of a zero-based index: A..Z, AA..ZZ, AAA..
+    label = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        label = ascii_uppercase[r] + label
+    return label
+
+
+def alphabetic_labels(start=0):
+    # endless lazy series of alphabetic labels
+    for i in count(start):
+        yield alphabetic_label(i)
+
+
+def fixed_width_labels(nr):
+    # nr labels of equal length: A..Z for up to 26, AA.. for up to 676, AAA.. and so on
+    width = 1
+    first = 0
+    while 26 ** width < nr:
+        first += 26 ** width
+        width += 1
+    return list(islice(alphabetic_labels(first), nr))
+
+
+class NameAllocator(object):
+    """Hands out unique names from one snapshot of the names already taken.
+
+    A requested name that is taken is stepped with ``next_candidate`` until a
+    free one is found. Every name passed on the way remembers where the walk
+    ended, so a later request for any of them resumes from there instead of
+    walking the same chain of taken names again.
+    """
+
+    def __init__(self, taken, next_candidate=increment):
+        self.taken = set(taken)
+        self.next_candidate = next_candidate
+        self._resume = {}
+
+    def __contains__(self, name):
+        return name in self.taken
+
+    def reserve(self, name):
+        visited = []
+        candidate = name
+        while candidate in self.taken:
+            visited.append(candidate)
+            candidate = self._resume.get(candidate) or self.next_candidate(candidate)
+        self.taken.add(candidate)
+        for passed in visited:
+            self._resume[passed] = candidate
+        return candidate
+
+    def reserve_all(self, names):
+        return [self.reserve(name) for name in names]
@@ -0,0 +1,254 @@
+"""Colour palettes as (r, g, b) tuples, exactly n colours long and memoized"""
+
+import heapq
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    # IronPython has no numpy, the distinct palettes fall back to pure Python
+    np = None
+
+# cached palettes are dropped all at once past this size
+MAX_CACHED_PALETTES = 256
+
+BASIC = [
+    "#40DFFF",
+    "#803ABA",
+    "#E6B637",
+    "#A8DA84",
+    "#8337E6",
+    "#EBE70E",
+    "#D037E6",
+    "#074FE0",  # blue
+    "#03A64A",
+    "#662400",
+    "#FF6B1A",
+    "#FF4858",
+    "#747F7F",
+    "#919151",
+]
+
+RAINBOW = [
+    "#42371E",  # dark
+    "#F10800",  # red
+    "#F27405",  # orange
+    "#FFF14E",  # yellow
+    "#016B31",  # green
+    "#6DDEF0",  # blue
+    "#40DFFF",  # cyan
+    "#550580",  # violet
+    "#F587FF",  # pink
+]
+
+PRESETS = {"basic": BASIC, "rainbow": RAINBOW}
+
+# OKLab lightness kept for distinct colours, to stay clear of black lines and white backgrounds
+MIN_LIGHTNESS = 0.35
+MAX_LIGHTNESS = 0.92
+# rgb grid resolutions for distinct colours, the first one with enough candidates for n is used
+GRID_LEVELS = (12, 16, 24, 32, 48, 64)
+# grid colours per palette colour, before the lightness bounds drop some of them
+CANDIDATES_PER_COLOUR = 4
+
+_PALETTES = {}
+# per grid resolution: (candidate rgbs, their OKLab coordinates, the max-min order picked so far)
+_DISTINCT = {}
+
+
+def _hex_rgb(hex):
+    return tuple(int(hex[i:i + 2], 16) for i in range(1, 6, 2))
+
+
+def default_preset(n):
+    # the short preset while it has enough colours, perceptually distinct colours past that
+    return "basic" if n < len(BASIC) else "distinct"
+
+
+def _linear(channel):
+    c = channel / 255.0
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def _cbrt(x):
+    return x ** (1.0 / 3) if x >= 0 else -(-x) ** (1.0 / 3)
+
+
+def oklab(rgb):
+    # OKLab coordinates of an sRGB colour, distances in it follow perceived colour differences
+    r, g, b = [_linear(c) for c in rgb]
+    l = _cbrt(0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b)
+    m = _cbrt(0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b)
+    s = _cbrt(0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b)
+    return (0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+            1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+            0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s)
+
+
+def _candidates(levels):
+    # rgb grid colours within the lightness bounds, with their OKLab coordinates
+    values = [int(round(i * 255.0 / (levels - 1))) for i in range(levels)]
+    rgbs = []
+    labs = []
+    for r in values:
+        for g in values:
+            for b in values:
+                lab = oklab((r, g, b))
+                if MIN_LIGHTNESS <= lab[0] <= MAX_LIGHTNESS:
+                    rgbs.append((r, g, b))
+                    labs.append(lab)
+    return rgbs, labs
+
+
+def distance(lab, other):
+    return math.sqrt(sum((lab[j] - other[j]) ** 2 for j in range(3)))
+
+
+def _nearest(labs, lab):
+    return min(range(len(labs)), key=lambda i: sum((labs[i][j] - lab[j]) ** 2 for j in range(3)))
+
+
+def _max_min_numpy(labs, order, n):
+    points = np.array(labs)
+    min_dist = np.full(len(points), np.inf)
+    for i in order:
+        min_dist = np.minimum(min_dist, ((points - points[i]) ** 2).sum(axis=1))
+    while len(order) < n:
+        i = int(min_dist.argmax())
+        order.append(i)
+        min_dist = np.minimum(min_dist, ((points - points[i]) ** 2).sum(axis=1))
+
+
+def _max_min_python(labs, order, n):
+    # a pick can only get closer to candidates within the largest current min distance of it,
+    # so candidates are bucketed in OKLab cells and only the cells around the pick are visited
+    count = len(labs)
+    low = [min(lab[j] for lab in labs) for j in range(3)]
+    high = [max(lab[j] for lab in labs) for j in range(3)]
+    volume = max((high[0] - low[0]) * (high[1] - low[1]) * (high[2] - low[2]), 1e-9)
+    cell = (volume / max(n, 1)) ** (1.0 / 3)
+    cells = {}
+    for k, lab in enumerate(labs):
+        key = tuple(int((lab[j] - low[j]) / cell) for j in range(3))
+        cells.setdefault(key, []).append(k)
+    min_dist = [float("inf")] * count
+    # (-min distance, candidate), entries go stale as min distances shrink
+    heap = []
+
+    def farthest():
+        while heap and -heap[0][0] != min_dist[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def update(picked):
+        pl, pa, pb = labs[picked]
+        top = farthest()
+        if top is None:
+            buckets = cells.values()
+        else:
+            reach = int(math.sqrt(-top[0]) / cell) + 1
+            ci, cj, ck = [int((labs[picked][j] - low[j]) / cell) for j in range(3)]
+            if (2 * reach + 1) ** 3 >= len(cells):
+                buckets = cells.values()
+            else:
+                buckets = [cells[key] for key in
+                           ((i, j, k) for i in range(ci - reach, ci + reach + 1)
+                            for j in range(cj - reach, cj + reach + 1)
+                            for k in range(ck - reach, ck + reach + 1))
+                           if key in cells]
+        for bucket in buckets:
+            for k in bucket:
+                l, a, b = labs[k]
+                d = (l - pl) * (l - pl) + (a - pa) * (a - pa) + (b - pb) * (b - pb)
+                if d < min_dist[k]:
+                    min_dist[k] = d
+                    heapq.heappush(heap, (-d, k))
+
+    for i in order:
+        update(i)
+    while len(order) < n:
+        i = farthest()[1]
+        order.append(i)
+        update(i)
+
+
+def distinct(n, start=BASIC[0], levels=None):
+    # n colours picked greedily from an rgb grid, each as far as possible in OKLab from the ones before it
+    # the grid is chosen from n unless levels is given; on one grid the picks only ever extend, so
+    # palettes of the same grid are prefixes of each other, but palettes of different grids are not
+    if n <= 0:
+        return []
+    if levels is None:
+        for levels in GRID_LEVELS:
+            if levels ** 3 >= n * CANDIDATES_PER_COLOUR:
+                break
+    entry = _DISTINCT.get((levels, start))
+    if entry is None:
+        rgbs, labs = _candidates(levels)
+        entry = (rgbs, labs, [_nearest(labs, oklab(_hex_rgb(start)))])
+        _DISTINCT[(levels, start)] = entry
+    rgbs, labs, order = entry
+    n = min(n, len(rgbs))
+    if len(order) < n:
+        if np is not None:
+            _max_min_numpy(labs, order, n)
+        else:
+            _max_min_python(labs, order, n)
+    return [rgbs[i] for i in order[:n]]
+
+
+GENERATORS = {"distinct": distinct}
+
+
+def gradient(stops, n):
+    # n colours evenly spaced along the lines between the rgb stops, first and last stops included
+    if n <= 0:
+        return []
+    if n == 1 or len(stops) == 1:
+        return [tuple(stops[0])] * n
+    last_segment = len(stops) - 2
+    step = float(len(stops) - 1) / (n - 1)
+    colours = []
+    for i in range(n):
+        position = i * step
+        segment = min(int(position), last_segment)
+        t = position - segment
+        start, end = stops[segment], stops[segment + 1]
+        colours.append(tuple(int(round(start[j] + t * (end[j] - start[j]))) for j in range(3)))
+    return colours
+
+
+def _cached(key, build):
+    colours = _PALETTES.get(key)
+    if colours is None:
+        if len(_PALETTES) >= MAX_CACHED_PALETTES:
+            _PALETTES.clear()
+        colours = tuple(build())
+        _PALETTES[key] = colours
+    return colours
+
+
+def palette(n, preset=None, seed=None):
+    # exactly n rgb tuples of the preset, shuffled reproducibly when a seed is given
+    if preset is None:
+        preset = default_preset(n)
+    if preset in GENERATORS:
+        build = lambda: GENERATORS[preset](n)
+    else:
+        build = lambda: gradient([_hex_rgb(h) for h in PRESETS[preset]], n)
+    colours = _cached((preset, n), build)
+    if seed is None:
+        return list(colours)
+    return list(_cached((preset, n, seed), lambda: shuffled(colours, seed)))
+
+
+def shuffled(colours, seed):
+    colours = list(colours)
+    random.Random(seed).shuffle(colours)
+    return colours
+
+
+def clear_cache():
+    _PALETTES.clear()
+    _DISTINCT.clear()
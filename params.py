@@ -0,0 +1,197 @@
+"""Cached parameter lookups of a document"""
+
+from pyrevit import revit, DB
+from pychilizer.doccache import get_doc_cache
+from pychilizer.dbquery import Query
+
+INSTANCE = "instance"
+TYPE = "type"
+
+
+def _guid_key(guid):
+    # System.Guid or its string form, in any case
+    return str(guid).lower()
+
+
+class SharedParameterIndex(object):
+    """GUID -> parameter id map of the shared parameters of a document.
+
+    Every shared parameter in a project, bound or loaded with a family, has a
+    SharedParameterElement whose id is the parameter id on the elements.
+    """
+
+    # only the added and modified shared parameters are passed to document_changed
+    element_classes = (DB.SharedParameterElement,)
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._ids = {}
+        self._guids = {}
+        for spe in Query(doc).of_class(DB.SharedParameterElement):
+            self._add(spe)
+
+    def _add(self, spe):
+        key = _guid_key(spe.GuidValue)
+        self._ids[key] = spe.Id
+        self._guids[spe.Id.IntegerValue] = key
+
+    def get(self, guid):
+        return self._ids.get(_guid_key(guid))
+
+    def document_changed(self, added, deleted, modified):
+        for el_id in deleted:
+            key = self._guids.pop(el_id.IntegerValue, None)
+            if key is not None:
+                self._ids.pop(key, None)
+        for el_id in added:
+            self._add(self.doc.GetElement(el_id))
+        return True
+
+
+def get_shared_param_index(doc=revit.doc):
+    return get_doc_cache(doc).get("shared_params", SharedParameterIndex)
+
+
+class ParameterInfo(object):
+    """Definition-level facts about a parameter found in a category"""
+
+    def __init__(self, parameter, scope):
+        self.parameter = parameter
+        self.id = parameter.Id
+        self.definition = parameter.Definition
+        self.name = parameter.Definition.Name
+        self.storage_type = parameter.StorageType
+        self.is_read_only = parameter.IsReadOnly
+        self.scope = scope
+
+    @property
+    def is_instance(self):
+        return self.scope == INSTANCE
+
+
+def _first_of_each_type(elements):
+    # one instance per element type is enough to see the instance parameters
+    seen_types = set()
+    for el in elements:
+        type_id = el.GetTypeId().IntegerValue
+        if type_id not in seen_types:
+            seen_types.add(type_id)
+            yield el
+
+
+class ParameterCatalog(object):
+    """Parameters of a category, one entry per parameter id.
+
+    Each scope is collected in a single pass the first time it is asked for.
+    The catalog stays valid until elements are added to or deleted from the
+    document.
+    """
+
+    def __init__(self, doc, category):
+        self.doc = doc
+        self.category = category
+        self._scopes = {}
+
+    def _collect(self, scope):
+        query = Query(self.doc).of_category(self.category)
+        if scope == TYPE:
+            elements = query.types_only()
+        else:
+            elements = _first_of_each_type(query.instances_only())
+        found = {}
+        infos = []
+        for el in elements:
+            for p in el.Parameters:
+                p_id = p.Id.IntegerValue
+                if p_id not in found:
+                    found[p_id] = ParameterInfo(p, scope)
+                    infos.append(found[p_id])
+        return infos
+
+    def parameters(self, scope=TYPE):
+        if scope not in self._scopes:
+            self._scopes[scope] = self._collect(scope)
+        return self._scopes[scope]
+
+    def find(self, name, scope=TYPE):
+        for info in self.parameters(scope):
+            if info.name == name:
+                return info
+
+    def document_changed(self, added, deleted, modified):
+        return not added and not deleted
+
+
+def get_parameter_catalog(category, doc=revit.doc):
+    return get_doc_cache(doc).get("parameters:{}".format(int(category)),
+                                  lambda d: ParameterCatalog(d, category))
+
+
+_VALUE_GETTERS = {
+    DB.StorageType.ElementId: lambda p: p.AsElementId(),
+    DB.StorageType.Integer: lambda p: p.AsInteger(),
+    DB.StorageType.Double: lambda p: p.AsDouble(),
+    DB.StorageType.String: lambda p: p.AsString(),
+}
+
+_STRING_GETTERS = {
+    DB.StorageType.ElementId: lambda p: p.AsElementId().IntegerValue,
+    DB.StorageType.Integer: lambda p: p.AsInteger(),
+    DB.StorageType.Double: lambda p: p.AsValueString(),
+    DB.StorageType.String: lambda p: p.AsString(),
+}
+
+
+def value_getter(parameter, as_string=False):
+    # the accessor reading a value of this parameter's storage type
+    if not as_string:
+        return _VALUE_GETTERS.get(parameter.StorageType)
+    if parameter.StorageType == DB.StorageType.ElementId and parameter.Definition.Name == "Category":
+        return lambda p: p.AsValueString()
+    return _STRING_GETTERS.get(parameter.StorageType)
+
+
+def _parameter_lookup(name_or_bip):
+    if isinstance(name_or_bip, DB.BuiltInParameter):
+        return lambda el: el.get_Parameter(name_or_bip)
+    return lambda el: el.LookupParameter(name_or_bip)
+
+
+def lookup_parameter(el, name_or_bip):
+    # the parameter of the element by name or BuiltInParameter, None if it has none
+    return _parameter_lookup(name_or_bip)(el)
+
+
+class ParameterTable(object):
+    """Parameter values in columns, one list per parameter aligned with ids"""
+
+    def __init__(self, names_or_bips):
+        self.ids = []
+        self.columns = dict((key, []) for key in names_or_bips)
+
+    def __getitem__(self, name_or_bip):
+        return self.columns[name_or_bip]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def extract_parameters(elements, names_or_bips, as_string=False):
+    # read the given parameters (names or BuiltInParameters) of all the elements
+    # the value accessor is resolved once per parameter id, missing values are None
+    table = ParameterTable(names_or_bips)
+    lookups = [(_parameter_lookup(key), table.columns[key]) for key in names_or_bips]
+    getters = {}
+    for el in elements:
+        table.ids.append(el.Id)
+        for lookup, column in lookups:
+            p = lookup(el)
+            if p is None or not p.HasValue:
+                column.append(None)
+                continue
+            p_id = p.Id.IntegerValue
+            getter = getters.get(p_id)
+            if getter is None:
+                getter = getters[p_id] = value_getter(p, as_string)
+            column.append(getter(p) if getter else None)
+    return table
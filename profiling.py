@@ -0,0 +1,213 @@
+"""Opt-in call profiling of the pychilizer helpers.
+
+Nothing is instrumented until ``enable`` is called (or the ``profiled`` context
+manager is entered): the public functions of the profiled modules are then
+replaced by timing wrappers, and restored by ``disable``.
+
+    with profiling.profiled() as profiler:
+        run_tool()
+    profiler.print_report()
+"""
+
+from contextlib import contextmanager
+from timeit import default_timer
+import inspect
+import json
+
+DEFAULT_MODULES = ("database", "geo", "colorize", "units")
+COLUMNS = ["Function", "Calls", "Total (ms)", "Average (ms)", "Collectors", "Elements", "Regenerations"]
+COUNTERS = ("collectors", "elements", "regenerations")
+
+_ACTIVE = []
+
+
+class CallStats(object):
+    """Inclusive totals of one profiled function"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.collectors = 0
+        self.elements = 0
+        self.regenerations = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "wall": self.wall,
+            "collectors": self.collectors,
+            "elements": self.elements,
+            "regenerations": self.regenerations,
+        }
+
+
+class Profiler(object):
+    """Call counts, wall time and Revit work of the instrumented functions.
+
+    Collectors are counted when a Query builds one, elements when they are
+    read from a Query, and regenerations through database.regenerate. The
+    counts are added to every profiled function on the call stack.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.total = CallStats("total")
+        self._stack = []
+        self._patched = []
+
+    def _stats(self, name):
+        if name not in self.stats:
+            self.stats[name] = CallStats(name)
+        return self.stats[name]
+
+    def count(self, counter, n=1):
+        setattr(self.total, counter, getattr(self.total, counter) + n)
+        for stats in set(self._stack):
+            setattr(stats, counter, getattr(stats, counter) + n)
+
+    def wrap(self, name, func):
+        profiler = self
+
+        def profiled_call(*args, **kwargs):
+            stats = profiler._stats(name)
+            stats.calls += 1
+            profiler._stack.append(stats)
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = default_timer() - start
+                profiler._stack.pop()
+                # recursive calls are only timed once
+                if stats not in profiler._stack:
+                    stats.wall += elapsed
+
+        profiled_call.__name__ = func.__name__
+        profiled_call.__doc__ = func.__doc__
+        return profiled_call
+
+    def patch(self, owner, attr, replacement):
+        self._patched.append((owner, attr, getattr(owner, attr)))
+        setattr(owner, attr, replacement)
+
+    def instrument_module(self, module):
+        for name, func in list(vars(module).items()):
+            if name.startswith("_") or not inspect.isfunction(func) or func.__module__ != module.__name__:
+                continue
+            self.patch(module, name, self.wrap("{}.{}".format(module.__name__.split(".")[-1], name), func))
+
+    def instrument_queries(self):
+        from pychilizer.dbquery import Query
+        from pychilizer import database
+        profiler = self
+        collector = Query.collector
+        elements = Query.elements
+        ids = Query.ids
+        iterate = Query.__iter__
+        regenerate = database.regenerate
+
+        def counted_collector(query):
+            profiler.count("collectors")
+            return collector(query)
+
+        def counted_elements(query):
+            found = elements(query)
+            profiler.count("elements", found.Count)
+            return found
+
+        def counted_ids(query):
+            found = ids(query)
+            profiler.count("elements", found.Count)
+            return found
+
+        def counted_iter(query):
+            for el in iterate(query):
+                profiler.count("elements")
+                yield el
+
+        def counted_regenerate(*args, **kwargs):
+            profiler.count("regenerations")
+            return regenerate(*args, **kwargs)
+
+        self.patch(Query, "collector", counted_collector)
+        self.patch(Query, "elements", counted_elements)
+        self.patch(Query, "ids", counted_ids)
+        self.patch(Query, "__iter__", counted_iter)
+        self.patch(database, "regenerate", counted_regenerate)
+
+    def restore(self):
+        while self._patched:
+            owner, attr, original = self._patched.pop()
+            setattr(owner, attr, original)
+
+    def rows(self):
+        # report rows, slowest first
+        rows = []
+        for stats in sorted(self.stats.values(), key=lambda s: s.wall, reverse=True):
+            average = stats.wall / stats.calls if stats.calls else 0.0
+            rows.append([stats.name, stats.calls, round(stats.wall * 1000, 1), round(average * 1000, 3),
+                         stats.collectors, stats.elements, stats.regenerations])
+        return rows
+
+    def as_dict(self):
+        return {
+            "total": self.total.as_dict(),
+            "functions": dict((name, stats.as_dict()) for name, stats in self.stats.items()),
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2, sort_keys=True)
+
+    def save_json(self, path=None):
+        if path is None:
+            from pyrevit import script
+            path = script.get_data_file("pychilizer_profile", "json")
+        with open(path, "w") as f:
+            f.write(self.to_json())
+        return path
+
+    def print_report(self, output=None, title="pychilizer profile"):
+        if output is None:
+            from pyrevit import script
+            output = script.get_output()
+        output.print_table(table_data=self.rows(), columns=COLUMNS, title=title)
+
+
+def _import_modules(module_names):
+    import importlib
+    return [importlib.import_module("pychilizer." + name) for name in module_names]
+
+
+def enable(module_names=DEFAULT_MODULES):
+    # start profiling the public functions of the given pychilizer modules
+    if _ACTIVE:
+        return _ACTIVE[0]
+    profiler = Profiler()
+    for module in _import_modules(module_names):
+        profiler.instrument_module(module)
+    profiler.instrument_queries()
+    _ACTIVE.append(profiler)
+    return profiler
+
+
+def disable():
+    # stop profiling and return the profiler holding the results
+    if not _ACTIVE:
+        return None
+    profiler = _ACTIVE.pop()
+    profiler.restore()
+    return profiler
+
+
+def active_profiler():
+    return _ACTIVE[0] if _ACTIVE else None
+
+
+@contextmanager
+def profiled(module_names=DEFAULT_MODULES):
+    profiler = enable(module_names)
+    try:
+        yield profiler
+    finally:
+        disable()
@@ -0,0 +1,100 @@
+"""Singleton resources of a document, looked up once and kept as ids"""
+
+from pyrevit import revit, DB
+from pychilizer.doccache import get_doc_cache
+from pychilizer.dbquery import Query
+
+INVISIBLE_LINES_ID = int(DB.BuiltInCategory.OST_InvisibleLines)
+
+# element classes the resources are looked up from, a new element of one can change a lookup
+RESOURCE_CLASSES = (DB.FillPatternElement, DB.GraphicsStyle, DB.FilledRegionType, DB.ViewFamilyType)
+
+
+def _find_solid_fill_pattern(doc):
+    # the solid fill has a language-specific name, so look at the pattern itself
+    for pat in Query(doc).of_class(DB.FillPatternElement):
+        if pat.GetFillPattern().IsSolidFill:
+            return pat
+
+
+def _find_invisible_lines_style(doc):
+    for gs in Query(doc).of_class(DB.GraphicsStyle):
+        if gs.GraphicsStyleCategory.Id.IntegerValue == INVISIBLE_LINES_ID:
+            return gs
+
+
+def _find_filled_region_type(doc):
+    return Query(doc).of_class(DB.FilledRegionType).first()
+
+
+class DocumentResources(object):
+    """Ids of the solid fill pattern, the invisible lines style, a filled region
+    type and the view family types of a document.
+
+    Each lookup scans its class once. The cache stays valid until one of the
+    cached elements is modified or deleted, or an element of one of the
+    resource classes is added.
+    """
+
+    # only the added and modified elements of these classes are passed to document_changed
+    element_classes = RESOURCE_CLASSES
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._ids = {}
+        self._view_family_types = None
+
+    def _id(self, name, find):
+        if name not in self._ids:
+            el = find(self.doc)
+            self._ids[name] = el.Id if el is not None else None
+        return self._ids[name]
+
+    def _element(self, el_id):
+        return self.doc.GetElement(el_id) if el_id is not None else None
+
+    def solid_fill_pattern_id(self):
+        return self._id("solid_fill_pattern", _find_solid_fill_pattern)
+
+    def invisible_lines_style_id(self):
+        return self._id("invisible_lines_style", _find_invisible_lines_style)
+
+    def filled_region_type_id(self):
+        return self._id("filled_region_type", _find_filled_region_type)
+
+    def solid_fill_pattern(self):
+        return self._element(self.solid_fill_pattern_id())
+
+    def invisible_lines_style(self):
+        return self._element(self.invisible_lines_style_id())
+
+    def filled_region_type(self):
+        return self._element(self.filled_region_type_id())
+
+    def view_family_type_ids(self, view_family):
+        if self._view_family_types is None:
+            self._view_family_types = {}
+            for vt in Query(self.doc).of_class(DB.ViewFamilyType):
+                self._view_family_types.setdefault(vt.ViewFamily, []).append(vt.Id)
+        return list(self._view_family_types.get(view_family, []))
+
+    def view_family_types(self, view_family):
+        return [self.doc.GetElement(vt_id) for vt_id in self.view_family_type_ids(view_family)]
+
+    def _cached_ids(self):
+        cached = set(el_id.IntegerValue for el_id in self._ids.values() if el_id is not None)
+        for vt_ids in (self._view_family_types or {}).values():
+            cached.update(vt_id.IntegerValue for vt_id in vt_ids)
+        return cached
+
+    def document_changed(self, added, deleted, modified):
+        cached = self._cached_ids()
+        for el_id in deleted + modified:
+            if el_id.IntegerValue in cached:
+                return False
+        # added holds only elements of the resource classes
+        return not added
+
+
+def get_resources(doc=revit.doc):
+    return get_doc_cache(doc).get("resources", DocumentResources)
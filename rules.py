@@ -0,0 +1,114 @@
+"""Filter rules and parameter filters, built once and reused"""
+
+from pyrevit import DB, HOST_APP
+from pyrevit.framework import List
+
+BIP = DB.BuiltInParameter
+
+# cached filters are dropped all at once past this size
+MAX_CACHED_FILTERS = 2048
+
+_PROVIDERS = {}
+_FILTERS = {}
+
+# the FilterStringRule constructor lost its caseSensitive argument in Revit 2023
+if HOST_APP.is_newer_than(2022):
+    def _string_rule(provider, evaluator, value):
+        return DB.FilterStringRule(provider, evaluator, value)
+else:
+    def _string_rule(provider, evaluator, value):
+        return DB.FilterStringRule(provider, evaluator, value, True)
+
+
+# tolerance of double equality rules, in internal units
+DOUBLE_EPSILON = 1e-6
+
+
+def value_provider(bip):
+    # bip can also be the ElementId of a shared or project parameter
+    key = bip.IntegerValue if isinstance(bip, DB.ElementId) else bip
+    provider = _PROVIDERS.get(key)
+    if provider is None:
+        provider = DB.ParameterValueProvider(bip if isinstance(bip, DB.ElementId) else DB.ElementId(bip))
+        _PROVIDERS[key] = provider
+    return provider
+
+
+def string_rule(bip, value, evaluator=DB.FilterStringEquals):
+    return _string_rule(value_provider(bip), evaluator(), value)
+
+
+def integer_rule(bip, value, evaluator=DB.FilterNumericEquals):
+    return DB.FilterIntegerRule(value_provider(bip), evaluator(), value)
+
+
+def equals_rule(bip, storage_type, value):
+    # rule passing elements whose parameter of the given storage type equals value
+    provider = value_provider(bip)
+    if storage_type == DB.StorageType.String:
+        return _string_rule(provider, DB.FilterStringEquals(), value)
+    if storage_type == DB.StorageType.Integer:
+        return DB.FilterIntegerRule(provider, DB.FilterNumericEquals(), value)
+    if storage_type == DB.StorageType.Double:
+        return DB.FilterDoubleRule(provider, DB.FilterNumericEquals(), value, DOUBLE_EPSILON)
+    if storage_type == DB.StorageType.ElementId:
+        return DB.FilterElementIdRule(provider, DB.FilterNumericEquals(), value)
+    raise ValueError("No equality rule for parameters of storage type {}".format(storage_type))
+
+
+def parameter_filter(rules):
+    # one ElementParameterFilter passing elements that satisfy all the rules
+    return DB.ElementParameterFilter(List[DB.FilterRule](rules))
+
+
+def _cached_filter(key, make_rule):
+    param_filter = _FILTERS.get(key)
+    if param_filter is None:
+        if len(_FILTERS) >= MAX_CACHED_FILTERS:
+            _FILTERS.clear()
+        param_filter = DB.ElementParameterFilter(make_rule())
+        _FILTERS[key] = param_filter
+    return param_filter
+
+
+def string_filter(bip, value, evaluator=DB.FilterStringEquals):
+    return _cached_filter((bip, evaluator, value), lambda: string_rule(bip, value, evaluator))
+
+
+def integer_filter(bip, value, evaluator=DB.FilterNumericEquals):
+    return _cached_filter((bip, evaluator, value), lambda: integer_rule(bip, value, evaluator))
+
+
+def rule_signature(rule):
+    # comparable description of a filter rule, None for rule kinds it does not know
+    if isinstance(rule, DB.FilterInverseRule):
+        inner = rule_signature(rule.GetInnerRule())
+        return ("not", inner) if inner is not None else None
+    if isinstance(rule, DB.FilterStringRule):
+        value = rule.RuleString
+    elif isinstance(rule, DB.FilterElementIdRule):
+        value = rule.RuleValue.IntegerValue
+    elif isinstance(rule, DB.FilterDoubleRule):
+        value = (rule.RuleValue, rule.Epsilon)
+    elif isinstance(rule, DB.FilterIntegerRule):
+        value = rule.RuleValue
+    else:
+        return None
+    return (type(rule).__name__, rule.GetRuleParameter().IntegerValue, type(rule.GetEvaluator()).__name__, value)
+
+
+def filter_signature(element_filter):
+    # comparable description of a parameter filter and its nested filters, None if it cannot be described
+    if element_filter is None:
+        return ()
+    if isinstance(element_filter, DB.ElementParameterFilter):
+        children = [rule_signature(rule) for rule in element_filter.GetRules()]
+        kind = ("rules", element_filter.Inverted)
+    elif isinstance(element_filter, DB.ElementLogicalFilter):
+        children = [filter_signature(child) for child in element_filter.GetFilters()]
+        kind = (type(element_filter).__name__,)
+    else:
+        return None
+    if None in children:
+        return None
+    return kind + (tuple(children),)
@@ -1,8 +1,8 @@
-from pyrevit import revit, DB, forms
+from pyrevit import revit, DB
 from Autodesk.Revit.UI.Selection import ObjectType, ISelectionFilter
 from Autodesk.Revit import Exceptions
-import rpw
 from pychilizer import database
+from pychilizer import lazymodule
 
 BIC = DB.BuiltInCategory
 
@@ -30,6 +30,8 @@ class CatFilter(ISelectionFilter):
 
 
 def select_with_cat_filter(cat, message):
+    from pyrevit import forms
+    import rpw
     pre_selection = preselection_with_filter(cat)
     if pre_selection and forms.alert(
             "You have selected {} elements. Do you want to use them?".format(len(pre_selection)), no=True):
@@ -49,9 +51,14 @@ def select_with_cat_filter(cat, message):
 
 def preselection_with_filter(cat):
     # use pre-selection of elements, but filter them by given category name
+    import rpw
     pre_selection = []
     for id in rpw.revit.uidoc.Selection.GetElementIds():
         sel_el = revit.doc.GetElement(id)
         if sel_el.Category.Id.IntegerValue == int(cat):
             pre_selection.append(sel_el)
-    return pre_selection
\ No newline at end of file
+    return pre_selection
+
+
+# the slow rpw and pyrevit.forms modules are only imported when read
+lazymodule.lazy_attributes(__name__, forms=lazymodule.importer("pyrevit.forms"), rpw=lazymodule.importer("rpw"))
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""Registry of the family templates (.rft) installed with Revit"""
+
+import json
+import os
+from pyrevit import HOST_APP, DB
+import System
+from pychilizer import lazymodule
+
+BIC = DB.BuiltInCategory
+
+# kinds of template
+CATEGORY = "category"
+GENERIC = "generic"
+MASS = "mass"
+
+# category templates by language folder, paths relative to the language folder
+CATEGORY_TEMPLATES = {
+    "English": {
+        -2001000: "Metric Casework.rft",
+        -2000080: "Metric Furniture.rft",
+        -2001040: "Metric Electrical Equipment.rft",
+        -2001370: "Metric Entourage.rft",
+        -2001100: "Metric Furniture System.rft",
+        -2001120: "Metric Lighting Fixture.rft",
+        -2001140: "Metric Mechanical Equipment.rft",
+        -2001180: "Metric Parking.rft",
+        -2001360: "Metric Planting.rft",
+        -2001160: "Metric Plumbing Fixture.rft",
+        -2001260: "Metric Site.rft",
+        -2001350: "Metric Specialty Equipment.rft",
+    },
+    "English_I": {
+        -2001000: "Casework.rft",
+        -2000080: "Furniture.rft",
+        -2001040: "Electrical Equipment.rft",
+        -2001370: "Entourage.rft",
+        -2001100: "Furniture System.rft",
+        -2001120: "Lighting Fixture.rft",
+        -2001140: "Mechanical Equipment.rft",
+        -2001180: "Parking.rft",
+        -2001360: "Planting.rft",
+        -2001160: "Plumbing Fixture.rft",
+        -2001260: "Site.rft",
+        -2001350: "Specialty Equipment.rft",
+    },
+    "French": {
+        -2001000: "Meubles de rangement métriques.rft",
+        -2000080: "Mobilier métrique.rft",
+        -2001040: "Equipement électrique métrique.rft",
+        -2001370: "Environnement métrique.rft",
+        -2001100: "Système de mobilier métrique.rft",
+        -2001120: "Luminaires métriques.rft",
+        -2001140: "Equipement mécanique métrique.rft",
+        -2001180: "Parking métrique.rft",
+        -2001360: "Plantes métriques.rft",
+        -2001160: "Installations de plomberie métriques.rft",
+        -2001260: "Site métrique.rft",
+        -2001350: "Equipement spécialisé métrique.rft",
+    },
+    "German": {
+        -2001040: "Elektrogeräte.rft",
+        -2001120: "Leuchten.rft",
+        -2001140: "Mechanische Geräte.rft",
+        -2001360: "Bepflanzung.rft",
+        -2001160: "Sanitärinstallation.rft",
+    },
+}
+CATEGORY_TEMPLATES["English-Imperial"] = CATEGORY_TEMPLATES["English_I"]
+
+# generic model and mass templates, by a marker found in the language folder name
+GENERIC_TEMPLATES = [
+    ("English_I", "Generic Model.rft"),
+    ("English-I", "Generic Model.rft"),
+    ("English", "Metric Generic Model.rft"),
+    ("French", "Modèle générique métrique.rft"),
+    ("Spanish", "Modelo genérico métrico.rft"),
+    ("German", "Allgemeines Modell.rft"),
+    ("Russian", "Метрическая система, типовая модель.rft"),
+    ("Chinese", "基于两个标高的公制常规模型.rft"),
+    ("Czech", "Obecný model.rft"),
+    ("Italian", "Modello generico metrico.rft"),
+    ("Japanese", "一般モデル(メートル単位).rft"),
+    ("Korean", "미터법 일반 모델.rft"),
+    ("Polish", "Model ogólny (metryczny).rft"),
+    ("Portuguese", "Modelo genérico métrico.rft"),
+]
+
+MASS_TEMPLATES = [
+    ("French", "Volume conceptuel\\Volume métrique.rft"),
+    ("Spanish", "Masas conceptuales\\Masa métrica.rft"),
+    ("German", "Entwurfskörper\\Entwurfskörper.rft"),
+    ("Russian", "Концептуальные формы\\Метрическая система, формообразующий элемент.rft"),
+]
+DEFAULT_MASS_TEMPLATE = "Conceptual Mass\\Metric Mass.rft"
+
+GENERIC_MODEL_ID = int(BIC.OST_GenericModel)
+MASS_ID = int(BIC.OST_Mass)
+
+CACHE_FILE_ID = "pychilizer_family_templates"
+
+# language folder marker of the Revit UI languages not named after their folder
+UI_LANGUAGE_MARKERS = {
+    "Brazilian_Portuguese": "Portuguese",
+    "Chinese_Simplified": "Chinese",
+    "Chinese_Traditional": "Chinese",
+}
+
+
+def _by_marker(table, language, default=None):
+    for marker, name in table:
+        if marker in language:
+            return name
+    return default
+
+
+def known_templates(language):
+    # {(category id, kind): relative path} of the templates named in the tables above
+    known = {}
+    for category_id, name in CATEGORY_TEMPLATES.get(language, {}).items():
+        known[(category_id, CATEGORY)] = name
+    generic = _by_marker(GENERIC_TEMPLATES, language)
+    if generic:
+        known[(GENERIC_MODEL_ID, GENERIC)] = generic
+    known[(MASS_ID, MASS)] = _by_marker(MASS_TEMPLATES, language, DEFAULT_MASS_TEMPLATE)
+    return known
+
+
+def ui_language():
+    # name of the Revit UI language, e.g. "English_USA", the language of the category labels
+    return str(HOST_APP.language)
+
+
+def _in_ui_language(language, ui_lang):
+    # True if the language folder holds templates named in the UI language
+    return UI_LANGUAGE_MARKERS.get(ui_lang, ui_lang.split("_")[0]) in language
+
+
+def _stems(text):
+    # lowercase words of a label or file name, without a plural "s"
+    words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+
+def _label_candidates():
+    # (category id, kind, label stems) for templates matched by name
+    category_ids = set()
+    for names in CATEGORY_TEMPLATES.values():
+        category_ids.update(names)
+    candidates = [(cat_id, CATEGORY) for cat_id in category_ids]
+    candidates += [(GENERIC_MODEL_ID, GENERIC), (MASS_ID, MASS)]
+    return [(cat_id, kind, _stems(DB.LabelUtils.GetLabelFor(System.Enum.ToObject(BIC, cat_id))))
+            for cat_id, kind in candidates]
+
+
+def _match_by_label(rel_paths, candidates):
+    # the shortest file with a word for every word of the category label, singular or plural,
+    # so "Lighting Fixtures" matches "Metric Lighting Fixture.rft"
+    file_stems = [(rel, _stems(os.path.splitext(os.path.basename(rel))[0])) for rel in rel_paths]
+    matches = {}
+    for cat_id, kind, label_stems in candidates:
+        if not label_stems:
+            continue
+        named = [rel for rel, stems in file_stems
+                 if all(any(stem.startswith(label_stem) for stem in stems) for label_stem in label_stems)]
+        if named:
+            matches[(cat_id, kind)] = min(named, key=len)
+    return matches
+
+
+def scan_templates(root, ui_lang):
+    # [language, category id, kind, relative path] for every template found under root
+    entries = []
+    candidates = _label_candidates()
+    for language in sorted(os.listdir(root)):
+        lang_folder = os.path.join(root, language)
+        if not os.path.isdir(lang_folder):
+            continue
+        rel_paths = []
+        for dirpath, dirnames, filenames in os.walk(lang_folder):
+            for filename in filenames:
+                if filename.lower().endswith(".rft"):
+                    rel_paths.append(os.path.relpath(os.path.join(dirpath, filename), lang_folder))
+        found = dict((rel.lower(), rel) for rel in rel_paths)
+        templates = {}
+        for key, name in known_templates(language).items():
+            if name.lower() in found:
+                templates[key] = found[name.lower()]
+        # fill the gaps of the tables by matching the category labels in file names,
+        # only in the folders of the UI language the labels are in
+        if _in_ui_language(language, ui_lang):
+            for key, rel in _match_by_label(rel_paths, candidates).items():
+                templates.setdefault(key, rel)
+        for (cat_id, kind), rel in templates.items():
+            entries.append([language, cat_id, kind, rel])
+    return entries
+
+
+def _folder_stamp(root):
+    # latest modification time of the root folder and of its language folders
+    stamps = [os.path.getmtime(root)]
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            stamps.append(os.path.getmtime(path))
+    return max(stamps)
+
+
+class TemplateRegistry(object):
+    """Family templates indexed by (language, category id, kind).
+
+    The index is built by scanning the template root folder and is cached to
+    disk until the root or one of its language folders is modified, or Revit
+    runs in another UI language, which the category labels are matched in.
+    """
+
+    def __init__(self, root, entries):
+        self.root = root
+        self._paths = {}
+        for language, cat_id, kind, rel in entries:
+            self._paths[(language, cat_id, kind)] = rel
+
+    @classmethod
+    def load(cls, root):
+        if not os.path.isdir(root):
+            return cls(root, [])
+        from pyrevit import script
+        stamp = _folder_stamp(root)
+        ui_lang = ui_language()
+        cache_file = script.get_universal_data_file(CACHE_FILE_ID, "json")
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            if cached["root"] == root and cached["stamp"] == stamp and cached["ui_language"] == ui_lang:
+                return cls(root, cached["entries"])
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+        entries = scan_templates(root, ui_lang)
+        try:
+            with open(cache_file, "w") as f:
+                json.dump({"root": root, "stamp": stamp, "ui_language": ui_lang, "entries": entries}, f)
+        except (IOError, OSError):
+            pass
+        return cls(root, entries)
+
+    def relative_path(self, language, kind, category_id):
+        return self._paths.get((language, category_id, kind))
+
+    def path(self, language, kind, category_id):
+        rel = self.relative_path(language, kind, category_id)
+        if rel:
+            return os.path.join(self.root, language, rel)
+
+
+_REGISTRIES = {}
+
+
+def get_template_registry(language_folder):
+    # registry of the template root holding the given language folder, loaded once per session
+    root = os.path.dirname(language_folder.rstrip("\\/"))
+    if root not in _REGISTRIES:
+        _REGISTRIES[root] = TemplateRegistry.load(root)
+    return _REGISTRIES[root]
+
+
+# pyrevit.script is only imported when read
+lazymodule.lazy_attributes(__name__, script=lazymodule.importer("pyrevit.script"))
@@ -1,4 +1,5 @@
-from pyrevit import revit, DB, script, forms, HOST_APP, coreutils
+from pyrevit import revit, DB, HOST_APP
+from pychilizer import lazymodule
 
 
 def convert_length_to_internal(value, doc=revit.doc):
@@ -81,3 +82,9 @@ def convert_display_string_to_internal(value_string, doc=revit.doc):
     parse = DB.UnitFormatUtils.TryParse(doc.GetUnits(), spec_type_id, value_string, options)
     value_in_internal_units = parse[1]
     return value_in_internal_units
+
+
+# the slow pyrevit modules this module used to import are only imported when read
+lazymodule.lazy_attributes(__name__, forms=lazymodule.importer("pyrevit.forms"),
+                           script=lazymodule.importer("pyrevit.script"),
+                           coreutils=lazymodule.importer("pyrevit.coreutils"))